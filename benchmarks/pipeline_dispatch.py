@@ -0,0 +1,69 @@
+"""
+Statistics of the alternatives of the tweet tokenizer, and speedup of the tokenizer dispatching them on the first
+character (see tweet_nlp_toolkit.prep.pipeline_stats).
+
+The cells of first characters are ordered by frequency on a sample of the corpus. The dispatch tokenizer is checked
+to find the same tokens as the tokenizer on the corpus and on random strings of its special characters.
+
+Usage:
+
+    python benchmarks/pipeline_dispatch.py [--lines 20000] [--sample 500] [--repeat 5]
+"""
+import argparse
+import random
+import timeit
+
+from tokenizer_throughput import build_corpus
+
+from tweet_nlp_toolkit.prep.pipeline_stats import collect_stats, compile_dispatch_tokenizer, first_character_cells
+from tweet_nlp_toolkit.prep.regexes import TWEET_TOKENIZE
+
+FUZZ_ALPHABET = list("()[]{}<>|/\\-^'\",xX:=%#$8;*0oOcDPpSsJLbB3.@&+_ aZé1\t\nhw") + [
+    "www.",
+    "http://",
+    ".com",
+    "@b.co",
+    "😂",
+    "👍🏽",
+    "1⃣",
+    "中文",
+    "ทด",
+    "<3",
+    "<a>",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--sample", type=int, default=500, help="number of lines of the statistics")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fuzz", type=int, default=100000, help="number of random strings compared")
+    args = parser.parse_args()
+
+    corpus = [text.lower() for text in build_corpus(args.lines)]
+    sample = corpus[: args.sample]
+    print(f"{'alternative':<16} {'attempts':>10} {'matches':>8} {'failures':>9} {'seconds':>8}")
+    for stats in collect_stats(sample):
+        print(f"{stats.name:<16} {stats.attempts:10d} {stats.matches:8d} {stats.failures:9d} {stats.seconds:8.4f}")
+
+    cells = first_character_cells(sample)
+    print(f"cells: {cells}")
+    dispatch = compile_dispatch_tokenizer(cells)
+    different = sum(dispatch.findall(text) != TWEET_TOKENIZE.findall(text) for text in corpus)
+    rng = random.Random(0)
+    fuzz = ["".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(1, 30))) for _ in range(args.fuzz)]
+    different_fuzz = sum(dispatch.findall(text) != TWEET_TOKENIZE.findall(text) for text in fuzz)
+    print(f"texts tokenized differently: {different} of the corpus, {different_fuzz} of {args.fuzz} random strings")
+
+    timings = {}
+    for name, tokenizer in (("pipeline", TWEET_TOKENIZE), ("dispatch", dispatch)):
+        timings[name] = min(
+            timeit.repeat(lambda: [tokenizer.findall(text) for text in corpus], number=1, repeat=args.repeat)
+        )
+        print(f"{name:<10} {args.lines / timings[name]:10.0f} lines/sec")
+    print(f"speedup: {timings['pipeline'] / timings['dispatch']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Throughput and token output of the tokenizer compiled by each regex backend, compared to the stdlib re.
+
+Backends whose engine isn't installed are skipped. The corpus is the one of tokenizer_throughput.py, followed by
+adversarial texts: long runs of characters on which the tokenizer backtracks.
+
+Usage:
+
+    python benchmarks/regex_backends.py [--lines 20000] [--repeat 5]
+"""
+import argparse
+import timeit
+
+from tokenizer_throughput import build_corpus
+
+from tweet_nlp_toolkit.prep.regex_backends import REGEX_BACKENDS
+from tweet_nlp_toolkit.prep.regexes import compile_tokenizer
+
+ADVERSARIAL_MOTIFS = ["+", "-", "(", "/", "<", "a.", "ab-", ":("]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--length", type=int, default=4000, help="length of the adversarial texts")
+    args = parser.parse_args()
+
+    corpora = {
+        "corpus": build_corpus(args.lines),
+        "adversarial": [motif * (args.length // len(motif)) for motif in ADVERSARIAL_MOTIFS],
+    }
+    tokenizers = {}
+    for name in REGEX_BACKENDS:
+        try:
+            tokenizers[name] = compile_tokenizer(name)
+        except ImportError as exc:
+            print(f"skipping the {name} backend: {exc}")
+    reference = tokenizers["re"]
+    for corpus_name, corpus in corpora.items():
+        print(f"{corpus_name}: {len(corpus)} texts")
+        expected = [reference.findall(text) for text in corpus]
+        for name, tokenizer in tokenizers.items():
+            timing = min(
+                timeit.repeat(lambda: [tokenizer.findall(text) for text in corpus], number=1, repeat=args.repeat)
+            )
+            different = sum(tokenizer.findall(text) != tokens for text, tokens in zip(corpus, expected))
+            print(f"  {name:<8} {len(corpus) / timing:10.0f} texts/sec {different:6d} texts tokenized differently")
+
+
+if __name__ == "__main__":
+    main()
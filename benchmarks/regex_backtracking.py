@@ -0,0 +1,66 @@
+"""
+Look for inputs taking super-linear time to be tokenized, e.g. long runs of punctuations backtracking in an
+alternative of the tokenizer.
+
+Inputs repeat a motif: every character of the tokenizer's special alphabet, and random motifs of it. Each input is
+tokenized at `--length` and twice that length, the ratio of the timings is ~2 for linear time and ~4 for quadratic
+time. The slowest inputs are then timed alternative by alternative of the pipeline to find the culprits.
+
+Usage:
+
+    python benchmarks/regex_backtracking.py [--length 2000] [--motifs 200] [--top 10]
+"""
+import argparse
+import random
+import re
+import time
+import warnings
+
+from tweet_nlp_toolkit.prep import regexes
+
+ALPHABET = list("()[]{}<>|/\\-‑^'\",xX:=%#$8;*0oOcDPpSs3.@&+_!?~ a1é") + ["www.", "http://", ".com", "#a", "@a"]
+
+
+def timing(pattern, text: str) -> float:
+    start = time.perf_counter()
+    pattern.findall(text)
+    return time.perf_counter() - start
+
+
+def motifs(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    yield from ALPHABET
+    for _ in range(count):
+        yield "".join(rng.choice(ALPHABET) for _ in range(rng.randint(2, 4)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--length", type=int, default=2000, help="length of the inputs in characters")
+    parser.add_argument("--motifs", type=int, default=200, help="number of random motifs")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest inputs reported")
+    parser.add_argument("--weibo", action="store_true", help="fuzz the Weibo tokenizer instead of the tweet one")
+    args = parser.parse_args()
+
+    tokenizer = regexes.WEIBO_TOKENIZE if args.weibo else regexes.TWEET_TOKENIZE
+    pipeline = regexes._TOKEN_PIPELINE_COPY if args.weibo else regexes._TOKEN_PIPELINE
+    results = []
+    for motif in motifs(args.motifs):
+        text = motif * (args.length // len(motif))
+        short, long = timing(tokenizer, text), timing(tokenizer, text * 2)
+        results.append((long, long / max(short, 1e-9), motif))
+    results.sort(reverse=True)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # nested sets of the emoticons
+        alternatives = [(i, re.compile(alternative, re.UNICODE)) for i, alternative in enumerate(pipeline)]
+    print(f"{'motif':<10} {'time (s)':>10} {'ratio':>6}  slowest alternatives")
+    for long, ratio, motif in results[: args.top]:
+        text = motif * (2 * args.length // len(motif))
+        slowest = sorted(((timing(pattern, text), i) for i, pattern in alternatives), reverse=True)[:3]
+        culprits = ", ".join(f"#{i} {seconds:.3f}s" for seconds, i in slowest)
+        print(f"{motif!r:<10} {long:10.4f} {ratio:6.1f}  {culprits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of the tweet tokenizer with and without the emoji sequence alternative.
+
+Usage:
+
+    python benchmarks/tokenizer_throughput.py [--lines 20000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import timeit
+
+from tweet_nlp_toolkit.prep import regexes
+
+WORDS = ["the", "new", "season", "can't", "wait", "for", "this", "is", "waaaay", "too", "much", "c'est", "génial"]
+ENTITIES = ["@nlp", "#tvseries", "https://t.co/skU8zM7Slh", "www.url.com", "tutu@gmail.com", "123", "12.34", ":)",
+            ":-(", "<3", "...", "!", "?", ":joy:", "😰", "😂", "❤"]
+EMOJI_SEQUENCES = ["👨‍👩‍👧", "🇫🇷", "1⃣", "👍🏽", "❤‍🔥"]
+
+
+def build_corpus(lines: int, emoji_sequences: bool = True, seed: int = 0):
+    rng = random.Random(seed)
+    vocabulary = WORDS * 4 + ENTITIES + (EMOJI_SEQUENCES if emoji_sequences else [])
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 30))) for _ in range(lines)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pipeline = [alternative for alternative in regexes._TOKEN_PIPELINE if alternative != regexes.EMOJI_SEQUENCE]
+    tokenizers = {
+        "without emoji sequences": re.compile("|".join(pipeline), re.UNICODE),
+        "with emoji sequences": regexes.TWEET_TOKENIZE,
+    }
+    for emoji_sequences in (False, True):
+        corpus = build_corpus(args.lines, emoji_sequences=emoji_sequences)
+        print(f"corpus {'with' if emoji_sequences else 'without'} emoji sequences")
+        for name, tokenizer in tokenizers.items():
+            timing = min(
+                timeit.repeat(lambda: [tokenizer.findall(text) for text in corpus], number=1, repeat=args.repeat)
+            )
+            tokens = sum(len(tokenizer.findall(text)) for text in corpus)
+            print(f"  {name:<25} {args.lines / timing:10.0f} lines/sec {tokens:10d} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url=about['__url__'],
     packages=setuptools.find_packages(exclude=["tests.*", "tests"]),
+    package_data={"tweet_nlp_toolkit": ["resources/*.bin", "resources/*.zip"]},
     classifiers=[
         "License :: OSI Approved :: Apache Software License",
         "Programming Language :: Python :: 3.6"
@@ -30,5 +31,19 @@ setuptools.setup(
         "mosestokenizer==1.2.1",
         "jieba==0.42.1",
         "pythainlp==2.3.2",
-    ]
+    ],
+    entry_points={
+        "console_scripts": [
+            "tweet-nlp-prep=tweet_nlp_toolkit.cli:main",
+            "tweet-nlp-serve=tweet_nlp_toolkit.prep.server:main",
+        ],
+    },
+    extras_require={
+        "zstd": ["zstandard"],
+        "json": ["orjson"],
+        "numpy": ["numpy"],
+        "arrow": ["pyarrow"],
+        "pandas": ["pandas"],
+        "regex": ["regex"],
+    },
 )
@@ -0,0 +1,88 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tweet_nlp_toolkit.features.corpus_stats import CorpusStats, CountMinSketch
+from tweet_nlp_toolkit.prep.text_parser import parse_many
+
+TEXTS = ["#nlp is fun #nlp @remy 😀", "#python @remy @tutu hello", "hello 😀 😀 #nlp"]
+
+
+def _stats(texts, **kwargs):
+    return CorpusStats(**kwargs).update(parse_many(texts))
+
+
+def test_count_min_sketch():
+    sketch = CountMinSketch(width=64, depth=3)
+    sketch.add(["a", "b", "a"])
+    sketch.add(["c"], [5])
+    estimates = sketch.estimate(["a", "b", "c", "d"]).tolist()
+    assert estimates[0] >= 2 and estimates[1] >= 1 and estimates[2] >= 5
+    assert sketch.table.sum() == 3 * 8
+    with pytest.raises(ValueError):
+        sketch.merge(CountMinSketch(width=32, depth=3))
+
+
+def test_count_min_sketch_rows_are_independent():
+    sketch = CountMinSketch(width=64, depth=4)
+    # values of the same length, whose crc32 with different start values only differ by a constant
+    columns = sketch._columns([f"value{i:05d}" for i in range(2000)])
+    colliding = columns[0][:, None] == columns[0][None, :]
+    np.fill_diagonal(colliding, False)
+    for row in columns[1:]:
+        still_colliding = colliding & (row[:, None] == row[None, :])
+        # about 1 / 64 of the pairs colliding in the first row collide in another one
+        assert still_colliding.sum() < 0.05 * colliding.sum()
+    with pytest.raises(ValueError):
+        CountMinSketch(seed=-1)
+
+
+def test_corpus_stats_exact():
+    stats = _stats(TEXTS)
+    assert stats.texts == 3
+    assert stats.tokens == sum(stats.kind_counts.values()) == 14
+    assert stats.kind_counts["hashtag"] == 4
+    assert stats.most_common("hashtag") == [("#nlp", 3), ("#python", 1)]
+    assert stats.most_common("mention", 1) == [("@remy", 2)]
+    assert stats.count("emoji", "😀") == 3
+    assert stats.count("word", "unknown") == 0
+
+
+def test_corpus_stats_sketch():
+    stats = _stats(TEXTS * 10, exact=False, top_k=1, width=1024, kinds=["hashtag", "emoji"])
+    assert stats.most_common("hashtag") == [("#nlp", 30)]
+    assert stats.count("emoji", "😀") >= 30
+    with pytest.raises(KeyError):
+        stats.count("mention", "@remy")
+
+
+def test_corpus_stats_update_in_batches():
+    assert _stats(TEXTS).most_common("word") == CorpusStats().update(parse_many(TEXTS), batch_size=1).most_common("word")
+
+
+@pytest.mark.parametrize("exact", [True, False])
+def test_corpus_stats_merge(exact):
+    kwargs = dict(exact=exact, width=1024)
+    merged = _stats(TEXTS[:1], **kwargs).merge(_stats(TEXTS[1:], **kwargs))
+    expected = _stats(TEXTS, **kwargs)
+    assert merged.texts == expected.texts and merged.tokens == expected.tokens
+    assert merged.most_common("hashtag") == expected.most_common("hashtag")
+    with pytest.raises(ValueError):
+        merged.merge(CorpusStats(exact=not exact))
+
+
+@pytest.mark.parametrize("exact", [True, False])
+def test_corpus_stats_merge_across_processes(exact):
+    with ProcessPoolExecutor(2) as executor:
+        partial_stats = list(executor.map(partial(_stats, exact=exact, width=1024), [TEXTS[:2], TEXTS[2:]]))
+    merged = pickle.loads(pickle.dumps(partial_stats[0])).merge(partial_stats[1])
+    assert merged.most_common("emoji") == [("😀", 3)]
+
+
+def test_corpus_stats_unknown_kind():
+    with pytest.raises(ValueError):
+        CorpusStats(kinds=["unknown"])
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tweet_nlp_toolkit.features.dedup import estimate_jaccard, MinHash, NearDuplicateDetector
+from tweet_nlp_toolkit.prep.text_parser import parse_many
+
+TEXTS = [
+    "Win a free iPhone now!!! click https://t.co/abc @remy #giveaway",
+    "Win a free iPhone now!!! click https://t.co/xyz @tutu #giveaway",
+    "the weather in paris is lovely today, going for a walk",
+    "Win a free iPhone now!!! click https://t.co/def @nlp #giveaway",
+    "",
+    "",
+]
+
+
+def test_minhash_shingles():
+    minhash = MinHash(shingle_size=2)
+    assert sorted(minhash.shingles(["a", "b", "a", "b"])) == ["a\x1fb", "b\x1fa"]
+    assert minhash.shingles(["a"]) == ["a"]
+    assert minhash.shingles([]) == []
+
+
+def test_minhash_signatures():
+    minhash = MinHash(num_perm=64)
+    signatures = minhash.signatures([["a", "b", "c", "d"], ["a", "b", "c", "d"], ["w", "x", "y", "z"], []])
+    assert signatures.shape == (4, 64) and signatures.dtype == np.uint32
+    assert estimate_jaccard(signatures[0], signatures[1]) == 1
+    assert estimate_jaccard(signatures[0], signatures[2]) < 0.2
+    assert np.all(signatures[3] == 2 ** 32 - 1)
+    assert np.array_equal(MinHash(num_perm=64).signatures([["a", "b"]]), minhash.signatures([["a", "b"]]))
+
+
+def test_minhash_estimates_jaccard():
+    minhash = MinHash(num_perm=512, shingle_size=1)
+    first, second = [str(i) for i in range(100)], [str(i) for i in range(50, 150)]
+    signatures = minhash.signatures([first, second])
+    assert estimate_jaccard(signatures[0], signatures[1]) == pytest.approx(1 / 3, abs=0.08)
+
+
+def test_near_duplicate_detector():
+    detector = NearDuplicateDetector()
+    duplicate_of = detector.find_duplicates(parse_many(TEXTS, urls="tag", mentions="tag"))
+    assert duplicate_of.tolist() == [-1, 0, -1, 0, -1, 4]
+    assert detector.find_duplicates(parse_many(TEXTS[:1], urls="tag", mentions="tag")).tolist() == [0]
+    assert detector.n_documents == len(TEXTS) + 1
+
+
+def test_near_duplicate_detector_without_tags():
+    duplicate_of = NearDuplicateDetector(bands=4).find_duplicates(parse_many(TEXTS[:2]))
+    assert duplicate_of.tolist() == [-1, -1]
+
+
+def test_near_duplicate_detector_threshold():
+    texts = [["a", "b", "c", "d", "e", "f"], ["a", "b", "c", "d", "e", "g"]]
+    assert NearDuplicateDetector(threshold=0.5).find_duplicates(texts).tolist() == [-1, 0]
+    assert NearDuplicateDetector(threshold=0.95).find_duplicates(texts).tolist() == [-1, -1]
+
+
+def test_near_duplicate_detector_invalid_bands():
+    with pytest.raises(ValueError):
+        NearDuplicateDetector(num_perm=128, bands=3)
@@ -0,0 +1,84 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tweet_nlp_toolkit.features.entity_index import (
+    decode_postings,
+    encode_postings,
+    EntityIndex,
+    EntityIndexBuilder,
+)
+from tweet_nlp_toolkit.prep.text_parser import parse_many
+from tweet_nlp_toolkit.prep.text_prep import prep_file
+
+TEXTS = [
+    "#nlp with @remy https://t.co/abc",
+    "nothing to index",
+    "#nlp #nlp #python",
+    "@remy likes #python",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    builder = EntityIndexBuilder()
+    builder.add_many(parse_many(TEXTS))
+    builder.save(str(tmp_path / "entities.idx"))
+    return EntityIndex.load(str(tmp_path / "entities.idx"))
+
+
+@pytest.mark.parametrize("doc_ids", [[], [0], [0, 1, 127, 128, 300, 16384, 2 ** 40, 2 ** 62]])
+def test_postings_encoding(doc_ids):
+    encoded = encode_postings(np.array(doc_ids, dtype=np.int64))
+    assert decode_postings(np.frombuffer(encoded, dtype=np.uint8)).tolist() == doc_ids
+
+
+def test_postings_encoding_is_compact():
+    assert len(encode_postings(np.arange(1000))) == 1000
+
+
+def test_entity_index_lookup(index):
+    assert index.n_documents == 4
+    assert list(index.entities) == sorted(["#nlp", "#python", "@remy", "https://t.co/abc"])
+    assert index.lookup("#nlp").tolist() == [0, 2]
+    assert index.lookup("@remy").tolist() == [0, 3]
+    assert index.lookup("#unknown").tolist() == []
+    assert index.document_frequency("#python") == 2
+    assert index.document_frequency("#unknown") == 0
+    assert "#nlp" in index and "nothing" not in index
+
+
+def test_entity_index_intersect_and_union(index):
+    assert index.intersect("#nlp", "@remy").tolist() == [0]
+    assert index.intersect("#nlp", "#unknown").tolist() == []
+    assert index.union("#nlp", "@remy").tolist() == [0, 2, 3]
+    assert index.intersect().tolist() == index.union().tolist() == []
+
+
+def test_entity_index_kinds_and_merge(tmp_path):
+    first, second = EntityIndexBuilder(kinds=["hashtag"]), EntityIndexBuilder(kinds=["hashtag"])
+    first.add_many(parse_many(TEXTS[:2]))
+    second.add_many(parse_many(TEXTS[2:]), start=2)
+    first.merge(second).save(str(tmp_path / "entities.idx"))
+    index = EntityIndex.load(str(tmp_path / "entities.idx"))
+    assert list(index.entities) == ["#nlp", "#python"]
+    assert index.lookup("#python").tolist() == [2, 3]
+
+
+def test_entity_index_invalid_file(tmp_path):
+    path = tmp_path / "invalid.idx"
+    path.write_bytes(b"not an index" * 4)
+    with pytest.raises(ValueError):
+        EntityIndex.load(str(path))
+
+
+def test_prep_file_with_index(tmp_path):
+    infile, outfile, index_file = (str(tmp_path / name) for name in ["input.txt", "output.txt", "entities.idx"])
+    with open(infile, "w", encoding="utf-8") as f:
+        f.write("\n".join(TEXTS) + "\n")
+    prep_file(infile, outfile, index_file=index_file, urls="tag")
+    index = EntityIndex.load(index_file)
+    assert index.lookup("#nlp").tolist() == [0, 2]
+    assert "https://t.co/abc" not in index
+    with pytest.raises(ValueError):
+        prep_file(infile, outfile, index_file=index_file, resume=True)
@@ -0,0 +1,99 @@
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tweet_nlp_toolkit.features.hashing import HashingVectorizer, KIND_PREFIX, NGRAM_SEPARATOR
+from tweet_nlp_toolkit.prep.text_parser import parse_many
+
+
+@pytest.fixture
+def parsed_texts():
+    return parse_many(["@remy hello hello world", "", "hello @nlp https://t.co/abc"], mentions="tag", urls="tag")
+
+
+def test_hashing_vectorizer_features(parsed_texts):
+    vectorizer = HashingVectorizer(ngram_range=(1, 2), token_kinds=True)
+    assert vectorizer.features(["a", "b", "c"]) == [
+        "a", "b", "c", f"a{NGRAM_SEPARATOR}b", f"b{NGRAM_SEPARATOR}c",
+        f"{KIND_PREFIX}word", f"{KIND_PREFIX}word", f"{KIND_PREFIX}word"]
+    assert vectorizer.features(parsed_texts[0])[-4:] == [KIND_PREFIX + kind for kind in ["tag", "word", "word", "word"]]
+    assert HashingVectorizer(ngram_range=(2, 3)).features(["a"]) == []
+
+
+def test_hashing_vectorizer_transform(parsed_texts):
+    vectorizer = HashingVectorizer(n_features=2 ** 10, alternate_sign=False)
+    matrix = vectorizer.transform(parsed_texts)
+    assert matrix.shape == (3, 2 ** 10)
+    assert matrix.indptr.tolist() == [0, 3, 3, 6]
+    assert matrix.data.sum() == 7
+    assert sorted(matrix.data[:3].tolist()) == [1, 1, 2]
+    assert matrix.indices.dtype == np.int32
+    for start, end in zip(matrix.indptr[:-1], matrix.indptr[1:]):
+        assert np.all(np.diff(matrix.indices[start:end]) > 0)
+    dense = matrix.toarray()
+    assert dense.shape == (3, 2 ** 10)
+    assert np.array_equal(dense, vectorizer.transform([t.tokens for t in parsed_texts]).toarray())
+
+
+def test_hashing_vectorizer_alternate_sign(parsed_texts):
+    unsigned = HashingVectorizer(n_features=2 ** 10, alternate_sign=False).transform(parsed_texts).toarray()
+    signed = HashingVectorizer(n_features=2 ** 10).transform(parsed_texts).toarray()
+    assert np.array_equal(np.abs(signed), unsigned)
+
+
+def test_hashing_vectorizer_collisions_are_summed():
+    matrix = HashingVectorizer(n_features=1, alternate_sign=False).transform([["a", "b", "c"], ["d"]])
+    assert matrix.indptr.tolist() == [0, 1, 2]
+    assert matrix.indices.tolist() == [0, 0]
+    assert matrix.data.tolist() == [3, 1]
+
+
+def test_hashing_vectorizer_empty_batch():
+    matrix = HashingVectorizer().transform([])
+    assert matrix.indptr.tolist() == [0]
+    assert len(matrix.indices) == len(matrix.data) == 0
+
+
+def test_hashing_vectorizer_is_stable_across_processes():
+    code = "from tweet_nlp_toolkit.features.hashing import HashingVectorizer; " \
+           "print(HashingVectorizer().transform([['hello', 'world']]).indices.tolist())"
+    outputs = {subprocess.check_output([sys.executable, "-c", code]).strip() for _ in range(2)}
+    expected = str(HashingVectorizer().transform([["hello", "world"]]).indices.tolist()).encode()
+    assert outputs == {expected}
+
+
+def test_hashing_vectorizer_invalid_parameters():
+    with pytest.raises(ValueError):
+        HashingVectorizer(n_features=0)
+    with pytest.raises(ValueError):
+        HashingVectorizer(ngram_range=(2, 1))
+    with pytest.raises(ValueError):
+        HashingVectorizer(seed=-1)
+
+
+def _columns_and_signs(features, **kwargs):
+    matrix = HashingVectorizer(**kwargs).transform([[feature] for feature in features])
+    return matrix.indices, matrix.data
+
+
+def test_hashing_vectorizer_seeds_are_independent():
+    # features of the same length, whose crc32 with different start values only differ by a constant
+    features = [f"token{i:05d}" for i in range(2000)]
+    columns, _ = _columns_and_signs(features, n_features=64, seed=0)
+    other_columns, _ = _columns_and_signs(features, n_features=64, seed=1)
+    colliding = columns[:, None] == columns[None, :]
+    still_colliding = colliding & (other_columns[:, None] == other_columns[None, :])
+    np.fill_diagonal(colliding, False)
+    np.fill_diagonal(still_colliding, False)
+    # about 1 / 64 of the pairs colliding with a seed collide with the other one
+    assert still_colliding.sum() < 0.05 * colliding.sum()
+
+
+def test_hashing_vectorizer_sign_is_independent_of_column():
+    features = [f"token{i:05d}" for i in range(3000)]
+    columns, signs = _columns_and_signs(features, n_features=3)
+    for column in range(3):
+        assert 0.4 < np.mean(signs[columns == column] < 0) < 0.6
@@ -0,0 +1,107 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tweet_nlp_toolkit.constants import MENTION_TAG, URL_TAG, PADDING_TOKEN, UNKNOWN_TOKEN
+from tweet_nlp_toolkit.features import vocabulary as vocabulary_module
+from tweet_nlp_toolkit.features.vocabulary import MappedIndex, Vocabulary, RESERVED_TOKENS, PADDING_ID, UNKNOWN_ID
+from tweet_nlp_toolkit.prep.text_parser import parse_many
+
+
+@pytest.fixture
+def parsed_texts():
+    return parse_many(["@remy hello world", "hello @nlp https://t.co/abc", "hello again world"],
+                      mentions="tag", urls="tag")
+
+
+def test_vocabulary_build(parsed_texts):
+    vocabulary = Vocabulary.build(parsed_texts)
+    assert list(vocabulary.tokens) == RESERVED_TOKENS + ["hello", "world", "again"]
+    assert vocabulary[MENTION_TAG] == RESERVED_TOKENS.index(MENTION_TAG)
+    assert vocabulary.counts[vocabulary[MENTION_TAG]] == 2
+    assert vocabulary.counts[vocabulary["hello"]] == 3
+    assert vocabulary["unknown"] == UNKNOWN_ID
+    assert "hello" in vocabulary
+    assert "unknown" not in vocabulary
+
+
+def test_vocabulary_build_with_pruning(parsed_texts):
+    assert list(Vocabulary.build(parsed_texts, min_count=2).tokens) == RESERVED_TOKENS + ["hello", "world"]
+    assert list(Vocabulary.build(parsed_texts, max_size=len(RESERVED_TOKENS) + 1).tokens) == RESERVED_TOKENS + ["hello"]
+    with pytest.raises(ValueError):
+        Vocabulary.build(parsed_texts, max_size=2)
+
+
+def test_vocabulary_build_from_tokens():
+    vocabulary = Vocabulary.build([["a", "b"], ["b"]])
+    assert list(vocabulary.tokens[len(RESERVED_TOKENS):]) == ["b", "a"]
+
+
+def test_vocabulary_encode(parsed_texts):
+    vocabulary = Vocabulary.build(parsed_texts, min_count=2)
+    ids, lengths = vocabulary.encode(parsed_texts + [[]])
+
+    hello, world, mention, url = vocabulary["hello"], vocabulary["world"], vocabulary[MENTION_TAG], vocabulary[URL_TAG]
+    assert ids.dtype == np.int32 and lengths.dtype == np.int32
+    assert ids.tolist() == [[mention, hello, world],
+                            [hello, mention, url],
+                            [hello, UNKNOWN_ID, world],
+                            [PADDING_ID] * 3]
+    assert lengths.tolist() == [3, 3, 3, 0]
+    assert vocabulary.decode(ids, lengths) == [[MENTION_TAG, "hello", "world"],
+                                               ["hello", MENTION_TAG, URL_TAG],
+                                               ["hello", UNKNOWN_TOKEN, "world"],
+                                               []]
+
+
+def test_vocabulary_encode_with_max_length(parsed_texts):
+    vocabulary = Vocabulary.build(parsed_texts)
+    ids, lengths = vocabulary.encode([["hello"], ["hello", "world", "again"]], max_length=2)
+    assert ids.tolist() == [[vocabulary["hello"], PADDING_ID], [vocabulary["hello"], vocabulary["world"]]]
+    assert lengths.tolist() == [1, 2]
+
+
+def test_vocabulary_save_and_load(tmp_path, parsed_texts):
+    vocabulary = Vocabulary.build(parsed_texts + [["café", "😰"]])
+    path = str(tmp_path / "vocabulary.bin")
+    vocabulary.save(path)
+
+    loaded = Vocabulary.load(path)
+
+    assert len(loaded) == len(vocabulary)
+    assert list(loaded.tokens) == list(vocabulary.tokens)
+    assert loaded.counts.tolist() == vocabulary.counts.tolist()
+    assert not loaded.counts.flags.writeable  # read-only view of the memory-mapped file
+    assert loaded.encode(parsed_texts)[0].tolist() == vocabulary.encode(parsed_texts)[0].tolist()
+    # tokens are looked up in the memory-mapped file rather than in a dict
+    assert isinstance(loaded.index, MappedIndex)
+    assert all(loaded[token] == i for i, token in enumerate(vocabulary.tokens))
+    assert "café" in loaded and "missing" not in loaded
+    assert loaded["missing"] == UNKNOWN_ID
+
+
+def test_loaded_vocabulary_hash_collisions(tmp_path, monkeypatch):
+    # a few hash values, most tokens collide with others
+    monkeypatch.setattr(
+        vocabulary_module, "string_hashes", lambda encoded: np.array([len(value) % 3 for value in encoded], np.uint64)
+    )
+    vocabulary = Vocabulary(RESERVED_TOKENS + ["a", "bb", "ccc", "dd", "é", ""])
+    path = str(tmp_path / "vocabulary.bin")
+    vocabulary.save(path)
+    loaded = Vocabulary.load(path)
+    texts = [["a", "bb", "x", "ccc"], ["dd", "é", "", "yy", "zzz", "a"]]
+    assert loaded.encode(texts)[0].tolist() == vocabulary.encode(texts)[0].tolist()
+    assert loaded.index.lookup(["dd", "zz", "ccc"]).tolist() == [vocabulary["dd"], -1, vocabulary["ccc"]]
+
+
+def test_vocabulary_load_not_a_vocabulary(tmp_path):
+    path = str(tmp_path / "vocabulary.bin")
+    with open(path, "wb") as f:
+        f.write(b"not a vocabulary file")
+    with pytest.raises(ValueError):
+        Vocabulary.load(path)
+
+
+def test_vocabulary_without_reserved_tokens():
+    with pytest.raises(ValueError):
+        Vocabulary([PADDING_TOKEN, "hello"])
@@ -0,0 +1,69 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from tweet_nlp_toolkit.prep import async_parser
+from tweet_nlp_toolkit.prep.async_parser import AsyncParser, aparse_text, aparse_many
+from tweet_nlp_toolkit.prep.text_parser import parse_text
+
+
+def test_aparse_text():
+    parsed_text = asyncio.run(aparse_text("123 @hello #world", mentions="tag"))
+    assert parsed_text.tokens == ['123', '<MENTION>', '#world']
+
+
+def test_aparse_many():
+    texts = ["@hello world", "#world 123", "cool 😰"]
+    parsed_texts = asyncio.run(aparse_many(texts, parser=AsyncParser(max_batch_size=2), emojis="tag"))
+    assert [parsed_text.value for parsed_text in parsed_texts] == [parse_text(text, emojis="tag").value
+                                                                   for text in texts]
+
+
+def test_aparse_text_coalesces_concurrent_calls():
+    parser = AsyncParser(executor=ThreadPoolExecutor(2), max_batch_size=3, max_delay=0.05)
+    texts = [f"text {i}" for i in range(7)]
+
+    async def _parse_all():
+        return await asyncio.gather(*[parser.parse_text(text) for text in texts])
+
+    with patch.object(async_parser, "parse_many", wraps=async_parser.parse_many) as mocked_parse_many:
+        parsed_texts = asyncio.run(_parse_all())
+
+    assert [parsed_text.value for parsed_text in parsed_texts] == texts
+    assert sorted(len(call.args[0]) for call in mocked_parse_many.call_args_list) == [1, 3, 3]
+
+
+def test_aparse_text_does_not_coalesce_different_options():
+    parser = AsyncParser(max_delay=0.05)
+
+    async def _parse_all():
+        return await asyncio.gather(parser.parse_text("@hello", mentions="tag"),
+                                    parser.parse_text("@hello", mentions="remove"),
+                                    parser.parse_text("@hello", filters={"@world"}))
+
+    assert [parsed_text.value for parsed_text in asyncio.run(_parse_all())] == ["<MENTION>", "", "@hello"]
+
+
+def test_aparse_text_with_list_options():
+    parser = AsyncParser(max_delay=0.05)
+
+    async def _parse_all():
+        parsed_texts = await asyncio.gather(parser.parse_text("@hello #a", filters=["#a"]),
+                                            parser.parse_text("#a @b", filters=["#a"]))
+        await asyncio.sleep(0)  # the batch task is discarded once done
+        return parsed_texts
+
+    assert [parsed_text.value for parsed_text in asyncio.run(_parse_all())] == ["@hello", "@b"]
+    assert not parser._tasks
+
+
+def test_aparse_text_propagates_errors():
+    with pytest.raises(ValueError):
+        asyncio.run(aparse_text("@hello", parser=AsyncParser(), mentions="unknown"))
+
+
+def test_async_parser_invalid_arguments():
+    with pytest.raises(ValueError):
+        AsyncParser(max_concurrency=0)
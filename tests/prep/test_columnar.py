@@ -0,0 +1,108 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from tweet_nlp_toolkit.prep.columnar import (
+    ParsedTextTableWriter,
+    read_table,
+)  # noqa: E402
+from tweet_nlp_toolkit.prep.text_parser import parse_many  # noqa: E402
+from tweet_nlp_toolkit.prep.text_prep import prep_file  # noqa: E402
+
+TEXTS = [
+    "123 @hello #world www.url.com 😰 :) abc@gmail.com",
+    "",
+    "Ça va?!!! #a #b @c",
+]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_parsed_text_table_writer(tmp_path, file_format):
+    path = str(tmp_path / f"texts.{file_format}")
+    parsed_texts = parse_many(TEXTS * 3, urls="tag")
+    with ParsedTextTableWriter(path, file_format, offsets=True, row_group_size=2) as writer:
+        writer.write_many(parsed_texts)
+        assert len(writer) == 9
+    table = read_table(path)
+    assert table.column_names == [
+        "text",
+        "tokens",
+        "hashtags",
+        "mentions",
+        "urls",
+        "offsets",
+    ]
+    rows = table.to_pylist()
+    assert [row["text"] for row in rows] == [parsed_text.value for parsed_text in parsed_texts]
+    assert rows[0]["tokens"] == [token.value for token in parsed_texts[0]]
+    assert rows[0]["mentions"] == ["@hello"]
+    assert rows[0]["urls"] == []  # tagged
+    assert rows[1] == {
+        "text": "",
+        "tokens": [],
+        "hashtags": [],
+        "mentions": [],
+        "urls": [],
+        "offsets": [],
+    }
+    assert rows[2]["hashtags"] == ["#a", "#b"]
+    for row in rows:
+        assert [
+            row["text"][offset : offset + len(token)] for token, offset in zip(row["tokens"], row["offsets"])
+        ] == row["tokens"]
+
+
+def test_parsed_text_table_writer_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "texts.parquet")
+    with ParsedTextTableWriter(path, entity_kinds=["emoji"], row_group_size=4) as writer:
+        writer.write_many(parse_many(TEXTS * 3))
+    assert pq.ParquetFile(path).metadata.num_row_groups == 3
+    table = read_table(path)
+    assert table.column_names == ["text", "tokens", "emojis"]
+    assert table.column("emojis").to_pylist()[0] == ["😰"]
+
+
+def test_parsed_text_table_writer_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        ParsedTextTableWriter(str(tmp_path / "texts.csv"), "csv")
+    with pytest.raises(ValueError):
+        ParsedTextTableWriter(str(tmp_path / "texts.parquet"), row_group_size=0)
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_prep_file_columnar(tmp_path, file_format):
+    infile = str(tmp_path / "input.jsonl")
+    outfile = str(tmp_path / f"output.{file_format}")
+    with open(infile, "w", encoding="utf-8") as f:
+        f.write('{"text": "Hello @world #nlp"}\n{"id": 1}\n{"text": "bye"}\n')
+
+    prep_file(
+        infile,
+        outfile,
+        input_format="jsonl",
+        output_format=file_format,
+        mentions="tag",
+        row_group_size=1,
+    )
+
+    assert read_table(outfile).to_pylist() == [
+        {
+            "text": "hello <MENTION> #nlp",
+            "tokens": ["hello", "<MENTION>", "#nlp"],
+            "hashtags": ["#nlp"],
+            "mentions": [],
+            "urls": [],
+            "line": 0,
+        },
+        {
+            "text": "bye",
+            "tokens": ["bye"],
+            "hashtags": [],
+            "mentions": [],
+            "urls": [],
+            "line": 2,
+        },
+    ]
+    with pytest.raises(ValueError):
+        prep_file(infile, outfile, output_format=file_format, checkpoint_interval=10)
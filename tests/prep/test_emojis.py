@@ -0,0 +1,40 @@
+import emoji
+import pytest
+from emoji import EMOJI_ALIAS_UNICODE_ENGLISH, UNICODE_EMOJI_ENGLISH
+
+from tweet_nlp_toolkit.prep.emojis import is_emoji, demojize, emojize, replace_emojis
+
+
+def test_table_same_as_emoji_package():
+    for value in list(UNICODE_EMOJI_ENGLISH) + list(EMOJI_ALIAS_UNICODE_ENGLISH):
+        assert demojize(value) == emoji.demojize(value)
+        assert emojize(value) == emoji.emojize(value, use_aliases=True)
+
+
+@pytest.mark.parametrize(("value", "expected"),
+                         [("😰", True),
+                          (":joy:", True),
+                          (":anxious_face_with_sweat:", True),
+                          ("anxious_face_with_sweat", False),
+                          ("😰😰", False)])
+def test_is_emoji(value, expected):
+    assert is_emoji(value) == expected
+
+
+def test_demojize_and_emojize_not_an_emoji():
+    assert demojize("cool 😰") == "cool :anxious_face_with_sweat:"
+    assert emojize("cool :joy:") == "cool 😂"
+
+
+@pytest.mark.parametrize(("action_name", "expected"),
+                         [("demojize", ["cool", ":anxious_face_with_sweat:", ":joy:"]),
+                          ("emojize", ["cool", "😰", "😂"]),
+                          ("tag", ["cool", "<EMOJI>", "<EMOJI>"]),
+                          ("remove", ["cool", "", ""])])
+def test_replace_emojis(action_name, expected):
+    assert replace_emojis(["cool", "😰", ":joy:"], action_name) == expected
+
+
+def test_replace_emojis_unknown_action():
+    with pytest.raises(ValueError):
+        replace_emojis(["😰"], "unknown")
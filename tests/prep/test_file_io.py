@@ -0,0 +1,95 @@
+import io
+import os
+
+import pytest
+
+from tweet_nlp_toolkit.prep.file_io import infer_compression, open_binary, get_field, set_field, BufferedLineWriter, \
+    iter_lines, dumps_json, loads_json, shard_ranges, iter_mmap_lines, concatenate_files
+
+
+@pytest.mark.parametrize(("filename", "expected"),
+                         [("tweets.jsonl", None),
+                          ("tweets.jsonl.gz", "gzip"),
+                          ("tweets.txt.BZ2", "bz2"),
+                          ("tweets.xz", "xz"),
+                          ("tweets.jsonl.zst", "zstd")])
+def test_infer_compression(filename, expected):
+    assert infer_compression(filename) == expected
+
+
+def test_open_binary_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        open_binary(str(tmp_path / "tweets.txt"), "wb", compression="rar")
+
+
+def test_get_field():
+    record = {"text": "a", "extended_tweet": {"full_text": "b"}}
+    assert get_field(record, "text") == "a"
+    assert get_field(record, "extended_tweet.full_text") == "b"
+    assert get_field(record, "extended_tweet.text") is None
+    assert get_field(record, "text.full_text") is None
+
+
+def test_set_field():
+    record = {"text": "a"}
+    set_field(record, "text", "b")
+    set_field(record, "extended_tweet.full_text", "c")
+    assert record == {"text": "b", "extended_tweet": {"full_text": "c"}}
+
+
+def test_json_round_trip():
+    record = {"id": 1, "text": "cool 😰"}
+    assert loads_json(dumps_json(record)) == record
+    assert b"\n" not in dumps_json({"text": "a\nb"})
+
+
+def test_buffered_line_writer():
+    out = io.BytesIO()
+    with BufferedLineWriter(out, buffer_size=8) as writer:
+        writer.write_line(b"abc")
+        assert out.getvalue() == b""
+        writer.write_line(b"defg")
+        assert out.getvalue() == b"abc\ndefg\n"
+        writer.write_line(b"h")
+    assert out.getvalue() == b"abc\ndefg\nh\n"
+
+
+def test_iter_lines():
+    assert list(iter_lines(io.BytesIO(b"a\nb\n\nc"))) == [b"a\n", b"b\n", b"\n", b"c"]
+
+
+@pytest.mark.parametrize("n_shards", [1, 2, 3, 7, 50])
+def test_shard_ranges(tmp_path, n_shards):
+    filename = str(tmp_path / "tweets.txt")
+    content = b"".join(f"tweet number {i}\n".encode("utf-8") for i in range(20)) + b"no line break"
+    with open(filename, "wb") as f:
+        f.write(content)
+
+    ranges = shard_ranges(filename, n_shards)
+
+    assert 1 <= len(ranges) <= n_shards
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(content[end - 1:end] == b"\n" for _, end in ranges[:-1])
+    assert b"".join(line for start, end in ranges for line in iter_mmap_lines(filename, start, end)) == content
+
+
+def test_shard_ranges_empty_file(tmp_path):
+    filename = str(tmp_path / "tweets.txt")
+    open(filename, "wb").close()
+    assert shard_ranges(filename, 4) == [(0, 0)]
+    assert list(iter_mmap_lines(filename)) == []
+
+
+def test_concatenate_files(tmp_path):
+    filenames = []
+    for i in range(3):
+        filenames.append(str(tmp_path / f"part.{i}"))
+        with open(filenames[-1], "wb") as f:
+            f.write(f"{i}\n".encode("utf-8"))
+
+    concatenate_files(filenames, str(tmp_path / "all"))
+
+    with open(str(tmp_path / "all"), "rb") as f:
+        assert f.read() == b"0\n1\n2\n"
+    assert not any(os.path.exists(filename) for filename in filenames)
@@ -0,0 +1,77 @@
+import pytest
+
+from tweet_nlp_toolkit.prep.hashtag_segmentation import (
+    HashtagSegmenter,
+    WordFrequencyTable,
+    build_word_table,
+    get_hashtag_segmenter,
+    segment_hashtag,
+)
+from tweet_nlp_toolkit.prep.text_parser import parse_text
+from tweet_nlp_toolkit.prep.token import Action, Token, WeiboToken
+
+
+@pytest.mark.parametrize(
+    ("hashtag", "expected"),
+    [
+        ("#MakeAmericaGreat", "make america great"),
+        ("#makeamericagreat", "make america great"),
+        ("#stayhomestaysafe", "stay home stay safe"),
+        ("#USAToday", "usa today"),
+        ("#worldcup2022", "world cup 2022"),
+        ("#Black_Lives_Matter", "black lives matter"),
+        ("#love", "love"),
+        ("#NASA", "nasa"),
+        ("#", ""),
+    ],
+)
+def test_segment_hashtag(hashtag, expected):
+    assert segment_hashtag(hashtag) == expected
+
+
+def test_segment_weibo_hashtag():
+    token = WeiboToken("#happybirthday#")
+    assert Action("segment", "is_hashtag").apply(token)
+    assert token.value == "happy birthday"
+
+
+def test_word_table(tmp_path):
+    path = str(tmp_path / "words.bin")
+    assert build_word_table([("the", 10), ("Cat", 3), ("cat", 2), ("é", 1)], path) == 3
+    table = WordFrequencyTable.load(path)
+    assert len(table) == 3
+    assert (table.total, table.max_length) == (16, 3)
+    assert table.get("cat") == 5 and table.get("é") == 1 and table.get("dog") == 0
+    assert "the" in table and "th" not in table
+    assert list(table.items()) == [("cat", 5), ("the", 10), ("é", 1)]
+    with pytest.raises(ValueError):
+        build_word_table({"cat": 0}, path)
+
+
+def test_viterbi_prefers_known_words(tmp_path):
+    path = str(tmp_path / "words.bin")
+    build_word_table({"now": 50, "here": 40, "nowhere": 30, "playing": 20}, path)
+    segmenter = HashtagSegmenter(WordFrequencyTable.load(path), cache_size=2)
+    assert segmenter.viterbi("nowplaying") == ["now", "playing"]
+    assert segmenter.viterbi("nowhere") == ["nowhere"]
+    # unknown runs are kept whole rather than split into unknown pieces
+    assert segmenter.viterbi("xqzplaying") == ["xqz", "playing"]
+    assert segmenter.segment("#NowHere") == "now here"
+    assert segmenter.segment.cache_info().currsize == 1
+
+
+def test_segment_is_cached():
+    segmenter = get_hashtag_segmenter()
+    segmenter.segment("#happynewyear")
+    hits = segmenter.segment.cache_info().hits
+    assert segmenter.segment("#happynewyear") == "happy new year"
+    assert segmenter.segment.cache_info().hits == hits + 1
+
+
+def test_segment_action():
+    assert parse_text("I love #NewYork #happybirthday", hashtags="segment").value == "i love new york happy birthday"
+    token = Token("#MakeAmericaGreat")
+    Action("segment", "is_hashtag").run(token)
+    assert token.value == "make america great"
+    with pytest.raises(ValueError):
+        parse_text("@hello", mentions="segment")
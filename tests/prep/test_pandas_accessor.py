@@ -0,0 +1,46 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import tweet_nlp_toolkit.prep.pandas_accessor  # noqa: E402,F401  pylint: disable=unused-import
+from tweet_nlp_toolkit.prep.text_prep import prep  # noqa: E402
+
+TEXTS = ["Hello @world #nlp", None, "www.url.com #a #b 😰", ""]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_prep(workers):
+    series = pd.Series(TEXTS, index=[10, 11, 12, 13], name="text")
+    prepped = series.tweet.prep(chunk_size=2, workers=workers, mentions="tag")
+    assert prepped.index.tolist() == [10, 11, 12, 13]
+    assert prepped.name == "text"
+    assert prepped.tolist() == [prep("Hello @world #nlp", mentions="tag"), None, prep(TEXTS[2], mentions="tag"), ""]
+
+
+def test_prep_missing_values():
+    series = pd.Series(["Hello", float("nan")])
+    assert series.tweet.prep().tolist() == ["hello", None]
+    with pytest.raises(TypeError):
+        pd.Series(["Hello", 3]).tweet.prep()
+    with pytest.raises(ValueError):
+        series.tweet.prep(chunk_size=0)
+    assert pd.Series([], dtype=object).tweet.prep().tolist() == []
+
+
+def test_tokens():
+    assert pd.Series(["Hello @world", None]).tweet.tokens(mentions="remove").tolist() == [["hello"], None]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_entities(workers):
+    series = pd.Series(TEXTS, index=list("abcd"))
+    entities = series.tweet.entities(chunk_size=1, workers=workers)
+    assert entities.columns.tolist() == ["hashtags", "mentions", "urls"]
+    assert entities.index.tolist() == list("abcd")
+    assert entities.loc["a"].tolist() == [["#nlp"], ["@world"], []]
+    assert entities.loc["b"].tolist() == [[], [], []]
+    assert entities.loc["c"].tolist() == [["#a", "#b"], [], ["www.url.com"]]
+    emojis = series.tweet.entities(kinds=["emoji"], emojis="remove")
+    assert emojis.columns.tolist() == ["emojis"]
+    assert emojis.loc["c", "emojis"] == []  # removed
+    assert series.tweet.entities(kinds=["emoji"]).loc["c", "emojis"] == ["😰"]
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from tweet_nlp_toolkit.prep.pipeline_stats import (
+    DEFAULT_CELLS,
+    collect_stats,
+    compile_dispatch_tokenizer,
+    dispatch_pattern,
+    first_character_cells,
+    first_characters,
+    split_alternatives,
+)
+from tweet_nlp_toolkit.prep.regexes import TOKEN_PIPELINE_NAMES, TWEET_TOKENIZE, WEIBO_TOKENIZE
+
+TEXTS = ["@remy: this is waaaaayyyy too much #cool :) http://t.co/abc", "a@b.com 12.5 ... <br> :joy: 😂 (^_^)", ""]
+ALPHABET = list("()[]{}<>|/\\-^'\",xX:=%#$8;*0oOcDPpSsJLbB3.@&+_ aZé1\t\nhw") + [
+    "www.",
+    "http://",
+    ".com",
+    "@b.co",
+    "😂",
+    "1⃣",
+    "中文",
+    "<3",
+]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "starts", "not_starts"),
+    [
+        (r"\@\w+", "@", "a#"),
+        (r"(?<![\w])(?:[xX]|:)?-?[()]", "xX:-()", "a"),
+        (r"[^\W\d_]+", "aé", "1_ "),
+        (r"a?", "a b", ""),
+        (r"(?:https?://|www\.)\S+", "hw", "a"),
+    ],
+)
+def test_first_characters(pattern, starts, not_starts):
+    first = first_characters(pattern)
+    assert all(map(first.contains, starts))
+    assert not any(map(first.contains, not_starts))
+
+
+def test_split_alternatives():
+    assert split_alternatives(r"a|(?:b|c)|[|]|[]|]|\||d") == ["a", "(?:b|c)", "[|]", "[]|]", r"\|", "d"]
+
+
+@pytest.mark.parametrize(("pattern", "weibo"), [(TWEET_TOKENIZE, False), (WEIBO_TOKENIZE, True)])
+def test_dispatch_tokenizer_keeps_tokens(pattern, weibo):
+    dispatch = compile_dispatch_tokenizer(weibo=weibo)
+    rng = random.Random(0)
+    texts = TEXTS + ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 30))) for _ in range(3000)]
+    for text in texts:
+        assert dispatch.findall(text) == pattern.findall(text), text
+
+
+def test_dispatch_pattern_disjoint_cells():
+    with pytest.raises(ValueError):
+        dispatch_pattern(["ab", "bc"])
+
+
+def test_first_character_cells():
+    cells = first_character_cells(TEXTS)
+    assert sorted(cells) == sorted(DEFAULT_CELLS)
+    assert cells[:2] == [" \t\n", "abcdefgijklmnopqrstuvxyz"]
+
+
+def test_collect_stats():
+    stats = collect_stats(TEXTS)
+    assert [alternative.name for alternative in stats] == TOKEN_PIPELINE_NAMES
+    by_name = {alternative.name: alternative for alternative in stats}
+    assert by_name["mention"].matches == 1
+    # tried at the start of every token and at every white space between tokens
+    tokens = sum(len(TWEET_TOKENIZE.findall(text)) for text in TEXTS)
+    assert sum(alternative.matches for alternative in stats) == tokens
+    assert by_name["url"].attempts == tokens + sum(char.isspace() for text in TEXTS for char in text)
+    assert all(alternative.failures >= 0 and alternative.seconds >= 0 for alternative in stats)
+    with pytest.raises(ValueError):
+        collect_stats(TEXTS, names=["url"])
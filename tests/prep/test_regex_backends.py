@@ -0,0 +1,86 @@
+import random
+import re
+
+import pytest
+
+from tweet_nlp_toolkit.prep import regexes
+from tweet_nlp_toolkit.prep.regex_backends import (
+    RegexBackend,
+    get_regex_backend,
+    re_character_classes,
+    translate_classes,
+)
+from tweet_nlp_toolkit.prep.tokenizer import set_regex_backend, tweet_tokenize, weibo_tokenize
+
+ALPHABET = list("()[]{}<>|/\\-‑^'\",xX:=%#$8;*0oOcDPpSsJLbB3.@&+_ aZé1\t\n") + [
+    "www.",
+    "http://",
+    ".com",
+    "@b.co",
+    "😂",
+    "👍🏽",
+    "中文",
+    "ทด",
+    "²",
+    "́",
+    "한",
+]
+
+
+def _corpus(size=3000, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 30))) for _ in range(size)]
+
+
+class _PossessiveRe(RegexBackend):
+    # re supports possessive quantifiers since Python 3.11
+    possessive_quantifiers = True
+
+
+def test_default_backend_patterns():
+    assert regexes.compile_tokenizer("re").pattern == regexes.TWEET_TOKENIZE.pattern
+    assert regexes.compile_tokenizer("re", weibo=True).pattern == regexes.WEIBO_TOKENIZE.pattern
+
+
+@pytest.mark.skipif(not hasattr(re, "NOFLAG"), reason="possessive quantifiers require Python 3.11")
+@pytest.mark.parametrize("weibo", [False, True])
+def test_possessive_quantifiers_keep_tokens(weibo):
+    pattern = regexes.WEIBO_TOKENIZE if weibo else regexes.TWEET_TOKENIZE
+    possessive = re.compile("|".join(regexes.token_pipeline(_PossessiveRe(), weibo=weibo)), re.UNICODE)
+    assert possessive.pattern != pattern.pattern
+    for text in _corpus():
+        assert possessive.findall(text) == pattern.findall(text), text
+
+
+@pytest.mark.parametrize("weibo", [False, True])
+def test_regex_backend_keeps_tokens(weibo):
+    pytest.importorskip("regex")
+    pattern = regexes.WEIBO_TOKENIZE if weibo else regexes.TWEET_TOKENIZE
+    backend_pattern = regexes.compile_tokenizer("regex", weibo=weibo)
+    for text in _corpus():
+        assert backend_pattern.findall(text) == pattern.findall(text), text
+
+
+def test_translate_classes():
+    classes = {"w": "a-z", "W": "A-Z", "d": "0-9", "D": "A-Z", "s": " ", "S": "A-Z"}
+    assert translate_classes(r"\w+\\d[^\W\d_]", classes) == r"[a-z]+\\d[^A-Z0-9_]"
+    assert translate_classes(r"[]\d]\b", classes) == r"[]0-9](?:(?<=[a-z])(?![a-z])|(?<![a-z])(?=[a-z]))"
+    assert translate_classes(r"[\b]", classes) == r"[\b]"
+    assert re.fullmatch(f"[{re_character_classes()['w']}]+", "héllo_1²")
+
+
+def test_get_regex_backend():
+    assert get_regex_backend("re").name == "re"
+    with pytest.raises(ValueError):
+        get_regex_backend("test")
+
+
+def test_set_regex_backend():
+    pytest.importorskip("regex")
+    text = "@remy: This is waaaaayyyy too much #cool :) a@b.com #微博# ..."
+    expected = (tweet_tokenize(text), weibo_tokenize(text))
+    set_regex_backend("regex")
+    try:
+        assert (tweet_tokenize(text), weibo_tokenize(text)) == expected
+    finally:
+        set_regex_backend("re")
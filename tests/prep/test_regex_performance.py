@@ -0,0 +1,88 @@
+import random
+import re
+import warnings
+from functools import partial
+
+import pytest
+
+from tweet_nlp_toolkit.prep import regexes
+from tweet_nlp_toolkit.prep.text_parser import parse_text
+from tweet_nlp_toolkit.prep.token import Token, WeiboToken
+from tweet_nlp_toolkit.prep.tokenizer import (
+    tokenize_with_time_budget,
+    tweet_tokenize,
+    weibo_tokenize,
+    white_space_tokenize,
+)
+
+ALPHABET = list("()[]{}<>|/\\-‑^'\",xX:=%#$8;*0oOcDPpSs3.@&+_ aé1\t") + ["www.", "http://", ".com", "@b.co"]
+
+
+def _unguarded(pattern):
+    # the guards are lookaheads of necessary conditions, the tokenizer matches the same tokens without them
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return re.compile(
+            pattern.pattern.replace(regexes._EMAIL_GUARD, "").replace(regexes._MOUTHS_GUARD, ""), re.UNICODE
+        )
+
+
+@pytest.mark.parametrize("pattern", [regexes.TWEET_TOKENIZE, regexes.WEIBO_TOKENIZE])
+def test_guards_keep_tokens(pattern):
+    unguarded = _unguarded(pattern)
+    assert unguarded.pattern != pattern.pattern
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 25)))
+        assert pattern.findall(text) == unguarded.findall(text), text
+
+
+def _no_fallback(text):
+    raise AssertionError(f"the time budget was exceeded for a text of {len(text)} characters")
+
+
+@pytest.mark.parametrize("motif", ["+", "-", "(", "/", "a.", "ab-", "<"])
+def test_long_runs_are_tokenized_within_budget(motif):
+    text = motif * (4000 // len(motif))
+    # a few milliseconds with the guards, the budget is generous for slow machines
+    tokens = tokenize_with_time_budget(text, time_budget=2, fallback=_no_fallback)
+    assert "".join(token.value for token in tokens) == text
+
+
+@pytest.mark.parametrize("motif", ["a-", "a'", "a_", "x"])
+def test_long_token_is_tokenized_within_budget(motif):
+    # the deadline is only checked between matches, a single long match has to be fast too
+    text = motif * (40000 // len(motif))
+    tokens = tokenize_with_time_budget(text, time_budget=2, fallback=_no_fallback)
+    assert len(tokens) == 1 and tokens[0].value == text
+
+
+def test_tokenize_with_time_budget():
+    text = "@remy: This is waaaaayyyy too much :) " + "(" * 4000
+    assert tokenize_with_time_budget(text, time_budget=60) == tweet_tokenize(text)
+    assert tokenize_with_time_budget(text, time_budget=0) == white_space_tokenize(text)
+    assert all(type(token) is Token for token in tokenize_with_time_budget(text, time_budget=0))
+    # the fallback tokens are of the class of the tokenizer
+    for tokenizer in [weibo_tokenize, partial(weibo_tokenize, segment_hashtag=True)]:
+        tokens = tokenize_with_time_budget(text, tokenizer, time_budget=0)
+        assert tokens == white_space_tokenize(text)
+        assert all(type(token) is WeiboToken for token in tokens)
+    # the deadline is reset
+    assert tweet_tokenize("hello :)") == ["hello", ":)"]
+
+
+def test_nested_time_budgets():
+    text = "hello :) " + "(" * 100
+
+    def tokenizer(text):
+        # the deadline of the outer time budget applies again once the inner tokenization is done
+        return tokenize_with_time_budget(text, time_budget=60) + tweet_tokenize(text)
+
+    assert tokenize_with_time_budget(text, tokenizer, time_budget=0) == white_space_tokenize(text)
+    assert tokenize_with_time_budget(text, tokenizer, time_budget=60) == tweet_tokenize(text) * 2
+
+
+def test_parse_text_time_budget():
+    text = "@remy this is #cool " + "-" * 100
+    assert parse_text(text, time_budget=0).value == text
+    assert parse_text(text, time_budget=60).value == parse_text(text).value
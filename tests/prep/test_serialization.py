@@ -0,0 +1,127 @@
+import pickle
+
+import pytest
+
+from tweet_nlp_toolkit.prep.serialization import ParsedTextFile, ParsedTextWriter
+from tweet_nlp_toolkit.prep.text_parser import ParsedText, parse_many, parse_text
+from tweet_nlp_toolkit.prep.token import Token, WeiboToken
+from tweet_nlp_toolkit.prep.tokenizer import weibo_tokenize
+
+TEXTS = [
+    "123 @hello #world www.url.com 😰 :) abc@gmail.com",
+    "",
+    "Ça va?!!! . . . 👍🏽 &pound;100",
+]
+
+
+def _assert_same(parsed_text, expected):
+    assert parsed_text.value == expected.value
+    assert [(type(token), token.value, token.lang) for token in parsed_text] == [
+        (type(token), token.value, token.lang) for token in expected
+    ]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_parsed_text_to_bytes(text):
+    parsed_text = parse_text(text, mentions="tag")
+    _assert_same(ParsedText.from_bytes(parsed_text.to_bytes()), parsed_text)
+    _assert_same(pickle.loads(pickle.dumps(parsed_text)), parsed_text)
+
+
+def test_parsed_text_to_bytes_with_kinds():
+    parsed_text = parse_text(TEXTS[0], mentions="tag")
+    decoded = ParsedText.from_bytes(parsed_text.to_bytes(kinds=True))
+    assert [token._kind for token in decoded] == [token.kind for token in parsed_text]
+    assert len(parsed_text.to_bytes(kinds=True)) == len(parsed_text.to_bytes()) + len(parsed_text)
+
+
+def test_parsed_text_to_bytes_keeps_classes_langs_and_value():
+    parsed_text = ParsedText([Token("hello", "en"), WeiboToken("#话题#"), Token("a\udc80 b")], split="|")
+    parsed_text.post_process()
+    decoded = ParsedText.from_bytes(parsed_text.to_bytes())
+    _assert_same(decoded, parsed_text)
+    assert decoded.value == "hello|#话题#|a\udc80 b"
+    _assert_same(
+        pickle.loads(pickle.dumps(parse_text("#超话# 你好", tokenizer=weibo_tokenize))),
+        parse_text("#超话# 你好", tokenizer=weibo_tokenize),
+    )
+
+
+def test_parsed_text_pickle_is_compact():
+    parsed_text = parse_text(TEXTS[0])
+    assert len(pickle.dumps(parsed_text)) < len(parsed_text.to_bytes()) + 150
+
+
+def test_parsed_text_from_bytes_unsupported_version():
+    data = bytearray(parse_text("hello").to_bytes())
+    data[0] = 99
+    with pytest.raises(ValueError):
+        ParsedText.from_bytes(bytes(data))
+
+
+def test_token_to_bytes():
+    for token in [Token("héllo"), Token("x", "en"), WeiboToken("#a#")]:
+        decoded = Token.from_bytes(token.to_bytes())
+        assert (type(decoded), decoded.value, decoded.lang) == (type(token), token.value, token.lang)
+        unpickled = pickle.loads(pickle.dumps(token))
+        assert (type(unpickled), unpickled.value, unpickled.lang) == (type(token), token.value, token.lang)
+
+
+class CustomToken(Token):
+    @property
+    def is_hashtag(self):
+        return self.value.startswith("$")
+
+
+def test_custom_token_class_is_pickled_as_usual():
+    parsed_text = ParsedText([Token("buy"), CustomToken("$AAPL", "en")])
+    parsed_text.post_process()
+    _assert_same(pickle.loads(pickle.dumps(parsed_text)), parsed_text)
+    unpickled = pickle.loads(pickle.dumps(CustomToken("$AAPL")))
+    assert type(unpickled) is CustomToken and unpickled.is_hashtag
+    with pytest.raises(TypeError):
+        parsed_text.to_bytes()
+    with pytest.raises(TypeError):
+        CustomToken("$AAPL").to_bytes()
+
+
+class ScoredToken(Token):
+    def __init__(self, value, score):
+        super().__init__(value, "en")
+        self.score = score
+
+
+def test_token_subclass_with_other_arguments_is_pickled_as_usual():
+    token = ScoredToken("great", 0.9)
+    unpickled = pickle.loads(pickle.dumps(token))
+    assert type(unpickled) is ScoredToken
+    assert (unpickled.value, unpickled.lang, unpickled.score) == ("great", "en", 0.9)
+
+
+def test_token_kind_is_reset_with_value():
+    token = Token("@nlp")
+    assert token.kind == "mention"
+    token.value = "<MENTION>"
+    assert token.kind == "tag"
+
+
+def test_parsed_text_file(tmp_path):
+    path = str(tmp_path / "texts.parsed")
+    parsed_texts = parse_many(TEXTS, mentions="tag")
+    with ParsedTextWriter(path, kinds=True, buffer_size=16) as writer:
+        writer.write_many(parsed_texts)
+        assert len(writer) == len(TEXTS)
+    container = ParsedTextFile.load(path)
+    assert len(container) == len(TEXTS)
+    for decoded, expected in zip(container, parsed_texts):
+        _assert_same(decoded, expected)
+    _assert_same(container[-1], parsed_texts[-1])
+    with pytest.raises(IndexError):
+        container[len(TEXTS)]
+
+
+def test_parsed_text_file_invalid(tmp_path):
+    path = tmp_path / "texts.parsed"
+    path.write_bytes(b"not a container at all, really")
+    with pytest.raises(ValueError):
+        ParsedTextFile.load(str(path))
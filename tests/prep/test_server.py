@@ -0,0 +1,128 @@
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
+
+from tweet_nlp_toolkit.prep import async_parser
+from tweet_nlp_toolkit.prep.async_parser import AsyncParser
+from tweet_nlp_toolkit.prep.client import PrepClient
+from tweet_nlp_toolkit.prep.server import (
+    decode_request,
+    decode_response,
+    encode_error,
+    encode_request,
+    encode_response,
+    PrepServer,
+    warm_up,
+)
+from tweet_nlp_toolkit.prep.text_parser import parse_many, parse_text
+from tweet_nlp_toolkit.prep.tokenizer import white_space_tokenize
+
+TEXTS = ["123 @hello #world www.url.com 😰 :)", "", "Ça va?!!! &pound;100"]
+
+
+@contextmanager
+def _running_server(**kwargs):
+    loop = asyncio.new_event_loop()
+    server = PrepServer(port=0, warm_up_languages=[], **kwargs)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def _values(parsed_texts):
+    return [(parsed_text.value, [token.value for token in parsed_text]) for parsed_text in parsed_texts]
+
+
+def test_wire_format():
+    texts, options = decode_request(
+        encode_request(TEXTS, {"tokenizer": white_space_tokenize, "filters": {"b", "a"}, "mentions": "tag"})
+    )
+    assert texts == TEXTS
+    assert options == {"tokenizer": white_space_tokenize, "filters": {"a", "b"}, "mentions": "tag"}
+    parsed_texts = parse_many(TEXTS)
+    assert _values(decode_response(encode_response(parsed_texts))) == _values(parsed_texts)
+    with pytest.raises(ValueError, match="oops"):
+        decode_response(encode_error("oops"))
+    with pytest.raises(ValueError):
+        decode_request(encode_request(TEXTS, {"unknown": True}))
+    with pytest.raises(ValueError):
+        encode_request(TEXTS, {"tokenizer": str.split})
+
+
+def test_client():
+    with _running_server() as server:
+        host, port = server.address
+        with PrepClient(host=host, port=port) as client:
+            assert _values(client.parse_many(TEXTS, mentions="tag", tokenizer=white_space_tokenize)) == _values(
+                parse_many(TEXTS, mentions="tag", tokenizer=white_space_tokenize)
+            )
+            assert client.prep("Hello @world", mentions="remove") == "hello"
+            assert client.parse_many([]) == []
+            with pytest.raises(ValueError):
+                client.prep("Hello", mentions="unknown action")
+            with pytest.raises(ValueError):
+                client.prep("Hello", unknown_option=True)
+            # the connection is still usable after an error
+            assert client.prep("Hello") == "hello"
+
+
+def test_client_unix_socket():
+    path = os.path.join(tempfile.mkdtemp(), "prep.sock")
+    with _running_server(path=path):
+        with PrepClient(path=path) as client:
+            assert client.parse_text(TEXTS[0], emojis="tag").value == parse_text(TEXTS[0], emojis="tag").value
+    assert not os.path.exists(path)
+
+
+def test_client_reconnects_after_server_restart():
+    path = os.path.join(tempfile.mkdtemp(), "prep.sock")
+    with PrepClient(path=path, timeout=10) as client:
+        with _running_server(path=path):
+            assert client.prep("Hello") == "hello"
+        # the idle connection of the client was closed with the first server
+        with _running_server(path=path):
+            with patch.object(client, "_connect", wraps=client._connect) as mocked_connect:
+                assert client.prep("Hello @world", mentions="remove") == "hello"
+                assert client.prep("Hello") == "hello"
+            assert mocked_connect.call_count == 1
+        with pytest.raises(OSError):
+            client.prep("Hello")
+
+
+def test_server_close_closes_connections():
+    with _running_server() as server:
+        connection = socket.create_connection(server.address, timeout=10)
+        with PrepClient(host=server.address[0], port=server.address[1]) as client:
+            assert client.prep("Hello") == "hello"
+    with connection:
+        assert connection.recv(1) == b""
+
+
+def test_concurrent_requests_are_batched():
+    parser = AsyncParser(executor=ThreadPoolExecutor(1), max_batch_size=64, max_delay=0.05)
+    texts = [f"text {i} @user" for i in range(32)]
+    with _running_server(parser=parser) as server:
+        host, port = server.address
+        with PrepClient(host=host, port=port, pool_size=8) as client, ThreadPoolExecutor(8) as pool:
+            with patch.object(async_parser, "parse_many", wraps=async_parser.parse_many) as mocked_parse_many:
+                values = list(pool.map(lambda text: client.prep(text, mentions="tag"), texts))
+    assert values == [parse_text(text, mentions="tag").value for text in texts]
+    assert mocked_parse_many.call_count < len(texts)
+
+
+def test_warm_up_unknown_language():
+    warm_up(["xx"])
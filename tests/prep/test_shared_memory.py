@@ -0,0 +1,68 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from tweet_nlp_toolkit.prep.shared_memory import iter_shared_batches, SharedParsedTexts, write_shared_batch
+from tweet_nlp_toolkit.prep.text_parser import parse_many, parse_stream
+
+TEXTS = [
+    "123 @hello #world www.url.com 😰 :) abc@gmail.com",
+    "",
+    "Ça va?!!! . . . 👍🏽 &pound;100",
+    "RT @user: hello world",
+    "#nlp is fun",
+]
+
+
+def _values(parsed_texts):
+    return [(parsed_text.value, [(type(token), token.value) for token in parsed_text]) for parsed_text in parsed_texts]
+
+
+def test_shared_parsed_texts():
+    parsed_texts = parse_many(TEXTS, mentions="tag")
+    with SharedParsedTexts(write_shared_batch(parsed_texts, kinds=True)) as batch:
+        assert len(batch) == len(TEXTS)
+        assert _values(batch) == _values(parsed_texts)
+        assert _values(batch[1:4]) == _values(parsed_texts[1:4])
+        assert batch[-1].value == parsed_texts[-1].value
+        assert [token._kind for token in batch[0]] == [token.kind for token in parsed_texts[0]]
+        with pytest.raises(IndexError):
+            batch[len(TEXTS)]
+        name = batch._block.name
+    with pytest.raises(ValueError):
+        batch[0]
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_shared_parsed_texts_empty():
+    with SharedParsedTexts(write_shared_batch([])) as batch:
+        assert len(batch) == 0
+        assert list(batch) == []
+
+
+def test_iter_shared_batches():
+    texts = TEXTS * 5
+    batches = []
+    for batch in iter_shared_batches(texts, chunk_size=4, workers=2, hashtags="remove"):
+        with batch:
+            assert len(batch) <= 4
+            batches.extend(batch)
+    assert _values(batches) == _values(parse_many(texts, hashtags="remove"))
+    with pytest.raises(ValueError):
+        next(iter_shared_batches(texts, chunk_size=0))
+
+
+def test_iter_shared_batches_early_stop():
+    batches = iter_shared_batches(TEXTS * 10, chunk_size=2, workers=2)
+    with next(batches) as batch:
+        assert len(batch) == 2
+    # the batches parsed ahead are unlinked
+    batches.close()
+
+
+def test_parse_stream_shared_memory():
+    texts = TEXTS * 3
+    assert _values(parse_stream(texts, chunk_size=4, workers=2, shared_memory=True, urls="tag")) == _values(
+        parse_many(texts, urls="tag")
+    )
@@ -1,7 +1,7 @@
 import pytest
 from pytest import fixture
 
-from tweet_nlp_toolkit.prep.text_parser import ParsedText, parse_text
+from tweet_nlp_toolkit.prep.text_parser import ParsedText, parse_text, parse_many, tokenize_text
 from tweet_nlp_toolkit.prep.token import Token, WeiboToken
 from tweet_nlp_toolkit.prep.tokenizer import weibo_tokenize
 
@@ -193,3 +193,42 @@ def test_text_parser_with_weibo_token_cls(text, expected):
     )
     assert parsed_text.tokens == expected.tokens
     assert parsed_text.hashtags == ['#改个电话号码#']
+
+
+def test_parse_many():
+    texts = ["123 @hello #world", "cool 😰"]
+    parsed_texts = parse_many(texts, mentions='tag', emojis='tag')
+    assert [parsed_text.value for parsed_text in parsed_texts] == ['123 <MENTION> #world', 'cool <EMOJI>']
+
+
+def test_text_parser_with_emoji_sequences():
+    parsed_text = parse_text("we are family 👨‍👩‍👧‍👦 👍🏽", emojis='tag')
+    assert parsed_text.value == 'we are family <EMOJI> <EMOJI>'
+    assert parse_text("go 🇫🇷", emojis='demojize').value == 'go :France:'
+
+
+def test_tokenize_text():
+    tokens = tokenize_text("Hello @World &amp; c?est", filters={"&"})
+    assert tokens == ["hello", "@world", "c'est"]
+    assert parse_text("Hello @World &amp; c?est", filters={"&"}).value == "hello @world c'est"
+
+
+def test_parsed_text_entities():
+    parsed_text = parse_text("@a #b www.url.com #c 😰", urls="tag")
+    assert parsed_text.entities() == {"hashtag": ["#b", "#c"], "mention": ["@a"], "url": []}
+    assert parsed_text.entities(["emoji", "tag"]) == {"emoji": ["😰"], "tag": ["<URL>"]}
+
+
+def test_parsed_text_remove_stop_words():
+    parsed_text = parse_text("The cat is on the table")
+    parsed_text.remove_stop_words("en")
+    assert parsed_text.value == "cat table"
+    parsed_text = parse_text("il était une fois", strip_accents=True)
+    parsed_text.remove_stop_words("fr")
+    assert parsed_text.tokens == ["fois"]
+    parsed_text = parse_text("The cat is on the TABLE", to_lower=False)
+    parsed_text.remove_stop_words("en")
+    assert parsed_text.value == "cat TABLE"
+    parsed_text = ParsedText([Token("The", lang="en"), Token("Les", lang="fr"), Token("chats", lang="fr"), Token("a")])
+    parsed_text.remove_stop_words()
+    assert parsed_text.value == "chats a"
@@ -1,10 +1,15 @@
+import gzip
+import json
 import os
 import tempfile
+from unittest.mock import patch
 
 import pytest
 
 from tweet_nlp_toolkit.constants import UNENCODABLE_CHAR, MENTION_TAG, HASHTAG_TAG
-from tweet_nlp_toolkit.prep.text_prep import prep, replace_contractions, prep_file, normalize_apos, normalize_quotes
+from tweet_nlp_toolkit.prep.file_io import open_binary, read_checkpoint
+from tweet_nlp_toolkit.prep.text_prep import prep, replace_contractions, prep_file, normalize_apos, normalize_quotes, \
+    prep_file_range, prep_file_sharded
 
 
 @pytest.mark.parametrize(("text", "expected"),
@@ -213,3 +218,152 @@ def test_normalize_apos(text, expected):
                          )
 def test_normalize_quotes(text, expected):
     assert normalize_quotes(text) == expected
+
+
+@pytest.mark.parametrize("extension", ["", ".gz", ".bz2", ".xz", ".zst"])
+def test_prep_file_compressed_jsonl(tmp_path, extension):
+    if extension == ".zst":
+        pytest.importorskip("zstandard")
+    infile = str(tmp_path / f"input.jsonl{extension}")
+    outfile = str(tmp_path / f"output.jsonl{extension}")
+    records = [
+        {"id": 1, "text": "Hello @world 😰", "user": {"name": "Remy"}},
+        {"id": 2, "delete": {"status": {"id": 3}}},
+        {"id": 4, "text": "#golf is cool"},
+    ]
+    with open_binary(infile, "wb") as f:
+        f.write(b"\n".join(json.dumps(record).encode("utf-8") for record in records) + b"\n")
+
+    prep_file(infile, outfile, input_format="jsonl", mentions="tag", buffer_size=16)
+
+    with open_binary(outfile, "rb") as f:
+        assert [json.loads(line) for line in f.read().splitlines()] == [
+            {"id": 1, "text": "hello <MENTION> 😰", "user": {"name": "Remy"}},
+            {"id": 2, "delete": {"status": {"id": 3}}},
+            {"id": 4, "text": "#golf is cool"},
+        ]
+
+
+def test_prep_file_jsonl_to_text_with_nested_field(tmp_path):
+    infile = str(tmp_path / "input.jsonl.gz")
+    outfile = str(tmp_path / "output.txt")
+    with gzip.open(infile, "wt", encoding="utf-8") as f:
+        f.write('{"extended_tweet": {"full_text": "Types of #Bias"}}\n{"id": 1}\n')
+
+    prep_file(infile, outfile, input_format="jsonl", output_format="text", text_field="extended_tweet.full_text")
+
+    with open(outfile, encoding="utf-8") as f:
+        assert f.read() == "types of #bias\n"
+
+
+def test_prep_file_text_to_jsonl(tmp_path):
+    infile = str(tmp_path / "input.txt")
+    outfile = str(tmp_path / "output.jsonl")
+    with open(infile, "w", encoding="ascii") as f:
+        f.write("Hello @world\n")
+
+    prep_file(infile, outfile, output_format="jsonl", mentions="remove")
+
+    with open(outfile, encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"text": "hello"}
+
+
+def test_prep_file_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        prep_file(str(tmp_path / "input.txt"), str(tmp_path / "output.txt"), input_format="csv")
+
+
+@pytest.mark.parametrize("extension", ["", ".gz", ".zst"])
+def test_prep_file_resume_after_crash(tmp_path, extension):
+    if extension == ".zst":
+        pytest.importorskip("zstandard")
+    infile = str(tmp_path / f"input.txt{extension}")
+    outfile = str(tmp_path / f"output.txt{extension}")
+    lines = [f"Line {i} @world" for i in range(10)]
+    with open_binary(infile, "wb") as f:
+        f.write("\n".join(lines).encode("utf-8") + b"\n")
+
+    def _crashing_prep(text, **kwargs):
+        if text.startswith("Line 7"):
+            raise KeyboardInterrupt
+        return prep(text, **kwargs)
+
+    with patch("tweet_nlp_toolkit.prep.text_prep.prep", side_effect=_crashing_prep):
+        with pytest.raises(KeyboardInterrupt):
+            prep_file(infile, outfile, mentions="remove", checkpoint_interval=3)
+    checkpoint = read_checkpoint(outfile)
+    assert checkpoint.lines == 6
+    assert checkpoint.input_offset == sum(len(line) + 1 for line in lines[:6])
+    assert 0 < checkpoint.output_offset <= os.path.getsize(outfile)
+
+    with patch("tweet_nlp_toolkit.prep.text_prep.prep", side_effect=prep) as mocked_prep:
+        prep_file(infile, outfile, mentions="remove", checkpoint_interval=3, resume=True)
+    assert mocked_prep.call_count == 4
+    assert read_checkpoint(outfile) is None
+    with open_binary(outfile, "rb") as f:
+        assert f.read().decode("utf-8").splitlines() == [f"line {i}" for i in range(10)]
+
+
+def test_prep_file_resume_without_checkpoint(tmp_path):
+    infile = str(tmp_path / "input.txt")
+    outfile = str(tmp_path / "output.txt")
+    with open(infile, "w", encoding="ascii") as f:
+        f.write("Hello\nWorld\n")
+
+    prep_file(infile, outfile, resume=True)
+
+    with open(outfile, encoding="utf-8") as f:
+        assert f.read() == "hello\nworld\n"
+
+
+@pytest.mark.parametrize(("workers", "extension"), [(1, ""), (2, ".gz")])
+def test_prep_file_sharded(tmp_path, workers, extension):
+    infile = str(tmp_path / "input.txt")
+    with open(infile, "w", encoding="utf-8") as f:
+        f.write("".join(f"Tweet {i} @world 😰\n" for i in range(25)))
+
+    outfile = prep_file_sharded(infile, str(tmp_path / f"output.txt{extension}"), workers=workers, n_shards=4,
+                                mentions="tag")
+    prep_file(infile, str(tmp_path / f"expected.txt{extension}"), mentions="tag")
+
+    with open_binary(outfile, "rb") as f, open_binary(str(tmp_path / f"expected.txt{extension}"), "rb") as expected_f:
+        assert f.read() == expected_f.read()
+    assert sorted(os.listdir(str(tmp_path))) == sorted(["input.txt", f"output.txt{extension}",
+                                                       f"expected.txt{extension}"])
+
+
+def test_prep_file_sharded_manifest(tmp_path):
+    infile = str(tmp_path / "input.jsonl")
+    with open(infile, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps({"id": i, "text": f"Tweet {i}"}) + "\n" for i in range(10)))
+
+    manifest = prep_file_sharded(infile, str(tmp_path / "output.jsonl"), workers=1, n_shards=3, concatenate=False,
+                                 input_format="jsonl")
+
+    with open(manifest, encoding="utf-8") as f:
+        shards = json.load(f)["shards"]
+    assert len(shards) == 3
+    assert sum(shard["lines"] for shard in shards) == 10
+    records = []
+    for shard in shards:
+        with open(shard["path"], encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f)
+    assert records == [{"id": i, "text": f"tweet {i}"} for i in range(10)]
+
+
+def test_prep_file_sharded_compressed_input(tmp_path):
+    with pytest.raises(ValueError):
+        prep_file_sharded(str(tmp_path / "input.txt.gz"), str(tmp_path / "output.txt"))
+
+
+@pytest.mark.parametrize("formats", [{"output_format": "parquet"}, {"output_format": "arrow"},
+                                     {"input_format": "csv"}, {"output_format": "csv"}])
+def test_prep_file_sharded_unsupported_formats(tmp_path, formats):
+    infile = str(tmp_path / "input.txt")
+    with open(infile, "w", encoding="utf-8") as f:
+        f.write("Hello\n")
+    with pytest.raises(ValueError):
+        prep_file_sharded(infile, str(tmp_path / "output.parquet"), workers=1, **formats)
+    with pytest.raises(ValueError):
+        prep_file_range(infile, str(tmp_path / "output.parquet"), **formats)
+    assert os.listdir(str(tmp_path)) == ["input.txt"]
@@ -1,7 +1,7 @@
 import pytest
 
 from tweet_nlp_toolkit.constants import HASHTAG_TAG, EMOJI_TAG, UNKNOWN_LANGUAGE
-from tweet_nlp_toolkit.prep.token import Token, Action
+from tweet_nlp_toolkit.prep.token import Token, Action, punctuation_mask, TOKEN_KINDS, _is_punctuation_char
 from tweet_nlp_toolkit.prep.regexes import HASHTAG
 
 
@@ -129,6 +129,13 @@ def test_token__is_stop_word_when_token_is_in_upper_case():
     assert token.is_stop_word is True
 
 
+def test_token_is_stop_word_in_other_languages():
+    assert Token('les', lang='fr').is_stop_word is True
+    assert Token('Les', lang='fr').is_stop_word is True
+    assert Token('chat', lang='fr').is_stop_word is False
+    assert Token('the', lang='zh').is_stop_word is False
+
+
 def test_token_is_stop_word_when_language_is_not_given():
     token = Token('the')
     assert token.is_stop_word is False
@@ -187,3 +194,30 @@ def test_action_apply_returning_true():
 def test_action_apply_returning_false():
     action = Action(action_name="remove", action_condition="is_hashtag")
     assert action.apply(Token('@hashtag')) is False
+
+
+def test_token_is_punctuation_same_as_unicode_check():
+    for cp in list(range(0x3000)) + [0x10100, 0x1DA87, 0x20000, 0xE0001]:
+        assert Token._is_punctuation(chr(cp)) == _is_punctuation_char(chr(cp))
+
+
+def test_punctuation_mask():
+    values = ["!", "hello", "‼", "、", "𐄀", "😰", "1", "", "!!", Token("?")]
+    assert punctuation_mask(values) == [True, False, True, True, True, False, False, False, False, True]
+
+
+@pytest.mark.parametrize(("value", "expected"),
+                         [("<MENTION>", "tag"),
+                          ("@tutu", "mention"),
+                          ("#emnlp2019", "hashtag"),
+                          ("https://buff.ly/2Uclr2A", "url"),
+                          ("12.34", "digit"),
+                          ("😰", "emoji"),
+                          (":)", "emoticon"),
+                          ("!", "punct"),
+                          ("tutu@gmail.com", "email"),
+                          ("<div>", "html_tag"),
+                          ("hello", "word")])
+def test_token_kind(value, expected):
+    assert Token(value).kind == expected
+    assert expected in TOKEN_KINDS
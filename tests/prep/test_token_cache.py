@@ -0,0 +1,138 @@
+import struct
+import sys
+
+import pytest
+
+from tweet_nlp_toolkit.prep.text_parser import parse_text, tokenize_text
+from tweet_nlp_toolkit.prep.token import Token, WeiboToken
+from tweet_nlp_toolkit.prep.token_cache import build_token_cache, TokenCache, TokenCacheWriter
+from tweet_nlp_toolkit.prep.tokenizer import weibo_tokenize
+
+TEXTS = [
+    "123 @hello #world www.url.com 😰 :) abc@gmail.com",
+    "<p>C'est</p> @nlp https://www.google.fr cant wait 😰 for the new season of #davidlynch #tvseries :))))",
+    "",
+    "Ça va?!!! . . . 👍🏽 12.5% &pound;100 :thumbs_up: \\(^o^)/",
+    "the the the @nlp @nlp",
+]
+
+ACTIONS = [
+    {},
+    {"mentions": "tag", "urls": "tag"},
+    {"mentions": "remove", "hashtags": "remove", "digits": "tag", "emojis": "demojize", "puncts": "remove"},
+    {"emojis": "emojize", "emoticons": "tag", "emails": "tag", "html_tags": "remove", "stop_words": "remove"},
+    {"emojis": "remove", "emoticons": "remove", "puncts": "tag", "urls": "remove", "digits": "remove"},
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    path = str(tmp_path / "texts.tokens")
+    assert build_token_cache(TEXTS, path) == len(TEXTS)
+    return TokenCache.load(path)
+
+
+@pytest.mark.parametrize("actions", ACTIONS)
+def test_token_cache_values(cache, actions):
+    assert list(cache.values(**actions)) == [parse_text(text, **actions).value for text in TEXTS]
+
+
+@pytest.mark.parametrize("actions", ACTIONS)
+def test_token_cache_parse(cache, actions):
+    for parsed_text, text in zip(cache.parse(**actions), TEXTS):
+        expected = parse_text(text, **actions)
+        assert parsed_text.value == expected.value
+        assert [token.value for token in parsed_text] == [token.value for token in expected]
+        assert parsed_text.hashtags == expected.hashtags
+
+
+def test_token_cache_tokens(cache):
+    assert len(cache) == len(TEXTS)
+    assert cache[4] == tokenize_text(TEXTS[4])
+    assert cache[2] == []
+    assert sorted(cache.distinct_tokens) == sorted({token.value for text in TEXTS for token in tokenize_text(text)})
+    with pytest.raises(IndexError):
+        cache[len(TEXTS)]
+
+
+def test_token_cache_weibo_tokens(tmp_path):
+    path = str(tmp_path / "texts.tokens")
+    texts = ["#超话# 你好 @微博", "hello #world"]
+    build_token_cache(texts, path, tokenizer=weibo_tokenize)
+    cache = TokenCache.load(path)
+    assert isinstance(cache[0][0], WeiboToken)
+    assert list(cache.values(hashtags="tag")) == [
+        parse_text(text, tokenizer=weibo_tokenize, hashtags="tag").value for text in texts
+    ]
+
+
+def test_token_cache_token_langs(tmp_path):
+    path = str(tmp_path / "texts.tokens")
+    texts = [
+        [Token("the", "en"), Token("chat", "fr"), Token("the", None)],
+        [Token("chat", "en"), WeiboToken("#超话#", "zh"), Token("the", "en")],
+    ]
+    with TokenCacheWriter(path) as writer:
+        for tokens in texts:
+            writer.add(tokens)
+    cache = TokenCache.load(path)
+    assert [[(type(token), token.value, token.lang) for token in cache[i]] for i in range(len(texts))] == [
+        [(type(token), token.value, token.lang) for token in tokens] for tokens in texts
+    ]
+    assert [
+        [(token.value, token.lang) for token in parsed_text] for parsed_text in cache.parse(stop_words="remove")
+    ] == [
+        [("chat", "fr"), ("the", None)],
+        [("chat", "en"), ("#超话#", "zh")],
+    ]
+
+
+def test_token_cache_unknown_token_class(tmp_path):
+    class CustomToken(Token):
+        pass
+
+    with TokenCacheWriter(str(tmp_path / "texts.tokens")) as writer:
+        with pytest.raises(TypeError):
+            writer.add([CustomToken("hello")])
+
+
+def test_token_cache_is_little_endian(tmp_path):
+    path = tmp_path / "texts.tokens"
+    build_token_cache(TEXTS, str(path))
+    data = path.read_bytes()
+    header = struct.Struct("<8sqqqq")
+    _, n_texts, n_tokens, _, _ = header.unpack_from(data)
+    assert (n_texts, n_tokens) == (len(TEXTS), sum(len(tokenize_text(text)) for text in TEXTS))
+    # the first token of the first text is the first distinct token
+    assert struct.unpack_from("<i", data, header.size) == (0,)
+
+
+def test_token_cache_big_endian_host(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "byteorder", "big")
+    path = str(tmp_path / "texts.tokens")
+    build_token_cache(TEXTS, path)
+    assert list(TokenCache.load(path).values(mentions="tag")) == [parse_text(t, mentions="tag").value for t in TEXTS]
+
+
+def test_token_cache_writer_flushes_blocks(tmp_path):
+    path = str(tmp_path / "texts.tokens")
+    with TokenCacheWriter(path, buffer_size=8) as writer:
+        for text in TEXTS * 3:
+            writer.add(tokenize_text(text))
+    assert list(TokenCache.load(path).values(mentions="tag")) == [
+        parse_text(t, mentions="tag").value for t in TEXTS * 3
+    ]
+
+
+def test_token_cache_invalid_actions(cache):
+    with pytest.raises(ValueError):
+        list(cache.values(mentions="demojize"))
+    with pytest.raises(TypeError):
+        list(cache.values(to_lower=False))
+
+
+def test_token_cache_invalid_file(tmp_path):
+    path = tmp_path / "invalid.tokens"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        TokenCache.load(str(path))
@@ -130,3 +130,13 @@ def test_white_space_tokenize_return_type():
 
 def test_weibo_tokenize_return_type():
     assert type(weibo_tokenize("unit test")[0]) == WeiboToken
+
+
+@pytest.mark.parametrize(("text", "expected_tokens"),
+                         [("family 👨‍👩‍👧 time", ["family", "👨‍👩‍👧", "time"]),
+                          ("🇫🇷🇩🇪🇫", ["🇫🇷", "🇩🇪", "🇫"]),  # flags, the last regional indicator is alone
+                          ("1⃣ 1️⃣ 123", ["1⃣", "1️⃣", "123"]),  # keycaps
+                          ("👍🏽👍", ["👍🏽", "👍"]),  # skin tone
+                          ("❤‍🔥 #tag 8)", ["❤‍🔥", "#tag", "8)"])])
+def test_tweet_tokenize_emoji_sequences(text, expected_tokens):
+    assert tweet_tokenize(text) == expected_tokens
@@ -0,0 +1,80 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from tweet_nlp_toolkit.cli import main, run, Stats
+
+
+def test_run_jsonl():
+    in_f = io.BytesIO(b'{"id": 1, "text": "Hello @world"}\n{"delete": {"id": 2}}\n\n{"id": 3, "text": "cool \xf0\x9f\x98\xb0"}\n')
+    out_f = io.BytesIO()
+
+    stats = run(in_f, out_f, input_format="jsonl", chunk_size=1, mentions="tag", emojis="tag")
+
+    assert [json.loads(line) for line in out_f.getvalue().splitlines()] == [
+        {"id": 1, "text": "hello <MENTION>"},
+        {"delete": {"id": 2}},
+        {"id": 3, "text": "cool <EMOJI>"},
+    ]
+    assert stats.lines == 4
+    assert stats.tokens == 4
+    assert set(stats.timings) == {"read", "parse", "write"}
+
+
+def test_run_with_workers():
+    lines = [f"Tweet {i} #hashtag" for i in range(50)]
+    out_f = io.BytesIO()
+
+    run(io.BytesIO("\n".join(lines).encode("utf-8")), out_f, chunk_size=7, workers=2, hashtags="remove")
+
+    assert out_f.getvalue().decode("utf-8").splitlines() == [f"tweet {i}" for i in range(50)]
+
+
+def test_run_text_utf8():
+    in_f = io.BytesIO("Café génial 😰\ncaf\\u00e9 \\ud83d\\ude30\n".encode("utf-8"))
+    out_f = io.BytesIO()
+
+    run(in_f, out_f, emojis="tag")
+
+    assert out_f.getvalue().decode("utf-8").splitlines() == ["café génial <EMOJI>", "café <EMOJI>"]
+
+
+def test_main_segment_hashtags(tmp_path):
+    infile = str(tmp_path / "input.txt")
+    outfile = str(tmp_path / "output.txt")
+    with open(infile, "w", encoding="utf-8") as f:
+        f.write("#MakeAmericaGreat\n")
+
+    assert main([infile, outfile, "--quiet", "--no-lower", "--hashtags", "segment"]) == 0
+
+    with open(outfile, encoding="utf-8") as f:
+        assert f.read() == "make america great\n"
+
+
+def test_stats_summary():
+    stream = io.StringIO()
+    stats = Stats(progress_interval=0, stream=stream)
+    stats.update(tokens=3)
+    assert "1 lines, 3 tokens" in stream.getvalue()
+    assert "lines/sec" in stats.summary()
+    assert "parse" in stats.summary()
+
+
+def test_main_with_files(tmp_path, capsys):
+    infile = str(tmp_path / "input.txt.gz")
+    outfile = str(tmp_path / "output.txt")
+    with gzip.open(infile, "wt", encoding="utf-8") as f:
+        f.write("Check https://buff.ly/2Uclr2A #Bias\nI got 12 apples\n")
+
+    assert main([infile, outfile, "--urls", "remove", "--digits", "tag", "--no-lower", "--filter", "#Bias"]) == 0
+
+    with open(outfile, encoding="utf-8") as f:
+        assert f.read() == "Check\nI got <DIGIT> apples\n"
+    assert "tokens/sec" in capsys.readouterr().err
+
+
+def test_main_unknown_action(capsys):
+    with pytest.raises(SystemExit):
+        main(["--emojis", "unknown"])
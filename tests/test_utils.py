@@ -1,7 +1,15 @@
+import unicodedata
+
 import pytest
 
-from tweet_nlp_toolkit.constants import UNKNOWN_LANGUAGE
-from tweet_nlp_toolkit.utils import get_stop_words, get_language, remove_variation_selectors, strip_accents_unicode
+from tweet_nlp_toolkit.constants import ENGLISH_STOP_WORDS, UNKNOWN_LANGUAGE
+from tweet_nlp_toolkit.utils import (
+    get_stop_words,
+    get_language,
+    remove_variation_selectors,
+    stop_word_languages,
+    strip_accents_unicode,
+)
 
 
 def test_get_stop_words():
@@ -12,6 +20,24 @@ def test_get_stop_words_unknown_language():
     with pytest.raises(ValueError):
         assert get_stop_words('test')
 
+
+@pytest.mark.parametrize(('lang', 'word'), [('fr', 'les'), ('de', 'und'), ('ru', 'что'), ('ar', 'في')])
+def test_get_stop_words_other_languages(lang, word):
+    stop_words = get_stop_words(lang)
+    assert word in stop_words and 'the' not in stop_words
+    assert get_stop_words(lang) is stop_words
+
+
+def test_get_stop_words_registry():
+    assert get_stop_words('en') is ENGLISH_STOP_WORDS
+    assert {'en', 'fr', 'es', 'de', 'pt'} <= stop_word_languages()
+    assert all(word == word.lower() for lang in stop_word_languages() for word in get_stop_words(lang))
+    # accented words without their accents, for texts parsed with strip_accents=True
+    assert {'été', 'ete'} <= get_stop_words('fr')
+    # languages of get_language without a stop list
+    assert get_stop_words('zh') == frozenset()
+    assert get_stop_words(UNKNOWN_LANGUAGE) == frozenset()
+
 #
 # def test_get_language():
 #     assert get_language('this is en') == 'en'
@@ -31,3 +57,14 @@ def test_remove_variation_selectors():
                           ('ความรักมากสำหรับผู้หญิงคนนี้', 'ความรกมากสำหรบผหญงคนน')])  # Thai
 def test_strip_accents_unicode(text, expected):
     assert strip_accents_unicode(text) == expected
+
+
+def test_strip_accents_unicode_same_as_category_filter():
+    text = "".join(chr(cp) for cp in range(0x80, 0x3000))
+    expected = "".join(char for char in unicodedata.normalize("NFD", text) if unicodedata.category(char) != "Mn")
+    assert strip_accents_unicode(text) == expected
+
+
+def test_strip_accents_unicode_ascii_fast_path():
+    text = "no accent at all"
+    assert strip_accents_unicode(text) is text
@@ -1,10 +1,16 @@
 # pylint: disable=unused-import,missing-docstring
 from .__version__ import __title__, __description__, __url__, __version__
-from .prep.text_parser import parse_text
-from .prep.text_prep import prep, prep_file
+from .prep.async_parser import aparse_text, aparse_many
+from .prep.text_parser import parse_text, parse_many, parse_stream
+from .prep.text_prep import prep, prep_file, prep_file_sharded
 
 __all__ = [
     "parse_text",
+    "parse_many",
+    "parse_stream",
+    "aparse_text",
+    "aparse_many",
     "prep",
     "prep_file",
+    "prep_file_sharded",
 ]
@@ -0,0 +1,237 @@
+"""
+Command line interface for batch preprocessing.
+
+Usage Example:
+
+    zcat tweets.jsonl.gz | tweet-nlp-prep --input-format jsonl --mentions tag --workers 8 > output.jsonl
+    tweet-nlp-prep tweets.txt.gz output.txt.zst --urls remove --emojis demojize
+
+Live throughput is printed on the standard error, followed by the time spent in each stage.
+"""
+import argparse
+import sys
+import time
+from collections import deque
+from typing import BinaryIO, Deque, Iterator, List, Optional, Tuple
+
+from tweet_nlp_toolkit.__version__ import __version__
+from tweet_nlp_toolkit.prep.file_io import (
+    BufferedLineWriter,
+    COMPRESSIONS,
+    compressed_reader,
+    compressed_writer,
+    decode_record,
+    DEFAULT_BUFFER_SIZE,
+    encode_record,
+    FILE_FORMATS,
+    infer_compression,
+    INFER_COMPRESSION,
+    iter_lines,
+    open_binary,
+    TEXT_FORMAT,
+)
+from tweet_nlp_toolkit.prep.text_parser import ACTION_CONDITIONS, parse_stream
+from tweet_nlp_toolkit.prep.token import Action
+from tweet_nlp_toolkit.prep.tokenizer import TOKENIZERS
+
+STDIO = "-"
+
+
+class Stats:
+    """Throughput and time spent in each stage of the preprocessing."""
+
+    STAGES = ["read", "parse", "write"]
+
+    def __init__(self, progress_interval: Optional[float] = 1.0, stream=sys.stderr):
+        self.lines = 0
+        self.tokens = 0
+        self.timings = {stage: 0.0 for stage in self.STAGES}
+        self._progress_interval = progress_interval
+        self._stream = stream
+        self._start = time.perf_counter()
+        self._last_report = self._start
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def update(self, tokens: int):
+        self.lines += 1
+        self.tokens += tokens
+        if self._progress_interval is not None and time.perf_counter() - self._last_report >= self._progress_interval:
+            self._last_report = time.perf_counter()
+            self._stream.write(f"\r{self._throughput()}")
+            self._stream.flush()
+
+    def _throughput(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (
+            f"{self.lines} lines, {self.tokens} tokens "
+            f"({self.lines / elapsed:.0f} lines/sec, {self.tokens / elapsed:.0f} tokens/sec)"
+        )
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        rows = [f"{self._throughput()} in {elapsed:.2f}s"]
+        for stage in self.STAGES:
+            timing = self.timings[stage]
+            rows.append(f"  {stage:<6}{timing:10.2f}s {100 * timing / elapsed:6.1f}%")
+        return "\n".join(rows)
+
+
+def _compression(path: str, compression: str) -> Optional[str]:
+    if compression == INFER_COMPRESSION:
+        return None if path == STDIO else infer_compression(path)
+    return None if compression == "none" else compression
+
+
+def _open_input(path: str, compression: str) -> BinaryIO:
+    if path == STDIO:
+        return compressed_reader(sys.stdin.buffer, _compression(path, compression))
+    return open_binary(path, "rb", _compression(path, compression))
+
+
+def _open_output(path: str, compression: str) -> BinaryIO:
+    if path == STDIO:
+        return compressed_writer(sys.stdout.buffer, _compression(path, compression))
+    return open_binary(path, "wb", _compression(path, compression))
+
+
+def run(
+    in_f: BinaryIO,
+    out_f: BinaryIO,
+    input_format: str = TEXT_FORMAT,
+    output_format: Optional[str] = None,
+    text_field: str = "text",
+    chunk_size: int = 1000,
+    workers: int = 1,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    stats: Optional[Stats] = None,
+    **kwargs,
+) -> Stats:
+    """
+    Preprocess the lines of a binary file object into another one.
+
+    :param kwargs: arguments for the parse_text function
+    :return: the throughput and timing statistics
+    """
+    output_format = output_format or input_format
+    stats = stats or Stats(progress_interval=None)
+    # lines read ahead of the parser, with their JSON object and whether their text is being parsed
+    pending: Deque[Tuple[bytes, Optional[dict], bool]] = deque()
+
+    def _read_texts() -> Iterator[str]:
+        start = time.perf_counter()
+        for line in iter_lines(in_f, buffer_size):
+            record, text = decode_record(line, input_format, text_field)
+            pending.append((line, record, text is not None))
+            if text is not None:
+                stats.timings["read"] += time.perf_counter() - start
+                yield text
+                start = time.perf_counter()
+        stats.timings["read"] += time.perf_counter() - start
+
+    def _write_pending_without_text(writer: BufferedLineWriter):
+        while pending and not pending[0][2]:
+            line, record, _ = pending.popleft()
+            output_line = encode_record(record, None, line, output_format, text_field)
+            if output_line is not None:
+                writer.write_line(output_line)
+            stats.update(tokens=0)
+
+    with BufferedLineWriter(out_f, buffer_size) as writer:
+        parsed_texts = parse_stream(_read_texts(), chunk_size=chunk_size, workers=workers, encoding="utf-8", **kwargs)
+        while True:
+            start, read_timing = time.perf_counter(), stats.timings["read"]
+            parsed_text = next(parsed_texts, None)
+            # reading happens lazily while waiting for the parser
+            stats.timings["parse"] += time.perf_counter() - start - (stats.timings["read"] - read_timing)
+
+            start = time.perf_counter()
+            _write_pending_without_text(writer)
+            if parsed_text is None:
+                stats.timings["write"] += time.perf_counter() - start
+                break
+            line, record, _ = pending.popleft()
+            writer.write_line(encode_record(record, parsed_text.value, line, output_format, text_field))  # type: ignore
+            stats.update(tokens=len(parsed_text))
+            stats.timings["write"] += time.perf_counter() - start
+    return stats
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Arguments of the command line, an option per action of parse_text with the choices of Action.ACTION_MAPPING."""
+    parser = argparse.ArgumentParser(prog="tweet-nlp-prep", description="Preprocess tweets, one per line.")
+    parser.add_argument("input", nargs="?", default=STDIO, help="input file, default the standard input")
+    parser.add_argument("output", nargs="?", default=STDIO, help="output file, default the standard output")
+    parser.add_argument("--version", action="version", version=__version__)
+
+    io_group = parser.add_argument_group("input/output")
+    io_group.add_argument("--input-format", choices=FILE_FORMATS, default=TEXT_FORMAT)
+    io_group.add_argument("--output-format", choices=FILE_FORMATS, help="default the input format")
+    io_group.add_argument("--text-field", default="text", help="dotted path of the text in JSON objects")
+    compressions = [INFER_COMPRESSION, "none"] + COMPRESSIONS
+    io_group.add_argument("--input-compression", choices=compressions, default=INFER_COMPRESSION)
+    io_group.add_argument("--output-compression", choices=compressions, default=INFER_COMPRESSION)
+    io_group.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE, help="output block size in bytes")
+
+    perf_group = parser.add_argument_group("performance")
+    perf_group.add_argument("--workers", type=int, default=1, help="number of processes")
+    perf_group.add_argument("--chunk-size", type=int, default=1000, help="number of lines sent at once to a worker")
+    perf_group.add_argument("--progress-interval", type=float, default=1.0, help="seconds between progress reports")
+    perf_group.add_argument("--quiet", action="store_true", help="don't print progress and timings")
+
+    prep_group = parser.add_argument_group("preprocessing")
+    prep_group.add_argument("--tokenizer", choices=sorted(TOKENIZERS), default="tweet")
+    prep_group.add_argument("--no-lower", dest="to_lower", action="store_false", help="don't lowercase the text")
+    prep_group.add_argument("--strip-accents", action="store_true")
+    prep_group.add_argument("--reduce-len", action="store_true", help="reduce repeated characters to 3")
+    prep_group.add_argument("--remove-unencodable-char", action="store_true")
+    prep_group.add_argument(
+        "--time-budget", type=float, help="seconds spent tokenizing a text before falling back to white spaces"
+    )
+    prep_group.add_argument("--filter", dest="filters", action="append", help="token to filter, can be repeated")
+    for option, condition in ACTION_CONDITIONS.items():
+        prep_group.add_argument(f"--{option.replace('_', '-')}", choices=Action.ACTION_MAPPING[condition])
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Preprocess the input file into the output file, see `tweet-nlp-prep --help`."""
+    args = _build_parser().parse_args(argv)
+    kwargs = {option: getattr(args, option) for option in ACTION_CONDITIONS}
+    stats = Stats(progress_interval=None if args.quiet else args.progress_interval)
+    in_f = _open_input(args.input, args.input_compression)
+    out_f = _open_output(args.output, args.output_compression)
+    try:
+        run(
+            in_f,
+            out_f,
+            input_format=args.input_format,
+            output_format=args.output_format,
+            text_field=args.text_field,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            buffer_size=args.buffer_size,
+            stats=stats,
+            tokenizer=TOKENIZERS[args.tokenizer],
+            to_lower=args.to_lower,
+            strip_accents=args.strip_accents,
+            reduce_len=args.reduce_len,
+            remove_unencodable_char=args.remove_unencodable_char,
+            time_budget=args.time_budget,
+            filters=set(args.filters or []),
+            **kwargs,
+        )
+    finally:
+        for fileobj, path in ((in_f, args.input), (out_f, args.output)):
+            if path != STDIO or fileobj not in (sys.stdin.buffer, sys.stdout.buffer):
+                fileobj.close()
+        sys.stdout.flush()
+    if not args.quiet:
+        sys.stderr.write(f"\r{stats.summary()}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
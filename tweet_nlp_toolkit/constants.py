@@ -18,6 +18,20 @@ DIGIT_TAG = "<DIGIT>"
 EMOTICON_TAG = "<EMOTICON>"
 PUNCTUATION_TAG = "<PUNCT>"
 EMAIL_TAG = "<EMAIL>"
+TAGS = [
+    EMOJI_TAG,
+    MENTION_TAG,
+    HASHTAG_TAG,
+    URL_TAG,
+    DIGIT_TAG,
+    EMOTICON_TAG,
+    PUNCTUATION_TAG,
+    EMAIL_TAG,
+]
+
+# Special tokens of vocabularies
+PADDING_TOKEN = "<PAD>"
+UNKNOWN_TOKEN = "<UNK>"
 
 # Note: the following code is copied from sklearn
 
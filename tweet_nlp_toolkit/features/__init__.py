@@ -0,0 +1 @@
+# pylint: disable=unused-import,missing-docstring
@@ -0,0 +1,223 @@
+"""
+Token frequencies over a stream of parsed texts.
+
+The kind of each token (hashtag, mention, emoji, ...) is computed once, see Token.kind, and its value is counted for
+that kind. Counts are exact, or approximated by a count-min sketch of fixed size keeping the top-k heavy hitters for
+corpora too large for a dict. Statistics computed in different processes are merged with `merge`.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_stream
+    from tweet_nlp_toolkit.features.corpus_stats import CorpusStats
+
+    stats = CorpusStats(kinds=["hashtag", "mention", "emoji"], exact=False, top_k=1000)
+    stats.update(parse_stream(texts, workers=8))
+    stats.most_common("hashtag", 10)
+
+Requires numpy.
+"""
+import heapq
+from hashlib import blake2b
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("tweet_nlp_toolkit.features requires numpy: pip install tweet_nlp_toolkit[numpy]") from exc
+
+from tweet_nlp_toolkit.features.vocabulary import text_tokens, TokenizedText
+from tweet_nlp_toolkit.prep.token import TOKEN_KINDS
+
+
+class CountMinSketch:
+    """
+    Approximate counts in a fixed-size table, estimates are never lower than the exact counts.
+
+    With the default size (8MB), the overestimation is below 1.1e-5 times the total count with probability 98%.
+
+    :param width: number of counters per row, at most 2 ** 32
+    :param depth: number of rows, each row hashes the values differently
+    :param seed: seed of the hash functions, between 0 and 2 ** 64 - 1
+    """
+
+    def __init__(self, width: int = 2**18, depth: int = 4, seed: int = 0):
+        if not 0 < width <= 1 << 32 or depth < 1:
+            raise ValueError("width should be between 1 and 2 ** 32, and depth positive")
+        if not 0 <= seed < 1 << 64:
+            raise ValueError("seed should be between 0 and 2 ** 64 - 1")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._key = seed.to_bytes(8, "little")
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(0, 1 << 64, size=depth, dtype=np.uint64) | np.uint64(1)
+        self._increments = rng.integers(0, 1 << 64, size=depth, dtype=np.uint64)
+
+    def _columns(self, values: Sequence[str]) -> np.ndarray:
+        """The column of each value in each row, of shape (depth, number of values)."""
+        # the keyed state is copied for each value rather than keyed again
+        keyed = blake2b(digest_size=8, key=self._key)
+        digests = []
+        for value in values:
+            hasher = keyed.copy()
+            hasher.update(value.encode("utf-8", "surrogatepass"))
+            digests.append(hasher.digest())
+        hashes = np.frombuffer(b"".join(digests), dtype="<u8").astype(np.uint64)
+        # multiply-shift: row i keeps the high 32 bits of a_i * hash + b_i modulo 2 ** 64, with independent a_i and b_i
+        with np.errstate(over="ignore"):
+            mixed = self._multipliers[:, None] * hashes + self._increments[:, None]
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, values: Sequence[str], counts: Optional[Sequence[int]] = None):
+        """Add the values, each counted once or `counts` times."""
+        if not values:
+            return
+        columns = self._columns(values)
+        counts_array = np.ones(len(values), dtype=np.int64) if counts is None else np.asarray(counts, np.int64)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts_array)
+
+    def estimate(self, values: Sequence[str]) -> np.ndarray:
+        """Estimated counts of the values."""
+        if not values:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(values)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """Add the counts of another sketch of the same size and seed."""
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("only sketches with the same width, depth and seed can be merged")
+        self.table += other.table
+        return self
+
+
+class CorpusStats:
+    """
+    Count the tokens of parsed texts by kind.
+
+    :param kinds: kinds of tokens whose values are counted, see TOKEN_KINDS. Default None, every kind.
+    :param exact: count exactly, otherwise use one count-min sketch per kind and keep the top-k values
+    :param top_k: number of most frequent values kept per kind when exact is False
+    :param width: width of the count-min sketches
+    :param depth: depth of the count-min sketches
+    :param seed: seed of the count-min sketches
+    """
+
+    def __init__(
+        self,
+        kinds: Optional[Iterable[str]] = None,
+        exact: bool = True,
+        top_k: int = 100,
+        width: int = 2**18,
+        depth: int = 4,
+        seed: int = 0,
+    ):
+        self.kinds = list(TOKEN_KINDS if kinds is None else kinds)
+        unknown_kinds = set(self.kinds) - set(TOKEN_KINDS)
+        if unknown_kinds:
+            raise ValueError(f"unknown token kinds {sorted(unknown_kinds)}, available kinds are {TOKEN_KINDS}")
+        self.exact = exact
+        self.top_k = top_k
+        self.texts = 0
+        self.tokens = 0
+        self.kind_counts: Counter = Counter()
+        self._counters: Dict[str, Counter] = {kind: Counter() for kind in self.kinds} if exact else {}
+        self._sketches: Dict[str, CountMinSketch] = (
+            {} if exact else {kind: CountMinSketch(width, depth, seed) for kind in self.kinds}
+        )
+        # heavy hitters: value -> estimated count
+        self._candidates: Dict[str, Dict[str, int]] = {} if exact else {kind: {} for kind in self.kinds}
+
+    def update(self, texts: Iterable[TokenizedText], batch_size: int = 10000) -> "CorpusStats":
+        """
+        Count the tokens of a stream of texts.
+
+        :param texts: parsed texts or sequences of tokens, e.g. the output of parse_stream
+        :param batch_size: number of texts counted together before updating the sketches
+        :return: the instance
+        """
+        texts = iter(texts)
+        while True:
+            batch = list(islice(texts, batch_size))
+            if not batch:
+                return self
+            self._update_batch(batch)
+
+    def _update_batch(self, texts: List[TokenizedText]):
+        """Count a batch of texts, the sketches are updated once per batch."""
+        batch: Dict[str, Counter] = {kind: Counter() for kind in self.kinds}
+        for text in texts:
+            self.texts += 1
+            tokens = text_tokens(text)
+            for token in tokens:
+                kind = token.kind
+                self.kind_counts[kind] += 1
+                if kind in batch:
+                    batch[kind][token.value] += 1
+            self.tokens += len(tokens)
+        for kind, counter in batch.items():
+            if self.exact:
+                self._counters[kind].update(counter)
+            elif counter:
+                values = list(counter)
+                self._sketches[kind].add(values, list(counter.values()))
+                self._update_candidates(kind, values)
+
+    def _update_candidates(self, kind: str, values: List[str]):
+        candidates = self._candidates[kind]
+        for value, count in zip(values, self._sketches[kind].estimate(values).tolist()):
+            candidates[value] = count
+        # prune lazily so that the pruning cost is amortized over several batches
+        if len(candidates) > 2 * self.top_k:
+            self._candidates[kind] = dict(heapq.nlargest(self.top_k, candidates.items(), key=lambda x: x[1]))
+
+    def counter(self, kind: str) -> Counter:
+        """Exact counts of the token values of the given kind, when exact is True."""
+        return self._counters[kind]
+
+    def sketch(self, kind: str) -> CountMinSketch:
+        """Count-min sketch of the token values of the given kind, when exact is False."""
+        return self._sketches[kind]
+
+    def candidates(self, kind: str) -> Dict[str, int]:
+        """Heavy hitters of the given kind and their estimated counts, when exact is False."""
+        return self._candidates[kind]
+
+    def merge(self, other: "CorpusStats") -> "CorpusStats":
+        """Add the statistics of another instance, e.g. computed in another process, with the same parameters."""
+        if self.exact != other.exact or self.kinds != other.kinds:
+            raise ValueError("only statistics with the same kinds and exactness can be merged")
+        self.texts += other.texts
+        self.tokens += other.tokens
+        self.kind_counts.update(other.kind_counts)
+        for kind in self.kinds:
+            if self.exact:
+                self._counters[kind].update(other.counter(kind))
+            else:
+                self._sketches[kind].merge(other.sketch(kind))
+                values = list(set(self._candidates[kind]) | set(other.candidates(kind)))
+                self._update_candidates(kind, values)
+        return self
+
+    def count(self, kind: str, value: str) -> int:
+        """Number of occurrences of a token value of the given kind, an upper bound when exact is False."""
+        if self.exact:
+            return self._counters[kind][value]
+        return int(self._sketches[kind].estimate([value])[0])
+
+    def most_common(self, kind: str, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Most frequent token values of the given kind.
+
+        :param kind: the kind of tokens
+        :param n: number of values, default all the values, or the top-k values when exact is False
+        :return: (value, count) pairs, by decreasing count
+        """
+        if self.exact:
+            return self._counters[kind].most_common(n)
+        ranked = sorted(self._candidates[kind].items(), key=lambda x: (-x[1], x[0]))
+        return ranked[: min(n, self.top_k) if n is not None else self.top_k]
@@ -0,0 +1,166 @@
+"""
+Near-duplicate detection of parsed texts with MinHash and locality-sensitive hashing.
+
+Texts are compared on their token n-grams (shingles). Parsing them with `urls="tag"` and `mentions="tag"` makes
+tweets differing only by their links or mentions identical. The MinHash signatures of a batch are computed with
+numpy, then split into bands: texts sharing a band are candidate duplicates, optionally verified by the similarity
+estimated from their signatures. With b bands of r rows, texts with a Jaccard similarity s are candidates with
+probability 1 - (1 - s ** r) ** b.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_many
+    from tweet_nlp_toolkit.features.dedup import NearDuplicateDetector
+
+    detector = NearDuplicateDetector(num_perm=128, bands=32)
+    for batch in batches:
+        duplicate_of = detector.find_duplicates(parse_many(batch, urls="tag", mentions="tag"))
+        kept = [text for text, duplicate in zip(batch, duplicate_of) if duplicate < 0]
+
+Requires numpy.
+"""
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("tweet_nlp_toolkit.features requires numpy: pip install tweet_nlp_toolkit[numpy]") from exc
+
+from tweet_nlp_toolkit.features.hashing import NGRAM_SEPARATOR
+from tweet_nlp_toolkit.features.vocabulary import token_values, TokenizedText
+
+# multiply-add-shift hash functions ((a * x + b) mod 2 ** 64) >> 32 of 32-bit values, cheaper than a modulo
+_SHIFT = np.uint64(32)
+_EMPTY_SIGNATURE = np.iinfo(np.uint32).max
+# number of permutations computed at once, bounds the size of the (shingles, permutations) array
+_PERMUTATIONS_BLOCK = 16
+
+
+def estimate_jaccard(signature: np.ndarray, other: np.ndarray) -> float:
+    """Jaccard similarity of two texts estimated from their MinHash signatures."""
+    return float(np.mean(signature == other))
+
+
+class MinHash:
+    """
+    MinHash signatures of the shingles of texts.
+
+    :param num_perm: number of hash functions, i.e. size of the signatures
+    :param shingle_size: number of tokens of the shingles, texts with fewer tokens are a single shingle
+    :param seed: seed of the hash functions
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 2, seed: int = 0):
+        if num_perm < 1 or shingle_size < 1:
+            raise ValueError("num_perm and shingle_size should be positive")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(0, 1 << 63, size=num_perm, dtype=np.int64).astype(np.uint64) * np.uint64(2) + 1
+        self._b = generator.randint(0, 1 << 63, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def shingles(self, text: TokenizedText) -> List[str]:
+        """The distinct token n-grams of a text."""
+        values = token_values(text)
+        if not values:
+            return []
+        size = min(self.shingle_size, len(values))
+        return list(set(map(NGRAM_SEPARATOR.join, zip(*(values[i:] for i in range(size))))))
+
+    def signatures(self, texts: Iterable[TokenizedText]) -> np.ndarray:
+        """
+        MinHash signatures of a batch of texts.
+
+        :param texts: parsed texts or sequences of tokens
+        :return: an uint32 array of shape (number of texts, num_perm). Texts without tokens have a signature of
+            2 ** 32 - 1 only.
+        """
+        hashes: List[int] = []
+        sizes: List[int] = []
+        for text in texts:
+            shingles = self.shingles(text)
+            hashes.extend(zlib.crc32(shingle.encode("utf-8"), self.seed) for shingle in shingles)
+            sizes.append(len(shingles))
+        signatures = np.full((len(sizes), self.num_perm), _EMPTY_SIGNATURE, dtype=np.uint32)
+        sizes_array = np.array(sizes, dtype=np.int64)
+        non_empty = np.flatnonzero(sizes_array)
+        if len(non_empty):
+            shingle_hashes = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            starts = (np.cumsum(sizes_array) - sizes_array)[non_empty]
+            for block in range(0, self.num_perm, _PERMUTATIONS_BLOCK):
+                a, b = self._a[block : block + _PERMUTATIONS_BLOCK], self._b[block : block + _PERMUTATIONS_BLOCK]
+                permuted = ((shingle_hashes[:, None] * a + b) >> _SHIFT).astype(np.uint32)
+                signatures[non_empty, block : block + len(a)] = np.minimum.reduceat(permuted, starts, axis=0)
+        return signatures
+
+
+class NearDuplicateDetector:
+    """
+    Flag the texts of a stream that are near-duplicates of earlier texts.
+
+    :param num_perm: size of the MinHash signatures
+    :param bands: number of LSH bands, it should divide num_perm. More bands find less similar duplicates.
+    :param shingle_size: number of tokens of the shingles
+    :param threshold: minimum Jaccard similarity, estimated from the signatures, of a candidate to be a duplicate.
+        Default None, every candidate sharing a band is a duplicate and no signature is kept in memory.
+    :param seed: seed of the hash functions
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 2,
+        threshold: Optional[float] = None,
+        seed: int = 0,
+    ):
+        if bands < 1 or num_perm % bands:
+            raise ValueError("bands should divide num_perm")
+        self.minhash = MinHash(num_perm, shingle_size, seed)
+        self.bands = bands
+        self.threshold = threshold
+        self.n_documents = 0
+        self._rows = num_perm // bands
+        self._band_coefficients = (
+            np.random.RandomState(seed + 1).randint(1, 1 << 62, size=self._rows, dtype=np.int64).astype(np.uint64) | 1
+        )
+        # band -> band hash -> id of the first document of the bucket
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def _band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """One 64-bit hash per band and text, of shape (bands, number of texts)."""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self._rows)
+        with np.errstate(over="ignore"):
+            return (banded * self._band_coefficients).sum(axis=2, dtype=np.uint64).T
+
+    def find_duplicates(self, texts: Iterable[TokenizedText]) -> np.ndarray:
+        """
+        Compare a batch of texts with the texts seen so far, including the previous texts of the batch.
+
+        :param texts: parsed texts or sequences of tokens
+        :return: an int64 array with, for each text, the id of an earlier near-duplicate or -1 for new texts.
+            Documents are numbered in the order they are seen across calls.
+        """
+        signatures = self.minhash.signatures(texts)
+        band_hashes = self._band_hashes(signatures).tolist()
+        duplicate_of = np.full(len(signatures), -1, dtype=np.int64)
+        for i, signature in enumerate(signatures):
+            doc_id = self.n_documents + i
+            for band, buckets in enumerate(self._buckets):
+                candidate = buckets.get(band_hashes[band][i])
+                if candidate is not None and (
+                    self.threshold is None or estimate_jaccard(signature, self._signatures[candidate]) >= self.threshold
+                ):
+                    duplicate_of[i] = candidate
+                    break
+            else:
+                # only new texts are added to the buckets, duplicates point to the first text of their group
+                for band, buckets in enumerate(self._buckets):
+                    buckets.setdefault(band_hashes[band][i], doc_id)
+                if self.threshold is not None:
+                    self._signatures[doc_id] = signature
+        self.n_documents += len(signatures)
+        return duplicate_of
@@ -0,0 +1,203 @@
+"""
+Inverted index of the hashtags, mentions and URLs of a corpus.
+
+Each entity is mapped to the sorted ids of the documents using it. The ids are the positions of the texts in
+`parse_many`, or the line numbers of the input file of `prep_file(..., index_file=...)`. Entities are indexed as
+they are after preprocessing: entities tagged or removed by an action are not indexed.
+
+Postings are stored delta-encoded as variable-length integers in a file that is memory-mapped by `EntityIndex.load`,
+and entities are found by binary search, so an index is opened instantly whatever its size.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_many
+    from tweet_nlp_toolkit.features.entity_index import EntityIndex, EntityIndexBuilder
+
+    builder = EntityIndexBuilder()
+    builder.add_many(parse_many(texts))
+    builder.save("entities.idx")
+
+    index = EntityIndex.load("entities.idx")
+    index.lookup("#nlp")  # sorted int64 document ids
+    index.intersect("#nlp", "@remy")
+
+Requires numpy.
+"""
+import bisect
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("tweet_nlp_toolkit.features requires numpy: pip install tweet_nlp_toolkit[numpy]") from exc
+
+from tweet_nlp_toolkit.features.vocabulary import MappedStrings, text_tokens, TokenizedText
+from tweet_nlp_toolkit.prep.token import ENTITY_KINDS
+
+# File layout: magic, number of entities, number of documents, offsets of the entities in the entity blob, offsets
+# of the postings in the postings blob, document frequencies, utf-8 blob of the sorted entities, postings blob
+_MAGIC = b"TNTINDEX"
+_HEADER_SIZE = len(_MAGIC) + 16
+
+
+def encode_postings(doc_ids: np.ndarray) -> bytes:
+    """Encode sorted unique document ids as delta-encoded LEB128 variable-length integers."""
+    deltas: np.ndarray = np.diff(np.asarray(doc_ids, dtype=np.uint64), prepend=np.uint64(0))
+    # number of 7-bit groups of each delta
+    sizes = np.ones(len(deltas), dtype=np.int64)
+    for groups_count in range(1, 10):
+        sizes += deltas >= np.uint64(1 << (7 * groups_count))
+    groups = np.repeat(deltas, sizes)
+    ends = np.cumsum(sizes)
+    shifts = 7 * (np.arange(len(groups)) - np.repeat(ends - sizes, sizes)).astype(np.uint64)
+    encoded = ((groups >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+    continuation = np.ones(len(groups), dtype=bool)
+    continuation[ends - 1] = False
+    encoded[continuation] |= 0x80
+    return encoded.tobytes()
+
+
+def decode_postings(data: np.ndarray) -> np.ndarray:
+    """Decode the document ids encoded by `encode_postings`."""
+    data = np.asarray(data, dtype=np.uint8)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    sizes = ends - starts + 1
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, sizes)).astype(np.uint64)
+    values = (data & 0x7F).astype(np.uint64) << shifts
+    return np.cumsum(np.add.reduceat(values, starts)).astype(np.int64)
+
+
+class EntityIndexBuilder:
+    """
+    Collect the entities of parsed texts into an inverted index.
+
+    :param kinds: kinds of tokens to index, see TOKEN_KINDS. Default hashtags, mentions and URLs.
+    """
+
+    def __init__(self, kinds: Optional[Iterable[str]] = None):
+        self.kinds = frozenset(ENTITY_KINDS if kinds is None else kinds)
+        self.n_documents = 0
+        self._postings: Dict[str, array] = {}
+
+    def add(self, doc_id: int, text: TokenizedText):
+        """Index the entities of a document."""
+        for token in text_tokens(text):
+            if token.kind in self.kinds:
+                postings = self._postings.get(token.value)
+                if postings is None:
+                    postings = self._postings[token.value] = array("q")
+                if not postings or postings[-1] != doc_id:
+                    postings.append(doc_id)
+        self.n_documents = max(self.n_documents, doc_id + 1)
+
+    def add_many(self, texts: Iterable[TokenizedText], start: Optional[int] = None):
+        """Index a batch of documents whose ids follow `start`, default the documents already indexed."""
+        doc_id = self.n_documents if start is None else start
+        for doc_id, text in enumerate(texts, doc_id):
+            self.add(doc_id, text)
+
+    def postings(self) -> Iterator[Tuple[str, array]]:
+        """The indexed entities and the ids of the documents using them, in the order they were added."""
+        return iter(self._postings.items())
+
+    def merge(self, other: "EntityIndexBuilder") -> "EntityIndexBuilder":
+        """Add the postings of another builder, e.g. built in another process over other document ids."""
+        for entity, postings in other.postings():
+            self._postings.setdefault(entity, array("q")).extend(postings)
+        self.n_documents = max(self.n_documents, other.n_documents)
+        return self
+
+    def save(self, path: str):
+        """Save the index in a file that can be memory-mapped by `EntityIndex.load`."""
+        entities = sorted(self._postings)
+        encoded_entities = [entity.encode("utf-8") for entity in entities]
+        encoded_postings = []
+        frequencies = np.zeros(len(entities), dtype=np.int64)
+        for i, entity in enumerate(entities):
+            doc_ids = np.unique(np.frombuffer(self._postings[entity], dtype=np.int64))
+            frequencies[i] = len(doc_ids)
+            encoded_postings.append(encode_postings(doc_ids))
+        entity_offsets = np.zeros(len(entities) + 1, dtype=np.int64)
+        np.cumsum([len(entity) for entity in encoded_entities], out=entity_offsets[1:])
+        postings_offsets = np.zeros(len(entities) + 1, dtype=np.int64)
+        np.cumsum([len(postings) for postings in encoded_postings], out=postings_offsets[1:])
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(np.array([len(entities), self.n_documents], dtype=np.int64).tobytes())
+            f.write(entity_offsets.tobytes())
+            f.write(postings_offsets.tobytes())
+            f.write(frequencies.tobytes())
+            f.write(b"".join(encoded_entities))
+            f.write(b"".join(encoded_postings))
+
+
+class EntityIndex:
+    """Memory-mapped inverted index saved by `EntityIndexBuilder.save`, see `load`."""
+
+    def __init__(self, data: np.ndarray):
+        if bytes(data[: len(_MAGIC)]) != _MAGIC:
+            raise ValueError("not an entity index file")
+        size, self.n_documents = (int(x) for x in data[len(_MAGIC) : _HEADER_SIZE].view(np.int64))
+        postings_offsets_start = _HEADER_SIZE + 8 * (size + 1)
+        frequencies_start = postings_offsets_start + 8 * (size + 1)
+        entities_start = frequencies_start + 8 * size
+        entity_offsets = data[_HEADER_SIZE:postings_offsets_start].view(np.int64)
+        postings_start = entities_start + int(entity_offsets[-1])
+        self._entities = MappedStrings(entity_offsets, data[entities_start:postings_start])
+        self._postings_offsets = data[postings_offsets_start:frequencies_start].view(np.int64)
+        self._frequencies = data[frequencies_start:entities_start].view(np.int64)
+        self._postings = data[postings_start:]
+
+    @classmethod
+    def load(cls, path: str) -> "EntityIndex":
+        return cls(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    def __len__(self):
+        return len(self._entities)
+
+    def __contains__(self, entity: str):
+        return self._find(entity) is not None
+
+    @property
+    def entities(self) -> MappedStrings:
+        """The indexed entities, sorted."""
+        return self._entities
+
+    def _find(self, entity: str) -> Optional[int]:
+        i = bisect.bisect_left(self._entities, entity)  # type: ignore
+        return i if i < len(self._entities) and self._entities[i] == entity else None
+
+    def document_frequency(self, entity: str) -> int:
+        """Number of documents using the entity."""
+        i = self._find(entity)
+        return 0 if i is None else int(self._frequencies[i])
+
+    def lookup(self, entity: str) -> np.ndarray:
+        """Sorted ids of the documents using the entity."""
+        i = self._find(entity)
+        if i is None:
+            return np.zeros(0, dtype=np.int64)
+        return decode_postings(self._postings[self._postings_offsets[i] : self._postings_offsets[i + 1]])
+
+    def intersect(self, *entities: str) -> np.ndarray:
+        """Sorted ids of the documents using all the entities."""
+        if not entities:
+            return np.zeros(0, dtype=np.int64)
+        # start from the rarest entity, the intersection only shrinks
+        ordered: List[str] = sorted(entities, key=self.document_frequency)
+        doc_ids = self.lookup(ordered[0])
+        for entity in ordered[1:]:
+            if doc_ids.size == 0:
+                break
+            doc_ids = np.intersect1d(doc_ids, self.lookup(entity), assume_unique=True)
+        return doc_ids
+
+    def union(self, *entities: str) -> np.ndarray:
+        """Sorted ids of the documents using any of the entities."""
+        if not entities:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.lookup(entity) for entity in entities]))
@@ -0,0 +1,155 @@
+"""
+Feature hashing of parsed texts into sparse CSR arrays.
+
+Tokens and n-grams are hashed into a fixed number of columns, so no vocabulary is held in memory and batches can be
+vectorized independently, in several processes. The hash is 64-bit blake2b keyed by the seed, stable across
+processes and Python versions (unlike `hash`, which is salted per process): its low 32 bits give the column and its
+highest bit the sign.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_many
+    from tweet_nlp_toolkit.features.hashing import HashingVectorizer
+
+    vectorizer = HashingVectorizer(n_features=2 ** 20, ngram_range=(1, 2), token_kinds=True)
+    matrix = vectorizer.transform(parse_many(batch, mentions="tag", urls="tag"))
+    matrix.indptr, matrix.indices, matrix.data
+    matrix.to_scipy()  # requires scipy
+
+Requires numpy.
+"""
+from hashlib import blake2b
+from typing import Iterable, List, NamedTuple, Tuple
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("tweet_nlp_toolkit.features requires numpy: pip install tweet_nlp_toolkit[numpy]") from exc
+
+from tweet_nlp_toolkit.features.vocabulary import text_tokens, TokenizedText
+
+# n-grams tokens are joined with a character the tokenizers never keep inside a token
+NGRAM_SEPARATOR = "\x1f"
+KIND_PREFIX = "__kind__="
+
+_COLUMN_BITS = np.uint64(0xFFFFFFFF)
+_SIGN_SHIFT = np.uint64(63)
+
+
+class CsrMatrix(NamedTuple):
+    """Arrays of a sparse matrix in the compressed sparse row format."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    shape: Tuple[int, int]
+
+    def to_scipy(self):
+        """The matrix as a scipy.sparse.csr_matrix."""
+        from scipy.sparse import csr_matrix  # pylint: disable=import-outside-toplevel
+
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def toarray(self) -> np.ndarray:
+        """The matrix as a dense array."""
+        dense = np.zeros(self.shape, dtype=self.data.dtype)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+
+class HashingVectorizer:
+    """
+    Hash the tokens and n-grams of parsed texts into a sparse matrix.
+
+    :param n_features: number of columns of the matrix, at most 2 ** 31
+    :param ngram_range: minimum and maximum size of the n-grams, default unigrams only
+    :param alternate_sign: the sign of each value is given by the hash as well, so that collisions tend to cancel
+        out instead of adding up
+    :param token_kinds: add one feature per token kind (mention, url, emoji, ...), see Token.kind
+    :param seed: seed of the hash function, between 0 and 2 ** 64 - 1. Features colliding with a seed are unlikely to
+        collide with another one.
+    :param dtype: type of the values
+    """
+
+    def __init__(
+        self,
+        n_features: int = 2**20,
+        ngram_range: Tuple[int, int] = (1, 1),
+        alternate_sign: bool = True,
+        token_kinds: bool = False,
+        seed: int = 0,
+        dtype=np.float32,
+    ):
+        if not 0 < n_features <= 1 << 31:
+            raise ValueError("n_features should be between 1 and 2 ** 31")
+        if not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError(f"invalid ngram_range {ngram_range}")
+        if not 0 <= seed < 1 << 64:
+            raise ValueError("seed should be between 0 and 2 ** 64 - 1")
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.alternate_sign = alternate_sign
+        self.token_kinds = token_kinds
+        self.seed = seed
+        self.dtype = dtype
+
+    def features(self, text: TokenizedText) -> List[str]:
+        """The features of a text before hashing: its n-grams, then its token kinds."""
+        tokens = text_tokens(text)
+        values = [token.value for token in tokens]
+        features = []
+        min_n, max_n = self.ngram_range
+        for n in range(min_n, min(max_n, len(values)) + 1):
+            if n == 1:
+                features.extend(values)
+            else:
+                features.extend(NGRAM_SEPARATOR.join(values[i : i + n]) for i in range(len(values) - n + 1))
+        if self.token_kinds:
+            features.extend(KIND_PREFIX + token.kind for token in tokens)
+        return features
+
+    def transform(self, texts: Iterable[TokenizedText]) -> CsrMatrix:
+        """
+        Vectorize a batch of texts.
+
+        :param texts: parsed texts or sequences of tokens
+        :return: a CsrMatrix with one row per text. Values are the (signed) counts of the features, duplicates are
+            summed and the column indices of each row are sorted.
+        """
+        # the keyed state is copied for each feature rather than keyed again
+        keyed = blake2b(digest_size=8, key=self.seed.to_bytes(8, "little"))
+        digests: List[bytes] = []
+        row_sizes: List[int] = []
+        for text in texts:
+            features = self.features(text)
+            for feature in features:
+                hasher = keyed.copy()
+                hasher.update(feature.encode("utf-8", "surrogatepass"))
+                digests.append(hasher.digest())
+            row_sizes.append(len(features))
+        n_rows = len(row_sizes)
+
+        hashed = np.frombuffer(b"".join(digests), dtype="<u8").astype(np.uint64)
+        # the low 32 bits give the column, the sign bit isn't among them whatever n_features
+        columns = ((hashed & _COLUMN_BITS) % np.uint64(self.n_features)).astype(np.int64)
+        if self.alternate_sign:
+            values = np.where(hashed >> _SIGN_SHIFT, -1, 1).astype(self.dtype)
+        else:
+            values = np.ones(len(hashed), dtype=self.dtype)
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), row_sizes)
+
+        # sum duplicated (row, column) pairs
+        keys = rows * self.n_features + columns
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else keys
+        data = np.add.reduceat(values[order], starts) if len(keys) else values
+        keys = keys[starts]
+        non_zero = data != 0
+        data, keys = data[non_zero], keys[non_zero]
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // self.n_features, minlength=n_rows), out=indptr[1:])
+        indices = (keys % self.n_features).astype(np.int32)
+        return CsrMatrix(indptr=indptr, indices=indices, data=data, shape=(n_rows, self.n_features))
@@ -0,0 +1,306 @@
+"""
+Vocabulary mapping tokens to integer ids.
+
+The ids 0 and 1 are reserved for the padding and unknown tokens, followed by the tags of the preprocessing actions
+(<EMOJI>, <MENTION>, ...), so that they keep the same ids in every vocabulary.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_stream
+    from tweet_nlp_toolkit.features.vocabulary import Vocabulary
+
+    vocabulary = Vocabulary.build(parse_stream(texts, mentions="tag"), min_count=5, max_size=50000)
+    vocabulary.save("vocabulary.bin")
+
+    vocabulary = Vocabulary.load("vocabulary.bin")  # memory-mapped, shared by the processes loading it
+    ids, lengths = vocabulary.encode(parse_many(batch, mentions="tag"), max_length=64)
+
+Requires numpy.
+"""
+from collections import Counter
+from hashlib import blake2b
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("tweet_nlp_toolkit.features requires numpy: pip install tweet_nlp_toolkit[numpy]") from exc
+
+from tweet_nlp_toolkit.constants import PADDING_TOKEN, TAGS, UNKNOWN_TOKEN
+from tweet_nlp_toolkit.prep.text_parser import ParsedText
+from tweet_nlp_toolkit.prep.token import Token
+
+RESERVED_TOKENS = [PADDING_TOKEN, UNKNOWN_TOKEN] + TAGS
+PADDING_ID = RESERVED_TOKENS.index(PADDING_TOKEN)
+UNKNOWN_ID = RESERVED_TOKENS.index(UNKNOWN_TOKEN)
+
+# File layout: magic, number of tokens, offsets of the tokens in the blob, counts, sorted hashes of the tokens (see
+# string_hashes), ids of the tokens in the order of their hashes, utf-8 blob of the tokens
+_MAGIC = b"TNTVOCAB"
+_HEADER_SIZE = len(_MAGIC) + 8
+
+TokenizedText = Union[ParsedText, Iterable[Union[Token, str]]]
+
+
+def token_values(text: TokenizedText) -> List[str]:
+    """Token values of a parsed text or of a sequence of tokens."""
+    if isinstance(text, ParsedText):
+        return [token.value for token in text.tokens]
+    return [str(token) for token in text]
+
+
+def text_tokens(text: TokenizedText) -> List[Token]:
+    """Tokens of a parsed text or of a sequence of tokens, strings are converted to tokens."""
+    if isinstance(text, ParsedText):
+        return text.tokens
+    return [token if isinstance(token, Token) else Token(token) for token in text]
+
+
+class MappedStrings(Sequence[str]):
+    """Strings decoded lazily from a memory-mapped utf-8 blob."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("index out of range")
+        return self.bytes_at(index).decode("utf-8")
+
+    def bytes_at(self, index: int) -> bytes:
+        """The utf-8 bytes of a string."""
+        return bytes(self._blob[self._offsets[index] : self._offsets[index + 1]])
+
+    def equal(self, indices: np.ndarray, encoded: List[bytes]) -> np.ndarray:
+        """Whether each string of the given indices is the corresponding utf-8 string, for a batch of strings."""
+        starts = self._offsets[indices]
+        lengths = self._offsets[indices + 1] - starts
+        expected_lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        same_length = lengths == expected_lengths
+        starts, lengths = starts[same_length], lengths[same_length]
+        # the bytes of the strings of the same length, one after the other, compared at once with the expected ones
+        ends = np.cumsum(lengths)
+        positions = np.arange(int(lengths.sum())) + np.repeat(starts - (ends - lengths), lengths)
+        expected = np.frombuffer(b"".join(value for value, same in zip(encoded, same_length) if same), dtype=np.uint8)
+        # a sentinel so that strings of length 0 at the end are valid reduceat indices
+        same_bytes = np.append(self._blob[positions] == expected, True)
+        same_length[same_length] = (lengths == 0) | np.logical_and.reduceat(same_bytes, ends - lengths)
+        return same_length
+
+
+def string_hashes(encoded: Iterable[bytes]) -> np.ndarray:
+    """64-bit hashes of utf-8 strings, stable across processes and runs."""
+    return np.frombuffer(b"".join(blake2b(value, digest_size=8).digest() for value in encoded), dtype="<u8")
+
+
+class MappedIndex(Mapping[str, int]):
+    """
+    String -> index of memory-mapped strings. Strings are looked up by their hash in a sorted table of the hashes of
+    the strings, a batch at once, and the hits are checked against the strings: nothing is built in memory so that the
+    mapping stays shared between processes.
+
+    :param strings: the strings
+    :param hashes: the sorted hashes of the strings, see string_hashes
+    :param indices: the index of the string of each hash
+    """
+
+    def __init__(self, strings: MappedStrings, hashes: np.ndarray, indices: np.ndarray):
+        self._strings = strings
+        self._hashes = hashes
+        self._indices = indices
+
+    def _find_colliding(self, value: bytes, hash_value: int, position: int) -> int:
+        """The index of an encoded string from a position of its hash in the table, -1 if it's missing."""
+        # hashes may collide, the strings of the same hash are next to each other
+        while position < len(self._hashes) and self._hashes[position] == hash_value:
+            index = int(self._indices[position])
+            if self._strings.bytes_at(index) == value:
+                return index
+            position += 1
+        return -1
+
+    def lookup(self, strings: Sequence[str], default: int = -1) -> np.ndarray:
+        """
+        Look a batch of strings up.
+
+        :param strings: the strings
+        :param default: the index of the missing strings
+        :return: an int64 array of the index of each string
+        """
+        distinct = list(dict.fromkeys(strings))
+        found = dict.fromkeys(distinct, default)
+        if distinct and self._hashes.size:
+            encoded = [string.encode("utf-8", "surrogatepass") for string in distinct]
+            hashes = string_hashes(encoded)
+            positions = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+            hits = np.flatnonzero(self._hashes[positions] == hashes)
+            indices = self._indices[positions[hits]]
+            equal = self._strings.equal(indices, [encoded[i] for i in hits.tolist()])
+            for i, index in zip(hits[equal].tolist(), indices[equal].tolist()):
+                found[distinct[i]] = index
+            # the same hash as another string, or a missing string colliding with one of the strings
+            for i in hits[~equal].tolist():
+                index = self._find_colliding(encoded[i], hashes[i], int(positions[i]) + 1)
+                if index >= 0:
+                    found[distinct[i]] = index
+        return np.fromiter((found[string] for string in strings), dtype=np.int64, count=len(strings))
+
+    def __getitem__(self, string: str) -> int:
+        index = int(self.lookup([string])[0])
+        if index < 0:
+            raise KeyError(string)
+        return index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._strings)
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class Vocabulary:
+    """
+    Vocabulary mapping tokens to integer ids.
+
+    :param tokens: the tokens, ordered by id. They should start with RESERVED_TOKENS.
+    :param counts: the number of occurrences of each token, default 0
+    """
+
+    def __init__(self, tokens: Sequence[str], counts: Optional[Union[Sequence[int], np.ndarray]] = None):
+        if list(tokens[: len(RESERVED_TOKENS)]) != RESERVED_TOKENS:
+            raise ValueError(f"the vocabulary should start with the reserved tokens {RESERVED_TOKENS}")
+        self._tokens = tokens
+        self._counts = np.zeros(len(tokens), dtype=np.int64) if counts is None else np.asarray(counts, np.int64)
+        self._index: Optional[Mapping[str, int]] = None
+        self._mapped_index: Optional[MappedIndex] = None
+
+    @classmethod
+    def build(cls, texts: Iterable[TokenizedText], min_count: int = 1, max_size: Optional[int] = None) -> "Vocabulary":
+        """
+        Build a vocabulary from a stream of texts, e.g. the output of parse_stream.
+
+        :param texts: parsed texts or sequences of tokens
+        :param min_count: minimum number of occurrences of a token to be kept
+        :param max_size: maximum number of tokens, including the reserved tokens. The most frequent are kept.
+        :return: a Vocabulary instance
+        """
+        if max_size is not None and max_size < len(RESERVED_TOKENS):
+            raise ValueError(f"max_size should be at least {len(RESERVED_TOKENS)}")
+        counter: Counter = Counter()
+        for text in texts:
+            counter.update(token_values(text))
+        reserved_counts = [counter.pop(token, 0) for token in RESERVED_TOKENS]
+        # most frequent first, ties broken alphabetically to be deterministic
+        kept = sorted(
+            ((token, count) for token, count in counter.items() if count >= min_count), key=lambda x: (-x[1], x[0])
+        )
+        if max_size is not None:
+            kept = kept[: max_size - len(RESERVED_TOKENS)]
+        return cls(
+            tokens=RESERVED_TOKENS + [token for token, _ in kept],
+            counts=reserved_counts + [count for _, count in kept],
+        )
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def __contains__(self, token: str):
+        return token in self.index
+
+    def __getitem__(self, token: str) -> int:
+        return self.index.get(token, UNKNOWN_ID)
+
+    @property
+    def index(self) -> Mapping[str, int]:
+        """
+        Token -> id, built on first use. The tokens of a loaded vocabulary are looked up in the memory-mapped file
+        instead, see MappedIndex, so that it stays shared between processes.
+        """
+        if self._index is None:
+            if self._mapped_index is not None:
+                self._index = self._mapped_index
+            else:
+                self._index = {token: i for i, token in enumerate(self._tokens)}
+        return self._index
+
+    @property
+    def tokens(self) -> Sequence[str]:
+        return self._tokens
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts
+
+    def encode(self, texts: Iterable[TokenizedText], max_length: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode a batch of texts into padded ids.
+
+        :param texts: parsed texts or sequences of tokens
+        :param max_length: the texts are truncated to max_length tokens, default the length of the longest text
+        :return: the ids, an int32 array of shape (number of texts, length) padded with PADDING_ID, and the lengths,
+            an int32 array of shape (number of texts,)
+        """
+        values = [token_values(text)[:max_length] for text in texts]
+        lengths = np.fromiter((len(text_values) for text_values in values), dtype=np.int32, count=len(values))
+        length = max_length if max_length is not None else int(lengths.max(initial=0))
+        flat_values = [value for text_values in values for value in text_values]
+        index = self.index
+        if isinstance(index, MappedIndex):
+            flat_ids = index.lookup(flat_values, default=UNKNOWN_ID)
+        else:
+            flat_ids = np.fromiter(
+                (index.get(value, UNKNOWN_ID) for value in flat_values), dtype=np.int32, count=len(flat_values)
+            )
+        ids = np.full((len(values), length), PADDING_ID, dtype=np.int32)
+        ids[np.arange(length) < lengths[:, None]] = flat_ids
+        return ids, lengths
+
+    def decode(self, ids: np.ndarray, lengths: Optional[np.ndarray] = None) -> List[List[str]]:
+        """Decode padded ids back into tokens, the padding is removed."""
+        if lengths is None:
+            lengths = (ids != PADDING_ID).sum(axis=1)
+        return [[self._tokens[i] for i in row[:length]] for row, length in zip(ids.tolist(), lengths.tolist())]
+
+    def save(self, path: str):
+        """Save the vocabulary in a file that can be memory-mapped by `load`."""
+        encoded = [token.encode("utf-8") for token in self._tokens]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(token) for token in encoded], out=offsets[1:])
+        hashes = string_hashes(encoded).astype(np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(np.array([len(encoded)], dtype=np.int64).tobytes())
+            f.write(offsets.tobytes())
+            f.write(self._counts.astype(np.int64).tobytes())
+            f.write(hashes[order].tobytes())
+            f.write(order.astype(np.int64).tobytes())
+            f.write(b"".join(encoded))
+
+    @classmethod
+    def load(cls, path: str) -> "Vocabulary":
+        """Load a vocabulary saved by `save`, its arrays are memory-mapped and shared between processes."""
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(data[: len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{path} is not a vocabulary file")
+        size = int(data[len(_MAGIC) : _HEADER_SIZE].view(np.int64)[0])
+        counts_start = _HEADER_SIZE + 8 * (size + 1)
+        hashes_start = counts_start + 8 * size
+        order_start = hashes_start + 8 * size
+        blob_start = order_start + 8 * size
+        offsets = data[_HEADER_SIZE:counts_start].view(np.int64)
+        counts = data[counts_start:hashes_start].view(np.int64)
+        tokens = MappedStrings(offsets, data[blob_start:])
+        vocabulary = cls(tokens=tokens, counts=counts)
+        vocabulary._mapped_index = MappedIndex(
+            tokens, data[hashes_start:order_start].view(np.uint64), data[order_start:blob_start].view(np.int64)
+        )
+        return vocabulary
@@ -0,0 +1,183 @@
+"""
+Asyncio API for the text parser.
+
+Parsing is CPU bound (and the first jieba/MeCab segmentation loads a dictionary), so calling `parse_text` inside a
+coroutine blocks the event loop. The functions below run the batch parser in an executor instead: concurrent
+`aparse_text` calls sharing the same options are coalesced into micro-batches, the number of batches in flight is
+bounded and callers wait once too many texts are pending.
+
+Usage Example:
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    from tweet_nlp_toolkit.prep.async_parser import AsyncParser, aparse_text
+
+    parsed_text = await aparse_text("123 @hello #world", mentions="tag")
+
+    parser = AsyncParser(executor=ProcessPoolExecutor(4), max_concurrency=4)
+    parsed_texts = await parser.parse_many(texts, urls="remove")
+"""
+import asyncio
+import functools
+import weakref
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from tweet_nlp_toolkit.prep.text_parser import ParsedText, parse_many
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable equivalent of an option value, e.g. filters given as a list or a set."""
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_freeze, value))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(map(_freeze, value))
+    if isinstance(value, dict):
+        return tuple(sorted((name, _freeze(item)) for name, item in value.items()))
+    return value
+
+
+def _options_key(options: Dict[str, Any]) -> Tuple:
+    """Hashable key of parse_text options, texts are only coalesced with texts sharing the same options."""
+    return tuple(sorted((name, _freeze(value)) for name, value in options.items()))
+
+
+class AsyncParser:
+    """
+    Run the batch parser in an executor without blocking the event loop.
+
+    :param executor: the executor running the batches, e.g. a ThreadPoolExecutor or a ProcessPoolExecutor.
+        Default None, the default executor of the event loop.
+    :param max_concurrency: maximum number of batches submitted to the executor at the same time.
+    :param max_batch_size: maximum number of texts in a batch.
+    :param max_delay: maximum time in seconds a text waits for other texts to be coalesced with.
+    :param max_pending: maximum number of texts waiting to be parsed, `parse_text` waits above this limit.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 4,
+        max_batch_size: int = 128,
+        max_delay: float = 0.002,
+        max_pending: int = 10000,
+    ):
+        if max_concurrency < 1 or max_batch_size < 1 or max_pending < 1:
+            raise ValueError("max_concurrency, max_batch_size and max_pending should be positive")
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._max_pending = max_pending
+        # created lazily, asyncio primitives are bound to the event loop running the first call
+        self._concurrency: Optional[asyncio.Semaphore] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._batches: Dict[Tuple, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple, asyncio.Handle] = {}
+        self._options: Dict[Tuple, Dict[str, Any]] = {}
+        # references to the running batches, the event loop only keeps weak references to its tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _init_primitives(self):
+        if self._concurrency is None:
+            self._concurrency = asyncio.Semaphore(self._max_concurrency)
+            self._pending = asyncio.Semaphore(self._max_pending)
+
+    async def _run_batch(self, texts: List[str], options: Dict[str, Any]) -> List[ParsedText]:
+        self._init_primitives()
+        loop = asyncio.get_running_loop()
+        async with self._concurrency:  # type: ignore
+            return await loop.run_in_executor(self._executor, functools.partial(parse_many, texts, **options))
+
+    async def _flush_batch(self, batch: List[Tuple[str, asyncio.Future]], options: Dict[str, Any]):
+        """Parse a batch of coalesced texts and resolve the future of each text, with the exception on failure."""
+        try:
+            results = await self._run_batch([text for text, _ in batch], options)
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _flush(self, key: Tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(key, None)
+        options = self._options.pop(key, None)
+        if batch and options is not None:
+            task = asyncio.get_running_loop().create_task(self._flush_batch(batch, options))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def parse_text(self, text: str, **kwargs) -> ParsedText:
+        """
+        Preprocess the text in the executor, coalescing it with concurrent calls sharing the same options.
+
+        :param text: the text to preprocess
+        :param kwargs: arguments for the parse_text function
+        :return: a ParsedText instance
+        """
+        self._init_primitives()
+        loop = asyncio.get_running_loop()
+        async with self._pending:  # type: ignore
+            key = _options_key(kwargs)
+            future = loop.create_future()
+            batch = self._batches.setdefault(key, [])
+            self._options[key] = kwargs
+            batch.append((text, future))
+            if len(batch) >= self._max_batch_size:
+                self._flush(key)
+            elif key not in self._timers:
+                self._timers[key] = loop.call_later(self._max_delay, self._flush, key)
+            return await future
+
+    async def parse_many(self, texts: Iterable[str], **kwargs) -> List[ParsedText]:
+        """
+        Preprocess the texts in the executor, split into batches of at most `max_batch_size` texts.
+
+        :param texts: the texts to preprocess
+        :param kwargs: arguments for the parse_text function
+        :return: a list of ParsedText instances, in the same order as the texts
+        """
+        texts = list(texts)
+        batches = [texts[i : i + self._max_batch_size] for i in range(0, len(texts), self._max_batch_size)]
+        results = await asyncio.gather(*[self._run_batch(batch, kwargs) for batch in batches])
+        return [parsed_text for batch_result in results for parsed_text in batch_result]
+
+
+_DEFAULT_PARSERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncParser]" = weakref.WeakKeyDictionary()
+
+
+def _get_default_parser() -> AsyncParser:
+    loop = asyncio.get_running_loop()
+    if loop not in _DEFAULT_PARSERS:
+        _DEFAULT_PARSERS[loop] = AsyncParser()
+    return _DEFAULT_PARSERS[loop]
+
+
+async def aparse_text(text: str, parser: Optional[AsyncParser] = None, **kwargs) -> ParsedText:
+    """
+    Asynchronous counterpart of parse_text.
+
+    :param text: the text to preprocess
+    :param parser: the AsyncParser to use. Default None, a parser using the default executor of the event loop.
+    :param kwargs: arguments for the parse_text function
+    :return: a ParsedText instance
+    """
+    return await (parser or _get_default_parser()).parse_text(text, **kwargs)
+
+
+async def aparse_many(texts: Iterable[str], parser: Optional[AsyncParser] = None, **kwargs) -> List[ParsedText]:
+    """
+    Asynchronous counterpart of parse_many.
+
+    :param texts: the texts to preprocess
+    :param parser: the AsyncParser to use. Default None, a parser using the default executor of the event loop.
+    :param kwargs: arguments for the parse_text function
+    :return: a list of ParsedText instances, in the same order as the texts
+    """
+    return await (parser or _get_default_parser()).parse_many(texts, **kwargs)
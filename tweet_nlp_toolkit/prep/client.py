@@ -0,0 +1,156 @@
+"""
+Client of the preprocessing server, see `tweet_nlp_toolkit.prep.server`.
+
+Connections are pooled: a request takes an idle connection or opens a new one, and gives it back once the response is
+read, so a client is shared by the threads of a service. Idle connections may have been closed by the server, e.g. when
+it restarts: a request failing on an idle connection before any byte of its response is read is sent once more on a
+new connection.
+
+Usage Example:
+
+    from tweet_nlp_toolkit.prep.client import PrepClient
+
+    with PrepClient(path="/tmp/tweet-nlp.sock", pool_size=8) as client:
+        client.prep("123 @hello #world", mentions="tag")
+        parsed_texts = client.parse_many(texts, urls="remove")
+"""
+import queue
+import socket
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from tweet_nlp_toolkit.prep.server import DEFAULT_HOST, DEFAULT_PORT, decode_response, encode_request, frame
+from tweet_nlp_toolkit.prep.text_parser import ParsedText
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = connection.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("the preprocessing server closed the connection")
+        received += count
+    return bytes(buffer)
+
+
+class PrepClient:
+    """
+    Thread-safe client of a preprocessing server.
+
+    :param path: the Unix socket of the server, default None to connect to a TCP port
+    :param host: the host of the TCP server
+    :param port: the port of the TCP server
+    :param pool_size: maximum number of idle connections kept open
+    :param timeout: timeout in seconds of the socket operations, default None for no timeout
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        pool_size: int = 4,
+        timeout: Optional[float] = None,
+    ):
+        if pool_size < 1:
+            raise ValueError("pool_size should be positive")
+        self.path = path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _connect(self) -> socket.socket:
+        if self.path is not None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            connection.connect(self.path)
+        else:
+            connection = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection
+
+    def _acquire(self) -> Tuple[socket.socket, bool]:
+        """An idle connection or a new one, and whether it was idle."""
+        if self._closed:
+            raise ValueError("the client is closed")
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, connection: socket.socket):
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._idle.put_nowait(connection)
+                    return
+                except queue.Full:
+                    pass
+        connection.close()
+
+    def _request(self, payload: bytes) -> bytes:
+        """Send a request on an idle connection and wait for its response, the connection is reused afterwards."""
+        connection, idle = self._acquire()
+        return self._exchange(connection, payload, retry=idle)
+
+    def _exchange(self, connection: socket.socket, payload: bytes, retry: bool) -> bytes:
+        """
+        Send a request on a connection and wait for its response.
+
+        :param retry: whether to send the request once more on a new connection if the connection fails before any
+            byte of the response is read, e.g. an idle connection closed by a server that restarted
+        """
+        answered = False
+        try:
+            connection.sendall(frame(payload))
+            header = connection.recv(4)
+            if not header:
+                raise ConnectionError("the preprocessing server closed the connection")
+            answered = True
+            size = int.from_bytes(header + _receive_exactly(connection, 4 - len(header)), "little")
+            response = _receive_exactly(connection, size)
+        except ConnectionError:
+            connection.close()
+            if retry and not answered:
+                return self._exchange(self._connect(), payload, retry=False)
+            raise
+        except BaseException:
+            # the state of the connection is unknown, e.g. a response may be half read
+            connection.close()
+            raise
+        self._release(connection)
+        return response
+
+    def parse_many(self, texts: Sequence[str], **kwargs) -> List[ParsedText]:
+        """
+        Preprocess texts on the server.
+
+        :param texts: the texts to preprocess
+        :param kwargs: arguments for the parse_text function, the tokenizer should be one of TOKENIZERS
+        :return: a list of ParsedText instances, in the same order as the texts
+        """
+        return decode_response(self._request(encode_request(list(texts), kwargs)))
+
+    def parse_text(self, text: str, **kwargs) -> ParsedText:
+        return self.parse_many([text], **kwargs)[0]
+
+    def prep(self, text: str, **kwargs) -> str:
+        return self.parse_text(text, **kwargs).value
+
+    def close(self):
+        """Close the idle connections, connections in use are closed once released."""
+        with self._lock:
+            self._closed = True
+            while not self._idle.empty():
+                self._idle.get_nowait().close()
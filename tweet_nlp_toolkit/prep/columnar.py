@@ -0,0 +1,198 @@
+"""
+Columnar output of parsed texts, as Parquet or Arrow IPC files.
+
+Parsed texts are buffered column by column and written one row group (Parquet) or record batch (Arrow) at a time,
+so the memory used while writing is bounded by `row_group_size`. Columns:
+
+- `text`: the preprocessed text
+- `tokens`: the tokens, list<string>
+- `hashtags`, `mentions`, `urls`: the entities of the text in order, list<string>, see `entity_kinds`
+- `offsets`: optional, the character offset of each token in `text`, list<int32> (-1 for tokens not found in `text`)
+- `line`: optional, the line number of the text in the input file, int64
+
+Arrow files are memory-mapped and read back without copy by `read_table`, Parquet files are read by any Parquet
+reader, e.g. `pyarrow.parquet.read_table` or `pandas.read_parquet`.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_stream
+    from tweet_nlp_toolkit.prep.columnar import ParsedTextTableWriter
+
+    with ParsedTextTableWriter("tweets.parquet", offsets=True) as writer:
+        writer.write_many(parse_stream(texts, workers=8, mentions="tag"))
+
+`prep_file(..., output_format="parquet")` writes the same columns with the line numbers of the input file.
+
+Requires pyarrow.
+"""
+from typing import Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("columnar output requires pyarrow: pip install tweet_nlp_toolkit[arrow]") from exc
+
+from tweet_nlp_toolkit.prep.file_io import COLUMNAR_FORMATS, PARQUET_FORMAT
+from tweet_nlp_toolkit.prep.text_parser import ParsedText
+from tweet_nlp_toolkit.prep.token import ENTITY_KINDS
+
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+_PARQUET_MAGIC = b"PAR1"
+
+
+def _token_offsets(text: str, values: List[str]) -> List[int]:
+    """Character offset of each token in the text, tokens are looked for in order."""
+    offsets = []
+    position = 0
+    for value in values:
+        offset = text.find(value, position)
+        offsets.append(offset)
+        if offset >= 0:
+            position = offset + len(value)
+    return offsets
+
+
+class _ListColumn:
+    """Values of a list<...> column, flattened, with the offset of each row."""
+
+    def __init__(self, value_type: pa.DataType):
+        self.value_type = value_type
+        self.values: list = []
+        self.offsets: List[int] = [0]
+
+    def append(self, values: list):
+        self.values.extend(values)
+        self.offsets.append(len(self.values))
+
+    def to_array(self) -> pa.ListArray:
+        return pa.ListArray.from_arrays(
+            pa.array(self.offsets, type=pa.int32()),
+            pa.array(self.values, type=self.value_type),
+        )
+
+
+class ParsedTextTableWriter:
+    """
+    Write parsed texts into a Parquet or Arrow IPC file.
+
+    :param path: the output file
+    :param file_format: "parquet" or "arrow"
+    :param entity_kinds: the kinds of tokens with their own column, named after the kind, e.g. "hashtags", see
+        TOKEN_KINDS. Default hashtags, mentions and URLs.
+    :param offsets: whether to write the offsets of the tokens in the preprocessed text
+    :param line_numbers: whether to write the line number of each text, given to `write`
+    :param row_group_size: the number of parsed texts buffered before being written as a row group
+    :param compression: the compression codec of pyarrow, e.g. "zstd", default pyarrow's default for Parquet and
+        no compression for Arrow
+    """
+
+    def __init__(
+        self,
+        path: str,
+        file_format: str = PARQUET_FORMAT,
+        entity_kinds: Optional[Iterable[str]] = None,
+        offsets: bool = False,
+        line_numbers: bool = False,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: Optional[str] = None,
+    ):
+        if file_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"unknown columnar format '{file_format}', expected one of {COLUMNAR_FORMATS}")
+        if row_group_size < 1:
+            raise ValueError("row_group_size should be positive")
+        self.entity_kinds = list(ENTITY_KINDS if entity_kinds is None else entity_kinds)
+        self.row_group_size = row_group_size
+        self._offsets = offsets
+        self._line_numbers = line_numbers
+        fields = [
+            pa.field("text", pa.string()),
+            pa.field("tokens", pa.list_(pa.string())),
+        ]
+        fields.extend(pa.field(f"{kind}s", pa.list_(pa.string())) for kind in self.entity_kinds)
+        if offsets:
+            fields.append(pa.field("offsets", pa.list_(pa.int32())))
+        if line_numbers:
+            fields.append(pa.field("line", pa.int64()))
+        self.schema = pa.schema(fields)
+        if file_format == PARQUET_FORMAT:
+            options = {} if compression is None else {"compression": compression}
+            self._writer = pq.ParquetWriter(path, self.schema, **options)
+        else:
+            options = {} if compression is None else {"options": pa.ipc.IpcWriteOptions(compression=compression)}
+            self._writer = pa.ipc.new_file(path, self.schema, **options)
+        self._count = 0
+        self._closed = False
+        self._reset()
+
+    def _reset(self):
+        self._texts: List[str] = []
+        self._tokens = _ListColumn(pa.string())
+        self._entities = {kind: _ListColumn(pa.string()) for kind in self.entity_kinds}
+        self._token_offsets = _ListColumn(pa.int32())
+        self._lines: List[Optional[int]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def write(self, parsed_text: ParsedText, line: Optional[int] = None):
+        """Buffer a parsed text, the buffered texts are written once there are `row_group_size` of them."""
+        text = parsed_text.value
+        values = [token.value for token in parsed_text]
+        self._texts.append(text)
+        self._tokens.append(values)
+        entities = parsed_text.entities(self.entity_kinds)
+        for kind, column in self._entities.items():
+            column.append(entities[kind])
+        if self._offsets:
+            self._token_offsets.append(_token_offsets(text, values))
+        if self._line_numbers:
+            self._lines.append(line)
+        self._count += 1
+        if len(self._texts) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, parsed_texts: Iterable[ParsedText]):
+        for parsed_text in parsed_texts:
+            self.write(parsed_text)
+
+    def flush(self):
+        """Write the buffered texts as a row group."""
+        if not self._texts:
+            return
+        columns = [pa.array(self._texts, type=pa.string()), self._tokens.to_array()]
+        columns.extend(self._entities[kind].to_array() for kind in self.entity_kinds)
+        if self._offsets:
+            columns.append(self._token_offsets.to_array())
+        if self._line_numbers:
+            columns.append(pa.array(self._lines, type=pa.int64()))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=self.schema))
+        self._reset()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._writer.close()
+        self._closed = True
+
+
+def read_table(path: str) -> pa.Table:
+    """
+    Read a file written by ParsedTextTableWriter. Arrow files are memory-mapped and read without copy.
+
+    :param path: a Parquet or Arrow IPC file
+    :return: a pyarrow Table
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(_PARQUET_MAGIC))
+    if magic == _PARQUET_MAGIC:
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
@@ -0,0 +1,69 @@
+"""
+Emoji lookup table.
+
+Tokens are matched against the emoji in unicode representation (e.g. 😰) and in textual representation
+(e.g. :anxious_face_with_sweat: or the alias :joy:) with a single dict lookup, which also gives their demojized and
+emojized forms without scanning the token with the regular expressions of the emoji package.
+
+Usage Example:
+
+    from tweet_nlp_toolkit.prep.emojis import is_emoji, replace_emojis
+
+    is_emoji("😰") --> True
+    replace_emojis(["cool", "😰"], "demojize") --> ["cool", ":anxious_face_with_sweat:"]
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import emoji
+from emoji import EMOJI_ALIAS_UNICODE_ENGLISH, UNICODE_EMOJI_ENGLISH
+
+from tweet_nlp_toolkit.constants import EMOJI_TAG
+
+# emoji -> (demojized, emojized)
+_EMOJI_TABLE: Optional[Dict[str, Tuple[str, str]]] = None
+
+
+def _get_emoji_table() -> Dict[str, Tuple[str, str]]:
+    """Emoji table, built once on first use."""
+    global _EMOJI_TABLE  # pylint: disable=global-statement
+    if _EMOJI_TABLE is None:
+        table = {alias: (alias, unicode) for alias, unicode in EMOJI_ALIAS_UNICODE_ENGLISH.items()}
+        table.update((unicode, (name, unicode)) for unicode, name in UNICODE_EMOJI_ENGLISH.items())
+        _EMOJI_TABLE = table
+    return _EMOJI_TABLE
+
+
+def is_emoji(value: str) -> bool:
+    """Whether the value is an emoji in unicode or textual representation."""
+    return value in _get_emoji_table()
+
+
+def demojize(value: str) -> str:
+    """Replace an emoji by its textual representation, e.g. 😰 -> :anxious_face_with_sweat:"""
+    entry = _get_emoji_table().get(value)
+    return emoji.demojize(value) if entry is None else entry[0]
+
+
+def emojize(value: str) -> str:
+    """Replace an emoji by its unicode representation, e.g. :joy: -> 😂"""
+    entry = _get_emoji_table().get(value)
+    return emoji.emojize(value, use_aliases=True) if entry is None else entry[1]
+
+
+def replace_emojis(values: Iterable[str], action_name: str) -> List[str]:
+    """
+    Apply an emoji action on a whole batch of tokens at once, the other tokens are kept untouched.
+
+    :param values: the token values
+    :param action_name: "remove", "tag", "demojize" or "emojize"
+    :return: the new token values, removed emojis are replaced by an empty string
+    """
+    table = _get_emoji_table()
+    if action_name in ("demojize", "emojize"):
+        index = 0 if action_name == "demojize" else 1
+        return [table[value][index] if value in table else value for value in values]
+    if action_name == "tag":
+        return [EMOJI_TAG if value in table else value for value in values]
+    if action_name == "remove":
+        return ["" if value in table else value for value in values]
+    raise ValueError(f"unknown action '{action_name}', expected ['remove', 'tag', 'demojize', 'emojize']")
@@ -0,0 +1,386 @@
+"""
+File input/output utils for preprocessing files.
+
+Files can be plain text or JSON lines (e.g. tweet objects), optionally compressed with gzip, bz2, xz or zstd.
+The compression is inferred from the file extension by default. zstd requires the optional `zstandard` package and
+JSON lines are parsed with `orjson` when it's installed.
+"""
+import bz2
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import re
+import shutil
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+TEXT_FORMAT = "text"
+JSONL_FORMAT = "jsonl"
+FILE_FORMATS = [TEXT_FORMAT, JSONL_FORMAT]
+# output only, see tweet_nlp_toolkit.prep.columnar
+ARROW_FORMAT = "arrow"
+PARQUET_FORMAT = "parquet"
+COLUMNAR_FORMATS = [ARROW_FORMAT, PARQUET_FORMAT]
+
+INFER_COMPRESSION = "infer"
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+COMPRESSIONS = list(COMPRESSION_EXTENSIONS.values())
+
+# escape sequences decoded in text lines, e.g. \u2019
+_UNICODE_ESCAPE = re.compile(r"\\u([0-9a-fA-F]{4})")
+
+# size of the blocks written to the output file
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+def infer_compression(filename: str) -> Optional[str]:
+    """Infer the compression from the file extension, None for uncompressed files."""
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def open_binary(filename: str, mode: str = "rb", compression: Optional[str] = INFER_COMPRESSION) -> BinaryIO:
+    """
+    Open a file in binary mode, (de)compressing it on the fly.
+
+    :param filename: the file path
+    :param mode: "rb", "wb" or "ab"
+    :param compression: one of COMPRESSIONS, None for no compression or "infer" to infer it from the file extension
+    :return: a binary file object
+    """
+    if compression == INFER_COMPRESSION:
+        compression = infer_compression(filename)
+    if compression is None:
+        return open(filename, mode)  # type: ignore  # pylint: disable=consider-using-with,unspecified-encoding
+    if compression == "gzip":
+        return gzip.open(filename, mode)  # type: ignore
+    if compression == "bz2":
+        return bz2.open(filename, mode)  # type: ignore
+    if compression == "xz":
+        return lzma.open(filename, mode)  # type: ignore
+    if compression == "zstd":
+        try:
+            import zstandard  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise ImportError("zstd compression requires the zstandard package: pip install zstandard") from exc
+        if "r" in mode:  # read the concatenated frames of segmented files
+            return zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), read_across_frames=True)
+        return zstandard.open(filename, mode)
+    raise ValueError(f"unknown compression '{compression}', expected one of {COMPRESSIONS}")
+
+
+def compressed_reader(fileobj: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """Decompress what is read from an already opened binary file object, e.g. the standard input."""
+    if compression is None:
+        return fileobj
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")  # type: ignore
+    if compression == "bz2":
+        return bz2.BZ2File(fileobj, "rb")  # type: ignore
+    if compression == "xz":
+        return lzma.LZMAFile(fileobj, "rb")  # type: ignore
+    if compression == "zstd":
+        try:
+            import zstandard  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise ImportError("zstd compression requires the zstandard package: pip install zstandard") from exc
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False)
+    raise ValueError(f"unknown compression '{compression}', expected one of {COMPRESSIONS}")
+
+
+def compressed_writer(fileobj: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """
+    Compress what is written to an already opened binary file object.
+    Closing the returned writer ends the compressed stream but leaves the file object open.
+    """
+    if compression is None:
+        return fileobj
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="wb")  # type: ignore
+    if compression == "bz2":
+        return bz2.BZ2File(fileobj, "wb")  # type: ignore
+    if compression == "xz":
+        return lzma.LZMAFile(fileobj, "wb")  # type: ignore
+    if compression == "zstd":
+        try:
+            import zstandard  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise ImportError("zstd compression requires the zstandard package: pip install zstandard") from exc
+        return zstandard.ZstdCompressor().stream_writer(fileobj, closefd=False)
+    raise ValueError(f"unknown compression '{compression}', expected one of {COMPRESSIONS}")
+
+
+def loads_json(line: bytes) -> Any:
+    """Parse a JSON line."""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Serialize to a compact JSON line (without the line break)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def get_field(record: Dict, path: str) -> Optional[Any]:
+    """Get a (nested) field given its dotted path, e.g. "extended_tweet.full_text", None if it's missing."""
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def set_field(record: Dict, path: str, value: Any):
+    """Set a (nested) field given its dotted path, creating the missing parents."""
+    *parents, key = path.split(".")
+    for parent in parents:
+        record = record.setdefault(parent, {})
+    record[key] = value
+
+
+def unescape_unicode(text: str) -> str:
+    """Decode the ASCII escape sequences \\uXXXX of a text, including escaped surrogate pairs (e.g. of emojis)."""
+    if "\\u" not in text:
+        return text
+    text = _UNICODE_ESCAPE.sub(lambda match: chr(int(match.group(1), 16)), text)
+    return text.encode("utf-16-le", "surrogatepass").decode("utf-16-le", "replace")
+
+
+def decode_record(line: bytes, input_format: str, text_field: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Decode a line of an input file.
+
+    Text lines are decoded from UTF-8, then their escape sequences \\uXXXX are decoded (e.g. \\u2019).
+
+    :return: the JSON object (None for text files) and its text (None if there is nothing to preprocess)
+    """
+    if input_format == TEXT_FORMAT:
+        return None, unescape_unicode(line.decode("utf-8", "replace"))
+    if not line.strip():
+        return None, None
+    record = loads_json(line)
+    return record, get_field(record, text_field)
+
+
+def encode_record(
+    record: Optional[Dict], text: Optional[str], line: bytes, output_format: str, text_field: str
+) -> Optional[bytes]:
+    """
+    Encode a preprocessed text into a line of an output file (without the line break).
+
+    :param record: the JSON object decoded from the line, if any
+    :param text: the preprocessed text, None if there was nothing to preprocess
+    :param line: the original line
+    :return: the line to write, None if there is nothing to write
+    """
+    if text is None:  # e.g. deletion notices, written untouched
+        return line.rstrip(b"\r\n") if output_format == JSONL_FORMAT and record is not None else None
+    if output_format == TEXT_FORMAT:
+        return text.encode("utf-8")
+    record = {} if record is None else record
+    set_field(record, text_field, text)
+    return dumps_json(record)
+
+
+class BufferedLineWriter:
+    """
+    Write lines to a binary file in large blocks.
+
+    :param fileobj: the binary file object to write to
+    :param buffer_size: the number of bytes buffered before being written
+    """
+
+    def __init__(self, fileobj: BinaryIO, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self._fileobj = fileobj
+        self._buffer_size = buffer_size
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def write_line(self, line: bytes):
+        self._buffer.append(line)
+        self._buffer.append(b"\n")
+        self._buffered += len(line) + 1
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._fileobj.write(b"".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+
+def iter_lines(fileobj: BinaryIO, buffer_size: int = DEFAULT_BUFFER_SIZE):
+    """Iterate over the lines of a binary file object, read in large blocks."""
+    if not isinstance(fileobj, io.BufferedReader):
+        fileobj = io.BufferedReader(fileobj, buffer_size)  # type: ignore
+    return iter(fileobj.readline, b"")
+
+
+class SegmentedFileWriter(BufferedLineWriter):
+    """
+    Write lines to a file as a sequence of independently compressed segments.
+
+    `commit` ends the current segment and makes it durable, the returned offset can be passed back to resume writing
+    after a crash: whatever was written after it is truncated. The concatenation of compressed segments is a valid
+    gzip, bz2, xz or zstd file.
+
+    :param filename: the output file
+    :param compression: one of COMPRESSIONS, None for no compression or "infer" to infer it from the file extension
+    :param buffer_size: the number of bytes buffered before being written
+    :param offset: the committed offset to resume writing from, 0 to overwrite the file
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        compression: Optional[str] = INFER_COMPRESSION,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        offset: int = 0,
+    ):
+        if compression == INFER_COMPRESSION:
+            compression = infer_compression(filename)
+        self._compression = compression
+        self._raw: BinaryIO
+        if offset:
+            self._raw = open(filename, "r+b")  # pylint: disable=consider-using-with
+            self._raw.truncate(offset)
+            self._raw.seek(offset)
+        else:
+            self._raw = open(filename, "wb")  # pylint: disable=consider-using-with
+        self._segment: Optional[BinaryIO] = None
+        super().__init__(self._raw, buffer_size)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def flush(self):
+        if self._buffer and self._segment is None:
+            self._segment = compressed_writer(self._raw, self._compression)
+            self._fileobj = self._segment
+        super().flush()
+
+    def _end_segment(self):
+        self.flush()
+        if self._segment is not None and self._segment is not self._raw:
+            self._segment.close()
+        self._segment = None
+
+    def commit(self) -> int:
+        """End the current segment, sync it to disk and return the committed offset."""
+        self._end_segment()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        return self._raw.tell()
+
+    def close(self):
+        self._end_segment()
+        self._raw.close()
+
+
+class Checkpoint(NamedTuple):
+    """Progress of a file preprocessing, offsets are in bytes of the uncompressed input and compressed output."""
+
+    input_offset: int = 0
+    output_offset: int = 0
+    lines: int = 0
+
+
+def checkpoint_path(outfile: str) -> str:
+    return f"{outfile}.checkpoint"
+
+
+def read_checkpoint(outfile: str) -> Optional[Checkpoint]:
+    """Read the last committed checkpoint of an output file, None if there is none."""
+    try:
+        with open(checkpoint_path(outfile), "r", encoding="utf-8") as f:
+            return Checkpoint(**json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(outfile: str, checkpoint: Checkpoint):
+    """Write the checkpoint of an output file atomically."""
+    path = checkpoint_path(outfile)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint._asdict(), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def remove_checkpoint(outfile: str):
+    try:
+        os.remove(checkpoint_path(outfile))
+    except FileNotFoundError:
+        pass
+
+
+def shard_ranges(filename: str, n_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split an uncompressed file into at most `n_shards` byte ranges of similar size, aligned on line breaks.
+
+    :return: a list of (start, end) byte offsets, end excluded
+    """
+    if n_shards < 1:
+        raise ValueError("n_shards should be positive")
+    size = os.path.getsize(filename)
+    if size == 0:
+        return [(0, 0)]
+    ranges = []
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        for i in range(1, n_shards + 1):
+            if start >= size:
+                break
+            end = size if i == n_shards else mm.find(b"\n", max(start, size * i // n_shards - 1)) + 1
+            if end <= 0:  # no line break after the approximate boundary
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def iter_mmap_lines(filename: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Iterate over the lines of an uncompressed file within a byte range, reading it through mmap."""
+    if os.path.getsize(filename) == 0:
+        return
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = len(mm) if end is None else end
+        pos = start
+        while pos < end:
+            line_end = mm.find(b"\n", pos, end)
+            line_end = end if line_end < 0 else line_end + 1
+            yield mm[pos:line_end]
+            pos = line_end
+
+
+def concatenate_files(filenames: List[str], outfile: str, remove: bool = True):
+    """Concatenate files byte by byte, e.g. compressed shards, into one file."""
+    with open(outfile, "wb") as out_f:
+        for filename in filenames:
+            with open(filename, "rb") as in_f:
+                shutil.copyfileobj(in_f, out_f, DEFAULT_BUFFER_SIZE)
+            if remove:
+                os.remove(filename)
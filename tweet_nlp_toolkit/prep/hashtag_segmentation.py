@@ -0,0 +1,203 @@
+"""
+English hashtag segmentation, e.g. #MakeAmericaGreat -> make america great.
+
+Hashtags are split on digits and on their camel case (`regexes.CAMEL_SPLIT`). Runs of letters without camel case, e.g.
+of lowercased texts, are segmented by Viterbi: the most probable sequence of words under a unigram model of a word
+frequency table, unknown words being penalized by their length. The table is a compact file of sorted words and counts
+which is memory-mapped and searched in place, the default one is packaged (`resources/en_word_frequencies.bin`) and
+another is built from word counts by `build_word_table`. Segmentations are cached, as a few trending hashtags account
+for most of the occurrences.
+
+Usage Example:
+
+    from tweet_nlp_toolkit.prep.hashtag_segmentation import segment_hashtag
+
+    segment_hashtag("#MakeAmericaGreat") --> 'make america great'
+    segment_hashtag("#makeamericagreat2020") --> 'make america great 2020'
+"""
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from tweet_nlp_toolkit.prep.regexes import CAMEL_SPLIT
+
+DEFAULT_WORD_TABLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources", "en_word_frequencies.bin")
+DEFAULT_CACHE_SIZE = 100000
+
+# File layout: header, offsets of the words in the blob (little-endian uint32, the last one is the end of the blob),
+# counts of the words (little-endian uint32), utf-8 blob of the lowercase words sorted by their bytes
+_MAGIC = b"TNTWFREQ"
+_HEADER = struct.Struct("<8sIIq")  # magic, number of words, length of the longest word, sum of the counts
+
+_CAMEL_SPLIT = re.compile(CAMEL_SPLIT)
+# runs of letters and runs of digits, other characters (e.g. "_") separate words
+_PARTS = re.compile(r"[^\W\d_]+|\d+")
+
+
+def _uint32_array(values: Iterable[int]) -> bytes:
+    values = array("I", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def build_word_table(counts: Union[Dict[str, int], Iterable[Tuple[str, int]]], path: str) -> int:
+    """
+    Write a word frequency table, see WordFrequencyTable.
+
+    :param counts: the count of each word, words are lowercased and counts of the same lowercase word are summed
+    :param path: the table file
+    :return: the number of words
+    """
+    merged: Dict[bytes, int] = {}
+    for word, count in counts.items() if isinstance(counts, dict) else counts:
+        if count <= 0:
+            raise ValueError(f"the count of '{word}' isn't positive")
+        key = word.lower().encode("utf-8")
+        merged[key] = merged.get(key, 0) + count
+    words = sorted(merged)
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    max_length = max((len(word.decode("utf-8")) for word in words), default=0)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(words), max_length, sum(merged.values())))
+        f.write(_uint32_array(offsets))
+        f.write(_uint32_array(merged[word] for word in words))
+        f.write(b"".join(words))
+    return len(words)
+
+
+class WordFrequencyTable:
+    """Memory-mapped word counts written by build_word_table, see `load`. Words are looked up by binary search."""
+
+    def __init__(self, buffer: mmap.mmap):
+        if len(buffer) < _HEADER.size:
+            raise ValueError("not a word frequency table")
+        magic, size, self.max_length, self.total = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError("not a word frequency table")
+        view = memoryview(buffer)
+        position = _HEADER.size
+        offsets = view[position : position + 4 * (size + 1)]
+        position += 4 * (size + 1)
+        counts = view[position : position + 4 * size]
+        self._offsets: Union[memoryview, array] = offsets.cast("I")
+        self._counts: Union[memoryview, array] = counts.cast("I")
+        if sys.byteorder == "big":
+            self._offsets, self._counts = array("I", offsets.tobytes()), array("I", counts.tobytes())
+            self._offsets.byteswap()
+            self._counts.byteswap()
+        self._blob = view[position + 4 * size :]
+        self._buffer = buffer
+
+    @classmethod
+    def load(cls, path: str) -> "WordFrequencyTable":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return len(self._counts)
+
+    def _word(self, index: int) -> bytes:
+        return self._blob[self._offsets[index] : self._offsets[index + 1]].tobytes()
+
+    def get(self, word: str) -> int:
+        """The count of a lowercase word, 0 for unknown words."""
+        key = word.encode("utf-8")
+        low, high = 0, len(self._counts)
+        while low < high:
+            middle = (low + high) // 2
+            if self._word(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._counts) and self._word(low) == key:
+            return self._counts[low]
+        return 0
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) > 0
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """The words and their counts, in the order of their utf-8 bytes."""
+        for i in range(len(self)):
+            yield self._word(i).decode("utf-8"), self._counts[i]
+
+
+class HashtagSegmenter:
+    """
+    Split hashtags into lowercase words, see the module documentation. `segment` is cached, `split` isn't.
+
+    :param table: the word frequency table
+    :param cache_size: the number of distinct hashtags whose segmentation is cached
+    """
+
+    def __init__(self, table: WordFrequencyTable, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.table = table
+        self._log_total = math.log(max(table.total, 1))
+        self.segment = lru_cache(maxsize=cache_size)(self._segment)
+
+    def _cost(self, word: str) -> float:
+        """The negative log probability of a word, unknown words are less probable the longer they are."""
+        count = self.table.get(word) if len(word) <= self.table.max_length else 0
+        if count:
+            return self._log_total - math.log(count)
+        return self._log_total + (len(word) - 1) * math.log(10)
+
+    def viterbi(self, text: str) -> List[str]:
+        """The most probable segmentation of a lowercase text into words."""
+        # best[i]: the cost of the best segmentation of text[:i] and the start of its last word
+        best: List[Tuple[float, int]] = [(0.0, 0)]
+        for end in range(1, len(text) + 1):
+            best.append(min((best[start][0] + self._cost(text[start:end]), start) for start in range(end)))
+        words = []
+        end = len(text)
+        while end > 0:
+            start = best[end][1]
+            words.append(text[start:end])
+            end = start
+        return words[::-1]
+
+    def split(self, hashtag: str) -> List[str]:
+        """The lowercase words of a hashtag, with or without its # (or #...# on Weibo)."""
+        words = []
+        for part in _PARTS.findall(hashtag):
+            if part.isdigit():
+                words.append(part)
+                continue
+            camel_words = _CAMEL_SPLIT.sub(r" \1", part).split()
+            if len(camel_words) > 1:
+                words.extend(word.lower() for word in camel_words)
+            else:
+                words.extend(self.viterbi(part.lower()))
+        return words
+
+    def _segment(self, hashtag: str) -> str:
+        """The words of a hashtag separated by spaces."""
+        return " ".join(self.split(hashtag))
+
+
+_DEFAULT_SEGMENTER: Optional[HashtagSegmenter] = None
+
+
+def get_hashtag_segmenter() -> HashtagSegmenter:
+    """The segmenter of the packaged word frequency table, loaded on first use."""
+    global _DEFAULT_SEGMENTER  # pylint: disable=global-statement
+    if _DEFAULT_SEGMENTER is None:
+        _DEFAULT_SEGMENTER = HashtagSegmenter(WordFrequencyTable.load(DEFAULT_WORD_TABLE))
+    return _DEFAULT_SEGMENTER
+
+
+def segment_hashtag(hashtag: str) -> str:
+    """
+    :param hashtag: the hashtag, e.g. "#MakeAmericaGreat"
+    :return: its lowercase words separated by spaces, e.g. "make america great"
+    """
+    return get_hashtag_segmenter().segment(hashtag)
@@ -0,0 +1,112 @@
+"""
+pandas accessor preprocessing a Series of texts in batches.
+
+`series.apply(prep)` calls the parser once per row. The `tweet` accessor sends the texts to the batch parser in chunks,
+optionally in several processes, and builds the resulting Series or DataFrame at once, with the index of the series.
+Missing values (None, NaN) are kept missing.
+
+Usage Example:
+
+    import tweet_nlp_toolkit.prep.pandas_accessor  # registers the accessor
+
+    df["prep"] = df.text.tweet.prep(mentions="tag", urls="remove")
+    entities = df.text.tweet.entities(workers=4)  # hashtags, mentions and urls columns
+
+Requires pandas.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import pandas as pd
+except ImportError as exc:  # pragma: no cover
+    raise ImportError("the pandas accessor requires pandas: pip install tweet_nlp_toolkit[pandas]") from exc
+
+from tweet_nlp_toolkit.prep.text_parser import parse_many
+from tweet_nlp_toolkit.prep.token import ENTITY_KINDS
+
+ACCESSOR_NAME = "tweet"
+
+
+def _prep_chunk(texts: List[str], kwargs: Dict[str, Any]) -> List[str]:
+    return [parsed_text.value for parsed_text in parse_many(texts, **kwargs)]
+
+
+def _tokens_chunk(texts: List[str], kwargs: Dict[str, Any]) -> List[List[str]]:
+    return [[token.value for token in parsed_text] for parsed_text in parse_many(texts, **kwargs)]
+
+
+def _entities_chunk(texts: List[str], kinds: List[str], kwargs: Dict[str, Any]) -> List[Dict[str, List[str]]]:
+    return [parsed_text.entities(kinds) for parsed_text in parse_many(texts, **kwargs)]
+
+
+@pd.api.extensions.register_series_accessor(ACCESSOR_NAME)
+class TweetAccessor:
+    """
+    Batch preprocessing of a Series of texts, available as `series.tweet` once this module is imported.
+
+    Every method takes `chunk_size`, the number of texts sent at once to the batch parser, `workers`, the number of
+    processes (default 1, in the current process), and the arguments of the parse_text function.
+    """
+
+    def __init__(self, series: pd.Series):
+        self._series = series
+
+    def _map_chunks(self, function: Callable, args: Iterable, chunk_size: int, workers: int) -> List[Optional[Any]]:
+        """Apply a chunk function to the texts of the series, None for missing values."""
+        if chunk_size < 1 or workers < 1:
+            raise ValueError("chunk_size and workers should be positive")
+        values = self._series.tolist()
+        positions = [i for i, value in enumerate(values) if isinstance(value, str)]
+        if self._series.notna().sum() != len(positions):
+            raise TypeError("the series should only hold strings and missing values")
+        texts = [values[i] for i in positions]
+        chunks = [texts[start : start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        args = list(args)
+        if workers == 1 or len(chunks) < 2:
+            results = [function(chunk, *args) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(function, chunks, *(repeat(arg) for arg in args)))
+        output: List[Optional[Any]] = [None] * len(values)
+        for position, result in zip(positions, chain.from_iterable(results)):
+            output[position] = result
+        return output
+
+    def _series_of(self, values: List[Optional[Any]]) -> pd.Series:
+        return pd.Series(values, index=self._series.index, name=self._series.name, dtype=object)
+
+    def prep(self, chunk_size: int = 1000, workers: int = 1, **kwargs) -> pd.Series:
+        """
+        Preprocess the texts, see `tweet_nlp_toolkit.prep`.
+
+        :return: a Series of preprocessed texts with the index and name of the series
+        """
+        return self._series_of(self._map_chunks(_prep_chunk, [kwargs], chunk_size, workers))
+
+    def tokens(self, chunk_size: int = 1000, workers: int = 1, **kwargs) -> pd.Series:
+        """
+        Tokenize and preprocess the texts.
+
+        :return: a Series of lists of tokens with the index and name of the series
+        """
+        return self._series_of(self._map_chunks(_tokens_chunk, [kwargs], chunk_size, workers))
+
+    def entities(
+        self, kinds: Optional[Iterable[str]] = None, chunk_size: int = 1000, workers: int = 1, **kwargs
+    ) -> pd.DataFrame:
+        """
+        Extract the entities of the texts, as they are after preprocessing: tagged or removed entities are left out.
+
+        :param kinds: kinds of tokens to extract, see TOKEN_KINDS. Default hashtags, mentions and URLs.
+        :return: a DataFrame with the index of the series and a column of lists per kind, named after the kind (e.g.
+            "hashtags"). Missing texts have no entity.
+        """
+        kinds = list(ENTITY_KINDS if kinds is None else kinds)
+        entities = self._map_chunks(_entities_chunk, [kinds, kwargs], chunk_size, workers)
+        columns = {
+            f"{kind}s": [[] if text_entities is None else text_entities[kind] for text_entities in entities]
+            for kind in kinds
+        }
+        return pd.DataFrame(columns, index=self._series.index)
@@ -0,0 +1,314 @@
+"""
+Statistics of the alternatives of the tokenizer, and a tokenizer dispatching them on the first character.
+
+At every position of a text, the tokenizer tries the alternatives of `regexes.token_pipeline` in order until one
+matches, so the cost of an alternative depends on how often it's tried and fails. `collect_stats` records, for a
+sample corpus, how often each alternative is tried and matches, and the time spent trying it.
+
+`dispatch_pattern` builds an equivalent pattern: positions are split into cells by their first character (e.g. "@",
+"#", digits or white spaces), and each cell only tries the alternatives which can start with one of its characters,
+in the order of the pipeline. Alternatives made of top-level alternatives (e.g. the emoticons) are split first. The
+characters an alternative can start with are computed from the parsed pattern, by over-approximation, so the
+dispatch pattern matches the same tokens: an alternative left out of a cell can't match there.
+
+Usage Example:
+
+    from tweet_nlp_toolkit.prep.pipeline_stats import collect_stats, compile_dispatch_tokenizer
+
+    for alternative in collect_stats(texts):
+        print(alternative.name, alternative.matches, alternative.attempts, alternative.seconds)
+    tokenizer = compile_dispatch_tokenizer(cells=first_character_cells(texts))
+    tokenizer.findall(text)
+
+See benchmarks/pipeline_dispatch.py.
+"""
+import re
+import time
+from collections import Counter
+from functools import partial
+from typing import Callable, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:  # Python 3.11
+    from re import _constants as sre_constants  # type: ignore
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # pragma: no cover
+    import sre_constants  # type: ignore  # pylint: disable=deprecated-module
+    import sre_parse  # type: ignore  # pylint: disable=deprecated-module
+
+from tweet_nlp_toolkit.prep.regexes import TOKEN_PIPELINE_NAMES, token_pipeline
+
+# cells of first characters of the default dispatch: no token starts with a white space, and most tokens of
+# lowercased tweets start with a letter
+DEFAULT_CELLS = [" \t\n", "abcdefgijklmnopqrstuvxyz", "hw", "0123456789", "@", "#", "<", ":", ".", "(", ")"]
+
+_CATEGORIES = {
+    "CATEGORY_DIGIT": r"\d",
+    "CATEGORY_NOT_DIGIT": r"\D",
+    "CATEGORY_SPACE": r"\s",
+    "CATEGORY_NOT_SPACE": r"\S",
+    "CATEGORY_WORD": r"\w",
+    "CATEGORY_NOT_WORD": r"\W",
+}
+# a finite set of characters above this size is handled as a predicate
+_MAX_FINITE_SIZE = 256
+
+
+class FirstCharacters(NamedTuple):
+    """
+    Over-approximation of the characters a pattern can start with.
+
+    chars is the finite set of these characters, or None when it's not finite (e.g. `\\w`), contains tells whether
+    the pattern can start with a character.
+    """
+
+    chars: Optional[FrozenSet[str]]
+    contains: Callable[[str], bool]
+
+    def union(self, other: "FirstCharacters") -> "FirstCharacters":
+        chars = None if self.chars is None or other.chars is None else self.chars | other.chars
+        return FirstCharacters(chars, lambda char: self.contains(char) or other.contains(char))
+
+
+_NOTHING = FirstCharacters(frozenset(), lambda char: False)
+_ANYTHING = FirstCharacters(None, lambda char: True)
+
+
+def _literal(code: int) -> FirstCharacters:
+    char = chr(code)
+    return FirstCharacters(frozenset(char), lambda other: other == char)
+
+
+def _in_range(low: int, high: int, char: str) -> bool:
+    return low <= ord(char) <= high
+
+
+def _in_category(category: re.Pattern, char: str) -> bool:
+    return bool(category.match(char))
+
+
+def _character_class(items: list) -> FirstCharacters:
+    """First characters of a parsed character class, e.g. `[^a-z\\d]`."""
+    negate = bool(items) and items[0][0] is sre_constants.NEGATE
+    if negate:
+        items = items[1:]
+    result = _NOTHING
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            result = result.union(_literal(av))
+        elif op is sre_constants.RANGE and av[1] - av[0] < _MAX_FINITE_SIZE:
+            chars = frozenset(map(chr, range(av[0], av[1] + 1)))
+            result = result.union(FirstCharacters(chars, chars.__contains__))
+        elif op is sre_constants.RANGE:
+            result = result.union(FirstCharacters(None, partial(_in_range, av[0], av[1])))
+        elif op is sre_constants.CATEGORY and str(av) in _CATEGORIES:
+            category = re.compile(_CATEGORIES[str(av)])
+            result = result.union(FirstCharacters(None, partial(_in_category, category)))
+        else:
+            return _ANYTHING
+    if negate:
+        return FirstCharacters(None, lambda char: not result.contains(char))
+    return result
+
+
+def _first_of_sequence(sequence) -> Tuple[FirstCharacters, bool]:
+    """First characters of a parsed sequence, and whether the sequence can match the empty string."""
+    result = _NOTHING
+    for op, av in sequence:
+        first, nullable = _first_of_node(op, av)
+        result = result.union(first)
+        if not nullable:
+            return result, False
+    return result, True
+
+
+def _first_of_node(op, av) -> Tuple[FirstCharacters, bool]:
+    """First characters of a parsed node, an operator and its argument, and whether it can match the empty string."""
+    if op is sre_constants.LITERAL:
+        return _literal(av), False
+    if op is sre_constants.NOT_LITERAL:
+        return FirstCharacters(None, lambda char: char != chr(av)), False
+    if op is sre_constants.IN:
+        return _character_class(av), False
+    if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        # zero-width, lookarounds only restrict the first characters
+        return _NOTHING, True
+    if op is sre_constants.SUBPATTERN:
+        return _first_of_sequence(av[-1])
+    if op is sre_constants.BRANCH:
+        result, nullable = _NOTHING, False
+        for branch in av[1]:
+            first, branch_nullable = _first_of_sequence(branch)
+            result, nullable = result.union(first), nullable or branch_nullable
+        return result, nullable
+    if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) or str(op) == "POSSESSIVE_REPEAT":
+        first, nullable = _first_of_sequence(av[2])
+        return first, nullable or av[0] == 0
+    if str(op) == "ATOMIC_GROUP":
+        return _first_of_sequence(av)
+    return _ANYTHING, True  # e.g. ANY or group references
+
+
+def first_characters(pattern: str) -> FirstCharacters:
+    """
+    The characters a pattern can start with, an over-approximation. A pattern which can match the empty string can
+    start with any character.
+    """
+    first, nullable = _first_of_sequence(sre_parse.parse(pattern, re.UNICODE))
+    return _ANYTHING if nullable else first
+
+
+def split_alternatives(pattern: str) -> List[str]:
+    """Top-level alternatives of a pattern, e.g. "a|(?:b|c)|[|]" -> ["a", "(?:b|c)", "[|]"]."""
+    alternatives = []
+    depth = 0
+    in_set = False
+    set_start = start = i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_set:
+            if char == "]" and i > set_start:  # a ] right after [ or [^ is literal
+                in_set = False
+        elif char == "[":
+            in_set = True
+            set_start = i + 2 if pattern.startswith("^", i + 1) else i + 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            alternatives.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    alternatives.append(pattern[start:])
+    return alternatives
+
+
+def dispatch_pattern(cells: Sequence[str], pipeline: Optional[List[str]] = None) -> str:
+    """
+    Pattern matching the same tokens as the pipeline, dispatching the positions on their first character.
+
+    :param cells: disjoint strings of characters, e.g. ["@", "#", "0123456789"]. Each cell tries the alternatives
+        which can start with one of its characters, cells are tried in order. Other positions try the alternatives
+        which can start with another character.
+    :param pipeline: the alternatives, default the ones of the tweet tokenizer
+    :return: the pattern, to compile with re.UNICODE
+    """
+    # the first alternative matching wins, so (?:a|b)|c and a|b|c match the same
+    pipeline = [
+        part
+        for alternative in (token_pipeline() if pipeline is None else pipeline)
+        for part in split_alternatives(alternative)
+    ]
+    dispatched = "".join(cells)
+    if len(set(dispatched)) != len(dispatched):
+        raise ValueError("the cells should be disjoint")
+    firsts = [first_characters(alternative) for alternative in pipeline]
+    branches = []
+    for cell in cells:
+        alternatives = [alt for alt, first in zip(pipeline, firsts) if any(map(first.contains, cell))]
+        if alternatives:
+            branches.append(f"(?={_set(cell)})(?:{'|'.join(alternatives)})")
+    # other positions, alternatives whose first characters are all dispatched to a cell are left out
+    others = [alt for alt, first in zip(pipeline, firsts) if first.chars is None or first.chars - set(dispatched)]
+    if others:
+        branches.append(f"(?!{_set(dispatched)})(?:{'|'.join(others)})" if dispatched else "|".join(others))
+    return "|".join(branches)
+
+
+def _set(chars: str) -> str:
+    return "[" + "".join(re.escape(char) for char in chars) + "]"
+
+
+def compile_dispatch_tokenizer(cells: Sequence[str] = tuple(DEFAULT_CELLS), weibo: bool = False):
+    """
+    Compile a dispatch pattern of the tokenizer, see dispatch_pattern.
+
+    :param cells: the cells of first characters
+    :param weibo: whether to compile the Weibo tokenizer
+    :return: the compiled pattern, tokens are found by its findall or finditer methods
+    """
+    return re.compile(dispatch_pattern(cells, token_pipeline(weibo=weibo)), re.UNICODE)
+
+
+def first_character_cells(texts: Iterable[str], cells: Sequence[str] = tuple(DEFAULT_CELLS)) -> List[str]:
+    """
+    Order the cells by decreasing number of positions tried by the tokenizer whose character is in the cell, in a
+    sample corpus. The positions tried are the first character of the tokens and the characters between tokens.
+
+    :param texts: the sample corpus, tokenized by the tweet tokenizer
+    :param cells: the cells to order
+    :return: the ordered cells
+    """
+    pattern = re.compile("|".join(token_pipeline()), re.UNICODE)
+    counts: Counter = Counter()
+    for text in texts:
+        position = 0
+        for match in pattern.finditer(text):
+            counts.update(text[position : match.start() + 1])
+            position = match.end()
+        counts.update(text[position:])
+    return sorted(cells, key=lambda cell: -sum(counts[char] for char in cell))
+
+
+class AlternativeStats(NamedTuple):
+    """Statistics of an alternative of the pipeline over a corpus."""
+
+    name: str
+    attempts: int  # number of positions where it's tried
+    matches: int  # number of tokens it matches
+    seconds: float  # time spent trying it
+
+    @property
+    def failures(self) -> int:
+        return self.attempts - self.matches
+
+
+def collect_stats(
+    texts: Iterable[str], pipeline: Optional[List[str]] = None, names: Optional[List[str]] = None
+) -> List[AlternativeStats]:
+    """
+    Instrument the tokenization of a sample corpus. Each alternative is timed at every position where the tokenizer
+    tries it, i.e. where the alternatives before it fail, so collecting the statistics is much slower than tokenizing.
+
+    :param texts: the sample corpus
+    :param pipeline: the alternatives, default the ones of the tweet tokenizer
+    :param names: the names of the alternatives, default TOKEN_PIPELINE_NAMES
+    :return: the statistics of each alternative, in the order of the pipeline
+    """
+    pipeline = token_pipeline() if pipeline is None else pipeline
+    names = TOKEN_PIPELINE_NAMES if names is None else names
+    if len(names) != len(pipeline):
+        raise ValueError("there should be a name per alternative")
+    group_names = [f"a{i}" for i in range(len(pipeline))]
+    combined = re.compile(
+        "|".join(f"(?P<{group}>{alternative})" for group, alternative in zip(group_names, pipeline)), re.UNICODE
+    )
+    compiled = [re.compile(alternative, re.UNICODE) for alternative in pipeline]
+    attempts = [0] * len(pipeline)
+    matches = [0] * len(pipeline)
+    seconds = [0.0] * len(pipeline)
+
+    def _try(text: str, position: int, last: int):
+        """Try the alternatives up to last at a position."""
+        for i in range(last + 1):
+            start = time.perf_counter()
+            compiled[i].match(text, position)
+            seconds[i] += time.perf_counter() - start
+            attempts[i] += 1
+
+    for text in texts:
+        position = 0
+        for match in combined.finditer(text):
+            # positions skipped before the token, where every alternative failed
+            for skipped in range(position, match.start()):
+                _try(text, skipped, len(pipeline) - 1)
+            index = group_names.index(str(match.lastgroup))
+            _try(text, match.start(), index)
+            matches[index] += 1
+            position = match.end()
+        for skipped in range(position, len(text)):
+            _try(text, skipped, len(pipeline) - 1)
+    return [AlternativeStats(*stats) for stats in zip(names, attempts, matches, seconds)]
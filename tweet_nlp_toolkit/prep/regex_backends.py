@@ -0,0 +1,132 @@
+"""
+Regular expression engines compiling the tokenizer, see `regexes.compile_tokenizer`.
+
+The tokenizer is built as a pipeline of alternatives, written for the stdlib `re` module. A backend compiles it, and
+may rewrite the parts of it that a more capable engine matches with less backtracking: with the `regex` package, the
+quantifiers marked with `possessive` don't give back characters, which can't change the tokens as they're only used
+where backtracking can't lead to a match. The tokens are the same whatever the backend: `\\w`, `\\d`, `\\s` and
+`\\b` are translated into the character classes of `re`, as engines follow different versions and definitions of
+Unicode (e.g. combining marks are word characters for `regex`, not for `re`). Another engine is added by subclassing
+RegexBackend and registering it in REGEX_BACKENDS.
+"""
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, List, Type
+
+
+class RegexBackend:
+    """The stdlib `re` module, without possessive quantifiers so that the patterns are the same for all Pythons."""
+
+    name = "re"
+    possessive_quantifiers = False
+    module = re
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+    def possessive(self, pattern: str) -> str:
+        """
+        Make the quantifier ending the pattern possessive when the engine supports it, e.g. `[^>\\s]+` -> `[^>\\s]++`.
+        Only for quantifiers whose backtracking can't lead to a match, i.e. followed by something their atom can't
+        match.
+        """
+        return pattern + "+" if self.possessive_quantifiers else pattern
+
+    def compile(self, pattern: str, flags: int = 0):
+        return self.module.compile(pattern, flags)
+
+
+def _ranges(chars: str) -> str:
+    """Content of a character class of the given characters, sorted, with consecutive code points as ranges."""
+    ranges: List[List[int]] = []
+    for cp in map(ord, chars):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return "".join(re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}" for a, b in ranges)
+
+
+@lru_cache(maxsize=None)
+def re_character_classes() -> Dict[str, str]:
+    """Content of the character classes of `\\w`, `\\W`, `\\d`, `\\D`, `\\s` and `\\S` as defined by `re`."""
+    # surrogates can't be encoded, they aren't word, digit or space characters
+    chars = "".join(chr(cp) for cp in range(sys.maxunicode + 1) if not 0xD800 <= cp <= 0xDFFF)
+    classes = {}
+    for name in "wds":
+        classes[name] = _ranges("".join(re.findall(rf"\{name}", chars)))
+        classes[name.upper()] = _ranges("".join(re.findall(rf"\{name.upper()}", chars)))
+    return classes
+
+
+def translate_classes(pattern: str, classes: Dict[str, str]) -> str:
+    """
+    Replace the escapes `\\w`, `\\W`, `\\d`, `\\D`, `\\s`, `\\S` and `\\b` of a pattern by explicit character classes.
+
+    :param pattern: the pattern
+    :param classes: the content of the character class of each escape letter, e.g. re_character_classes()
+    :return: the translated pattern
+    """
+    word = classes["w"]
+    word_boundary = f"(?:(?<=[{word}])(?![{word}])|(?<![{word}])(?=[{word}]))"
+    output = []
+    in_set = False
+    set_start = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escape = pattern[i + 1]
+            if escape in classes:
+                output.append(classes[escape] if in_set else f"[{classes[escape]}]")
+            elif escape == "b" and not in_set:  # a backspace in a set
+                output.append(word_boundary)
+            else:
+                output.append(pattern[i : i + 2])
+            i += 2
+            continue
+        if not in_set and char == "[":
+            in_set = True
+            set_start = i + 2 if pattern.startswith("^", i + 1) else i + 1
+        elif in_set and char == "]" and i > set_start:  # a ] right after [ or [^ is literal
+            in_set = False
+        output.append(char)
+        i += 1
+    return "".join(output)
+
+
+class RegexPackageBackend(RegexBackend):
+    """The `regex` package, in its version 0 behaviour compatible with `re`, with possessive quantifiers."""
+
+    name = "regex"
+    possessive_quantifiers = True
+
+    def __init__(self):
+        try:
+            import regex  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise ImportError("the regex backend requires regex: pip install tweet_nlp_toolkit[regex]") from exc
+        self.module = regex
+
+    def compile(self, pattern: str, flags: int = 0):
+        return self.module.compile(translate_classes(pattern, re_character_classes()), flags | self.module.VERSION0)
+
+
+# backends by name
+REGEX_BACKENDS: Dict[str, Type[RegexBackend]] = {
+    RegexBackend.name: RegexBackend,
+    RegexPackageBackend.name: RegexPackageBackend,
+}
+
+DEFAULT_REGEX_BACKEND = RegexBackend.name
+
+
+def get_regex_backend(name: str = DEFAULT_REGEX_BACKEND) -> RegexBackend:
+    """
+    :param name: the name of the backend, one of REGEX_BACKENDS
+    :return: an instance of the backend
+    """
+    if name not in REGEX_BACKENDS:
+        raise ValueError(f"unknown regex backend '{name}', expected one of {sorted(REGEX_BACKENDS)}")
+    return REGEX_BACKENDS[name]()
@@ -6,6 +6,11 @@ and
     https://www.nltk.org/_modules/nltk/tokenize/casual.html#TweetTokenizer
 """
 import re
+from typing import Dict, Iterable, List, Optional
+
+from emoji import UNICODE_EMOJI_ENGLISH
+
+from tweet_nlp_toolkit.prep.regex_backends import RegexBackend, get_regex_backend
 
 HASHTAG = r"\#\b[\w\-\_]+\b"
 HASHTAG_PATTERN = re.compile(r"^\#\b[\w\-\_]+\b$")
@@ -18,7 +23,7 @@ NOT_A_HASHTAG_PATTERN = re.compile(r"^\#\b[\d]+\b$")
 
 
 # Thai vowels range from \u0e00 to \u0e7f, reference: https://www.compart.com/en/unicode/scripts/Thai
-WORD = r"(?:[^\W\d|(?:_](?:[^\W\d_]|['\-_]|[\u0e00-\u0e7f])+[^\W\d_]?)[^\W\d\w_]?"
+WORD = r"(?:[^\W\d|(?:_](?:[^\W\d_]|['\-_]|[\u0e00-\u0e7f])+[^\W\d_]?)"
 MENTION = r"\@\w+"
 MENTION_PATTERN = re.compile(r"^\@\w+$")
 
@@ -36,9 +41,19 @@ _ltr_emoticon = [
     r"(?:[(){}\[\]<>|/\\]+|[Þ×þ]|(?<!\d)[30](?!\d)|(?<![\d\*])[*,.@#&](?![\*\d,.])|(?<![\d\$])[$](?![\d\.,\$])|[DOosSJLxXpPbc](?![a-zA-Z]))",
 ]
 
+# Quantifiers marked possessive by a backend supporting them (see regex_backends) are followed by something their
+# atom can't match, so giving back characters can't lead to a match.
+_RE_BACKEND = RegexBackend()
+
+# Guards are lookaheads checking a necessary condition of a match at once, so that an alternative failing on a long
+# run of characters (e.g. "((((((" or "------") doesn't backtrack over the run. They don't change what is matched.
+# rejects runs of mouths which aren't followed by a nose, tears or eyes
+_MOUTHS_GUARD = r"(?=[(){}\[\]<>|/\\]+[-‑^'\",xX:=|%#$8;*])"
 _rtl_emoticon = [
     r"(?<![\w])",
-    r"(?:[(){}\[\]<>|/\\]+|(?<![\d\.\,])[0](?![\d\.])|(?![\d\*,.@#&])[*,.@#&]|[$]|(?<![a-zA-Z])[DOosSxX])",
+    r"(?:"
+    + _MOUTHS_GUARD
+    + r"[(){}\[\]<>|/\\]+|(?<![\d\.\,])[0](?![\d\.])|(?![\d\*,.@#&])[*,.@#&]|[$]|(?<![a-zA-Z])[DOosSxX])",
     # mouth
     r"(?:[-‑^])?",  # optional nose
     r"(?:['\",])?",  # optional tears
@@ -53,27 +68,116 @@ _REST_EMOTICONS = r"(?<![A-Za-z0-9/()])(?:(?:\^5)|(?:\<3))(?![[A-Za-z0-9/()])"
 EMOTICONS = "|".join([_LTR_FACE, _RTL_FACE, _EASTERN_EMOTICONS, _REST_EMOTICONS])
 EMOTICONS_PATTERN = re.compile(rf"^{EMOTICONS}$")
 
-EMAIL = r"(?:^|(?<=[^\w@.)]))(?:[\w+-](?:\.(?!\.))?)*?[\w+-]@(?:\w-?)*?\w+(?:\.(?:[a-z]{2,})){1,3}(?:$|(?=\b))"
+
+def _email_guard(backend: RegexBackend) -> str:
+    # rejects local parts which aren't followed by @, instead of expanding the lazy loop over the whole run
+    return r"(?=" + backend.possessive(r"[\w.+-]*") + r"@)"
+
+
+def _email(backend: RegexBackend) -> str:
+    return (
+        r"(?:^|(?<=[^\w@.)]))"
+        + _email_guard(backend)
+        + r"(?:[\w+-](?:\.(?!\.))?)*?[\w+-]@(?:\w-?)*?"
+        + backend.possessive(r"\w+")
+        + r"(?:\.(?:"
+        + backend.possessive(r"[a-z]{2,}")
+        + r")){1,3}(?:$|(?=\b))"
+    )
+
+
+_EMAIL_GUARD = _email_guard(_RE_BACKEND)
+EMAIL = _email(_RE_BACKEND)
 EMAIL_PATTERN = re.compile(
     r"^(?:^|(?<=[^\w@.)]))(?:[\w+-](?:\.(?!\.))?)*?[\w+-]@(?:\w-?)*?\w+(?:\.(?:[a-z]{2,})){1,3}(?:$|(?=\b))$"
 )
 
-URL = r"(?:https?:\/\/(?:www\.|(?!www))[^\s\.]+\.[^\s]{2,}|www\.[^\s]+\.[^\s]{2,})"
+
+def _url(backend: RegexBackend) -> str:
+    return r"(?:https?:\/\/(?:www\.|(?!www))" + backend.possessive(r"[^\s\.]+") + r"\.[^\s]{2,}|www\.[^\s]+\.[^\s]{2,})"
+
+
+URL = _url(_RE_BACKEND)
 URL_PATTERN = re.compile(r"^(?:https?:\/\/(?:www\.|(?!www))[^\s\.]+\.[^\s]{2,}|www\.[^\s]+\.[^\s]{2,})$")
 
 CAMEL_SPLIT = r"((?<=[a-z])[A-Z]|(?<!^)[A-Z](?=[a-z])|[0-9]+|(?<=[0-9\\-\\_])[A-Za-z]|[\\-\\_])"
 
-HTML_TAG = r"<[^>\s]+>"
+
+def _html_tag(backend: RegexBackend) -> str:
+    return r"<" + backend.possessive(r"[^>\s]+") + r">"
+
+
+HTML_TAG = _html_tag(_RE_BACKEND)
 HTML_TAG_PATTERN = re.compile(r"^<[^>\s]+>$")
 
-ASCII_ARROW = r"""[\-]+>|<[\-]+"""
+
+def _ascii_arrow(backend: RegexBackend) -> str:
+    return backend.possessive(r"[\-]+") + r">|<[\-]+"
+
+
+ASCII_ARROW = _ascii_arrow(_RE_BACKEND)
 
 DIGIT = r"(?:[+\-]?\d+[,/.:-]?\d*[+\-]?)"
 DIGIT_PATTERN = re.compile(r"^(?:[+\-]?\d+[,/.:-]?\d*[+\-]?)$")
 
-ELLIPSIS_DOTS = r"(?:\.(?:\s*\.){1,})"
+
+def _ellipsis_dots(backend: RegexBackend) -> str:
+    return r"(?:\.(?:" + backend.possessive(r"\s*") + r"\.){1,})"
+
+
+ELLIPSIS_DOTS = _ellipsis_dots(_RE_BACKEND)
 EMOJI_STRING = r"(?::\w+:)"
 
+
+def _char_class(chars: Iterable[str]) -> str:
+    """Character class of the given characters, with consecutive code points merged into ranges."""
+    ranges: List[List[int]] = []
+    for cp in sorted({ord(char) for char in chars}):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    members = "".join(re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}" for a, b in ranges)
+    return f"[{members}]"
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a pattern matching the longest of the given words (at least two characters long) as a trie,
+    e.g. ["ab", "abc", "ad"] -> a(?:bc?|d).
+    The second character is checked first by a lookahead, so that a position where none of the words starts is
+    rejected at once instead of trying every branch of the trie.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def _node_pattern(node: Dict) -> str:
+        branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:  # a word ends here, longer words are tried first
+            pattern = f"(?:{pattern})?" if len(branches) == 1 else f"{pattern}?"
+        return pattern
+
+    second_chars = _char_class(char for child in trie.values() for char in child if char)
+    return f"(?=.{second_chars}){_node_pattern(trie)}"
+
+
+# Emojis made of several code points: ZWJ sequences (👨‍👩‍👧), flags (🇫🇷), keycaps (1⃣), skin tones (👍🏽).
+# Variation selectors are removed from the text before tokenization, both forms are matched.
+_EMOJI_SEQUENCES = {
+    sequence
+    for emoji in UNICODE_EMOJI_ENGLISH
+    for sequence in (emoji, emoji.replace("\ufe0f", "").replace("\ufe0e", ""))
+    if len(sequence) > 1
+}
+EMOJI_SEQUENCE = _trie_pattern(_EMOJI_SEQUENCES)
+
 # === Patterns ===
 
 QUOTES_PAT = re.compile("[“”«»]")
@@ -83,23 +187,66 @@ RT_MENTION_PAT = re.compile(r"^RT " + MENTION + ": ")
 
 # join all together
 
-_TOKEN_PIPELINE = [
-    URL,
-    EMAIL,
-    MENTION,
-    HASHTAG,
-    EMOTICONS,
-    HTML_TAG,
-    ASCII_ARROW,
-    DIGIT,
-    ELLIPSIS_DOTS,
-    EMOJI_STRING,
-    WORD,
-    r"\S",
+
+# names of the alternatives of token_pipeline, in the same order
+TOKEN_PIPELINE_NAMES = [
+    "url",
+    "email",
+    "mention",
+    "hashtag",
+    "emoji_sequence",
+    "emoticon",
+    "html_tag",
+    "ascii_arrow",
+    "digit",
+    "ellipsis",
+    "emoji_string",
+    "word",
+    "other",
 ]
+
+
+def token_pipeline(backend: Optional[RegexBackend] = None, weibo: bool = False) -> List[str]:
+    """
+    The alternatives of the tokenizer, in order of priority.
+
+    :param backend: the backend the alternatives are written for, default the stdlib re
+    :param weibo: whether to match Weibo hashtags (#...#) instead of tweet hashtags
+    :return: the list of alternatives
+    """
+    backend = backend or _RE_BACKEND
+    return [
+        _url(backend),
+        _email(backend),
+        MENTION,
+        WEIBO_HASHTAG if weibo else HASHTAG,
+        EMOJI_SEQUENCE,
+        EMOTICONS,
+        _html_tag(backend),
+        _ascii_arrow(backend),
+        DIGIT,
+        _ellipsis_dots(backend),
+        EMOJI_STRING,
+        WORD,
+        r"\S",
+    ]
+
+
+def compile_tokenizer(backend: str = "re", weibo: bool = False):
+    """
+    Compile the tokenizer pattern with a regex backend, see regex_backends.
+
+    :param backend: the name of the backend, one of REGEX_BACKENDS
+    :param weibo: whether to compile the Weibo tokenizer
+    :return: the compiled pattern of the backend, tokens are found by its findall or finditer methods
+    """
+    regex_backend = get_regex_backend(backend)
+    return regex_backend.compile("|".join(token_pipeline(regex_backend, weibo=weibo)), re.UNICODE)
+
+
+_TOKEN_PIPELINE = token_pipeline()
 TWEET_TOKENIZE = re.compile(rf'{"|".join(_TOKEN_PIPELINE)}', re.UNICODE)
-_TOKEN_PIPELINE_COPY = _TOKEN_PIPELINE.copy()
-_TOKEN_PIPELINE_COPY[_TOKEN_PIPELINE_COPY.index(HASHTAG)] = WEIBO_HASHTAG
+_TOKEN_PIPELINE_COPY = token_pipeline(weibo=True)
 WEIBO_TOKENIZE = re.compile(rf'{"|".join(_TOKEN_PIPELINE_COPY)}', re.UNICODE)
 
 LENGTHENING_PATTERN = re.compile(r"(.)\1{2,}")
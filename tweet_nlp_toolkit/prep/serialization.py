@@ -0,0 +1,113 @@
+"""
+Batch container of parsed texts.
+
+Parsed texts are written one after the other in their binary representation (see ParsedText.to_bytes), followed by
+the offsets of the records, so that a container is written in a single pass and memory-mapped back: a parsed text is
+only decoded when it's accessed.
+
+Usage Example:
+
+    from tweet_nlp_toolkit import parse_stream
+    from tweet_nlp_toolkit.prep.serialization import ParsedTextFile, ParsedTextWriter
+
+    with ParsedTextWriter("tweets.parsed") as writer:
+        writer.write_many(parse_stream(texts, workers=8, mentions="tag"))
+
+    parsed_texts = ParsedTextFile.load("tweets.parsed")
+    parsed_texts[42].value
+"""
+import mmap
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, Union
+
+from tweet_nlp_toolkit.prep.file_io import DEFAULT_BUFFER_SIZE
+from tweet_nlp_toolkit.prep.text_parser import ParsedText
+
+# File layout: magic, records, offsets of the records (little-endian int64, the last one is the end of the records),
+# footer
+_MAGIC = b"TNTPARSD"
+_FOOTER = struct.Struct("<qq8s")  # number of records, position of the offsets, magic
+
+
+class ParsedTextWriter:
+    """
+    Write parsed texts into a container file.
+
+    :param path: the container file
+    :param kinds: whether to store the kind of each token, see ParsedText.to_bytes
+    :param buffer_size: the number of bytes buffered before being written to the file
+    """
+
+    def __init__(self, path: str, kinds: bool = False, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self._f = open(path, "wb", buffering=buffer_size)  # pylint: disable=consider-using-with
+        self._f.write(_MAGIC)
+        self._kinds = kinds
+        self._offsets = array("q", [len(_MAGIC)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def write(self, parsed_text: ParsedText):
+        record = parsed_text.to_bytes(kinds=self._kinds)
+        self._f.write(record)
+        self._offsets.append(self._offsets[-1] + len(record))
+
+    def write_many(self, parsed_texts: Iterable[ParsedText]):
+        for parsed_text in parsed_texts:
+            self.write(parsed_text)
+
+    def close(self):
+        if self._f.closed:
+            return
+        offsets = array("q", self._offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        self._f.write(offsets.tobytes())
+        self._f.write(_FOOTER.pack(len(self), self._offsets[-1], _MAGIC))
+        self._f.close()
+
+
+class ParsedTextFile:
+    """Memory-mapped container of parsed texts written by ParsedTextWriter, see `load`."""
+
+    def __init__(self, buffer: mmap.mmap):
+        if len(buffer) < len(_MAGIC) + _FOOTER.size or buffer[: len(_MAGIC)] != _MAGIC:
+            raise ValueError("not a parsed text container")
+        size, offsets_position, magic = _FOOTER.unpack_from(buffer, len(buffer) - _FOOTER.size)
+        if magic != _MAGIC:
+            raise ValueError("incomplete parsed text container, it wasn't closed")
+        self._view = memoryview(buffer)
+        offsets = self._view[offsets_position : offsets_position + 8 * (size + 1)]
+        self._offsets: Union[memoryview, array] = offsets.cast("q")
+        if sys.byteorder == "big":
+            swapped = array("q", offsets.tobytes())
+            swapped.byteswap()
+            self._offsets = swapped
+        self._buffer = buffer
+
+    @classmethod
+    def load(cls, path: str) -> "ParsedTextFile":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> ParsedText:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("parsed text index out of range")
+        return ParsedText.from_bytes(self._view[self._offsets[index] : self._offsets[index + 1]])
+
+    def __iter__(self) -> Iterator[ParsedText]:
+        for i in range(len(self)):
+            yield self[i]
@@ -0,0 +1,316 @@
+"""
+Long-running preprocessing server, for many small clients.
+
+Services preprocessing a few texts per request pay for loading jieba, MeCab and pythainlp in every process. The
+server loads the segmentation tools once, keeps them warm, and coalesces the texts of concurrent requests sharing the
+same options into micro-batches for the batch parser (see AsyncParser). It listens on a Unix socket or on a TCP port
+of localhost, clients connect with `tweet_nlp_toolkit.prep.client.PrepClient`.
+
+Wire format, every message is a frame: its size (little-endian uint32) then its payload.
+- request: the size of the options (uint32), the options as a JSON object (parse_text arguments, the tokenizer by
+  name, see TOKENIZERS, and filters as a list), the number of texts (uint32), the size of each utf-8 text (uint32)
+  and the texts.
+- response: a status (uint8) and a count (uint32). When the status is STATUS_OK, the count is the number of parsed
+  texts, followed by the size of each parsed text (uint32) and the parsed texts in the binary representation of
+  ParsedText.to_bytes. Otherwise, the count is the size of the utf-8 error message that follows.
+
+Usage Example:
+
+    tweet-nlp-serve --socket /tmp/tweet-nlp.sock --workers 4
+
+    from tweet_nlp_toolkit.prep.client import PrepClient
+
+    client = PrepClient(path="/tmp/tweet-nlp.sock")
+    client.prep("123 @hello #world", mentions="tag")
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from tweet_nlp_toolkit.constants import CHINESE_LANGUAGE_CODE, JAPANESE_LANGUAGE_CODE, THAI_LANGUAGE_CODE
+from tweet_nlp_toolkit.prep.async_parser import AsyncParser
+from tweet_nlp_toolkit.prep.text_parser import ACTION_CONDITIONS, ParsedText
+from tweet_nlp_toolkit.prep.tokenizer import TOKENIZERS
+from tweet_nlp_toolkit.prep.word_segmentation import segment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# largest frame accepted by the server, a connection sending a larger one is closed
+MAX_FRAME_SIZE = 1 << 28
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# parse_text options sent by clients, besides the actions
+SCALAR_OPTIONS = ["to_lower", "strip_accents", "reduce_len", "remove_unencodable_char", "time_budget"]
+
+# a text per language loading the segmentation tool
+_WARM_UP_TEXTS = {CHINESE_LANGUAGE_CODE: "测试", JAPANESE_LANGUAGE_CODE: "テスト", THAI_LANGUAGE_CODE: "ทดสอบ"}
+
+_SIZE = struct.Struct("<I")
+_RESPONSE_HEADER = struct.Struct("<BI")
+
+
+def _sizes(items: Sequence[bytes]) -> bytes:
+    sizes = array("I", map(len, items))
+    if sys.byteorder == "big":
+        sizes.byteswap()
+    return sizes.tobytes()
+
+
+def _split(data: memoryview, count: int, position: int) -> Tuple[List[memoryview], int]:
+    """Items of sizes read at position, followed by the items, and the position after the items."""
+    sizes = array("I", data[position : position + 4 * count].tobytes())
+    if sys.byteorder == "big":
+        sizes.byteswap()
+    position += 4 * count
+    items = []
+    for size in sizes:
+        items.append(data[position : position + size])
+        position += size
+    return items, position
+
+
+def encode_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """parse_text options as a JSON object, the tokenizer is sent by name and filters as a list."""
+    encoded = dict(options)
+    tokenizer = encoded.get("tokenizer")
+    if tokenizer is not None and not isinstance(tokenizer, str):
+        names = [name for name, function in TOKENIZERS.items() if function is tokenizer]
+        if not names:
+            raise ValueError(f"only the tokenizers of TOKENIZERS can be used remotely, expected one of {TOKENIZERS}")
+        encoded["tokenizer"] = names[0]
+    if encoded.get("filters") is not None:
+        encoded["filters"] = sorted(encoded["filters"])
+    return encoded
+
+
+def decode_options(encoded: Dict[str, Any]) -> Dict[str, Any]:
+    """parse_text options of a JSON object sent by a client."""
+    unknown_options = set(encoded) - set(SCALAR_OPTIONS) - set(ACTION_CONDITIONS) - {"tokenizer", "filters"}
+    if unknown_options:
+        raise ValueError(f"unexpected options {sorted(unknown_options)}")
+    options = dict(encoded)
+    if "tokenizer" in options:
+        if options["tokenizer"] not in TOKENIZERS:
+            raise ValueError(f"unknown tokenizer '{options['tokenizer']}', expected one of {sorted(TOKENIZERS)}")
+        options["tokenizer"] = TOKENIZERS[options["tokenizer"]]
+    if options.get("filters") is not None:
+        options["filters"] = set(options["filters"])
+    return options
+
+
+def encode_request(texts: Sequence[str], options: Dict[str, Any]) -> bytes:
+    header = json.dumps(encode_options(options)).encode("utf-8")
+    encoded = [text.encode("utf-8", "surrogatepass") for text in texts]
+    return b"".join(
+        [_SIZE.pack(len(header)), header, _SIZE.pack(len(encoded)), _sizes(encoded)] + encoded  # type: ignore
+    )
+
+
+def decode_request(payload: bytes) -> Tuple[List[str], Dict[str, Any]]:
+    data = memoryview(payload)
+    (header_size,) = _SIZE.unpack_from(data)
+    options = decode_options(json.loads(bytes(data[4 : 4 + header_size])))
+    (count,) = _SIZE.unpack_from(data, 4 + header_size)
+    texts, _ = _split(data, count, 8 + header_size)
+    return [str(text, "utf-8", "surrogatepass") for text in texts], options
+
+
+def encode_response(parsed_texts: Sequence[ParsedText]) -> bytes:
+    records = [parsed_text.to_bytes() for parsed_text in parsed_texts]
+    return b"".join([_RESPONSE_HEADER.pack(STATUS_OK, len(records)), _sizes(records)] + records)
+
+
+def encode_error(message: str) -> bytes:
+    encoded = message.encode("utf-8")
+    return _RESPONSE_HEADER.pack(STATUS_ERROR, len(encoded)) + encoded
+
+
+def decode_response(payload: bytes) -> List[ParsedText]:
+    """Parsed texts of a response, raises a ValueError with the message of the server for errors."""
+    data = memoryview(payload)
+    status, count = _RESPONSE_HEADER.unpack_from(data)
+    if status != STATUS_OK:
+        raise ValueError(str(data[_RESPONSE_HEADER.size : _RESPONSE_HEADER.size + count], "utf-8"))
+    records, _ = _split(data, count, _RESPONSE_HEADER.size)
+    return [ParsedText.from_bytes(record) for record in records]
+
+
+def frame(payload: bytes) -> bytes:
+    return _SIZE.pack(len(payload)) + payload
+
+
+def warm_up(languages: Iterable[str] = tuple(_WARM_UP_TEXTS)):
+    """Load the segmentation tools of some languages, they are kept by the process once loaded."""
+    for language in languages:
+        try:
+            segment(language, _WARM_UP_TEXTS.get(language, "test"))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning(f"Couldn't load the segmentation tool of '{language}': {exc}")
+
+
+class PrepServer:
+    """
+    Preprocessing server, texts are parsed by an AsyncParser.
+
+    :param path: the Unix socket to listen on, default None to listen on a TCP port
+    :param host: the host of the TCP server
+    :param port: the port of the TCP server, 0 for any free port
+    :param parser: the AsyncParser coalescing the texts of requests. Default None, a parser with the default
+        executor of the event loop.
+    :param warm_up_languages: languages whose segmentation tool is loaded when the server starts
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        parser: Optional[AsyncParser] = None,
+        warm_up_languages: Iterable[str] = tuple(_WARM_UP_TEXTS),
+    ):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.parser = parser or AsyncParser()
+        self.warm_up_languages = list(warm_up_languages)
+        self._server: Optional[asyncio.AbstractServer] = None
+        # the tasks answering the open connections, cancelled when the server is closed
+        self._handlers: "Set[asyncio.Task]" = set()
+
+    @property
+    def address(self):
+        """The Unix socket, or the (host, port) the server listens on."""
+        if self.path is not None or self._server is None:
+            return self.path or (self.host, self.port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        await asyncio.get_event_loop().run_in_executor(None, warm_up, self.warm_up_languages)
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+        logger.info(f"Preprocessing server listening on {self.address}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:  # type: ignore
+            await self._server.serve_forever()  # type: ignore
+
+    async def close(self):
+        """Stop listening and close the open connections, their pending requests aren't answered."""
+        if self._server is not None:
+            self._server.close()
+            handlers = list(self._handlers)
+            for handler in handlers:
+                handler.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+
+    async def _respond(self, payload: bytes) -> bytes:
+        try:
+            texts, options = decode_request(payload)
+            # each text is coalesced with the texts of concurrent requests sharing the same options
+            parsed_texts = await asyncio.gather(*[self.parser.parse_text(text, **options) for text in texts])
+        except Exception as exc:  # pylint: disable=broad-except
+            return encode_error(f"{type(exc).__name__}: {exc}")
+        return encode_response(parsed_texts)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of a connection one after the other, until the client or the server closes it."""
+        handler = asyncio.current_task()
+        if handler is not None:
+            self._handlers.add(handler)
+        try:
+            while True:
+                try:
+                    (size,) = _SIZE.unpack(await reader.readexactly(_SIZE.size))
+                except asyncio.IncompleteReadError:
+                    break  # the client closed the connection
+                if size > MAX_FRAME_SIZE:
+                    logger.warning(f"Closing a connection sending a frame of {size} bytes")
+                    break
+                writer.write(frame(await self._respond(await reader.readexactly(size))))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # the server is closed
+        finally:
+            if handler is not None:
+                self._handlers.discard(handler)
+            writer.close()
+
+
+def serve(
+    path: Optional[str] = None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = 1,
+    max_batch_size: int = 128,
+    max_delay: float = 0.002,
+):
+    """
+    Run a preprocessing server until it's interrupted.
+
+    :param path: the Unix socket to listen on, default None to listen on a TCP port
+    :param host: the host of the TCP server
+    :param port: the port of the TCP server
+    :param workers: the number of processes parsing the batches, 1 to parse them in a thread of the server
+    :param max_batch_size: maximum number of texts in a batch
+    :param max_delay: maximum time in seconds a text waits for other texts to be coalesced with
+    """
+    executor: Optional[Executor] = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+    parser = AsyncParser(
+        executor=executor, max_concurrency=max(workers, 1), max_batch_size=max_batch_size, max_delay=max_delay
+    )
+    server = PrepServer(path=path, host=host, port=port, parser=parser)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="tweet-nlp-serve", description="Run a preprocessing server.")
+    parser.add_argument("--socket", dest="path", help="Unix socket to listen on, default a TCP port of localhost")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="number of processes parsing the batches")
+    parser.add_argument("--max-batch-size", type=int, default=128, help="maximum number of texts in a batch")
+    parser.add_argument("--max-delay", type=float, default=0.002, help="seconds a text waits to be batched")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    serve(
+        path=args.path,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_batch_size=args.max_batch_size,
+        max_delay=args.max_delay,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
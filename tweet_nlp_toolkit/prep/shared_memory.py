@@ -0,0 +1,156 @@
+"""
+Shared-memory transport of the results of the parallel batch parser.
+
+Results returned by pool workers are pickled and sent through a pipe. Instead, a worker writes the parsed texts of a
+chunk into a `multiprocessing.shared_memory` block: the offsets of the records followed by the records, in the
+binary representation of ParsedText.to_bytes (token lengths, kinds and utf-8 blob). Only the name of the block goes
+through the pipe, and the parent decodes a parsed text only when it's accessed.
+
+Usage Example:
+
+    from tweet_nlp_toolkit.prep.shared_memory import iter_shared_batches
+
+    for batch in iter_shared_batches(texts, chunk_size=100000, workers=8, mentions="tag"):
+        with batch:
+            for parsed_text in batch:
+                ...
+
+`parse_stream(texts, workers=8, shared_memory=True)` uses it transparently.
+"""
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from tweet_nlp_toolkit.prep.text_parser import ParsedText, parse_many
+
+_OFFSET = struct.Struct("<q")
+
+
+def _buffer(block: shared_memory.SharedMemory) -> memoryview:
+    """The buffer of a shared memory block, which is None once the block is closed."""
+    if block.buf is None:
+        raise ValueError("the shared memory block is closed")
+    return block.buf
+
+
+class SharedBatch(NamedTuple):
+    """Descriptor of parsed texts written in a shared memory block."""
+
+    name: str
+    n_texts: int
+
+
+def write_shared_batch(parsed_texts: Sequence[ParsedText], kinds: bool = False) -> SharedBatch:
+    """
+    Write parsed texts in a new shared memory block, it's owned by the reader of the batch which unlinks it.
+
+    :param parsed_texts: the parsed texts
+    :param kinds: whether to store the kind of each token, computed by the writer
+    :return: the descriptor of the block
+    """
+    records = [parsed_text.to_bytes(kinds=kinds) for parsed_text in parsed_texts]
+    offsets = array("q", [_OFFSET.size * (len(records) + 1)])
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    data = offsets.tobytes() + b"".join(records)
+    block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    if os.name == "posix":
+        # the reader registers the block again when attaching it, and unregisters it when unlinking it. POSIX blocks
+        # are tracked by their name with a leading slash, which `name` strips.
+        resource_tracker.unregister("/" + block.name, "shared_memory")
+    try:
+        _buffer(block)[: len(data)] = data
+        return SharedBatch(name=block.name, n_texts=len(records))
+    finally:
+        block.close()
+
+
+def _parse_shared_batch(texts: List[str], kinds: bool, kwargs) -> SharedBatch:
+    return write_shared_batch(parse_many(texts, **kwargs), kinds=kinds)
+
+
+class SharedParsedTexts(Sequence[ParsedText]):
+    """
+    Parsed texts of a shared memory block, decoded on access.
+    The block is unlinked by `close`, parsed texts already accessed remain valid.
+
+    :param batch: the descriptor of the block
+    """
+
+    def __init__(self, batch: SharedBatch):
+        self._block: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(name=batch.name)
+        self._count = batch.n_texts
+        self._offsets = array("q")
+        self._offsets.frombytes(_buffer(self._block)[: _OFFSET.size * (batch.n_texts + 1)])
+        if sys.byteorder == "big":
+            self._offsets.byteswap()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("parsed text index out of range")
+        if self._block is None:
+            raise ValueError("the shared memory block is closed")
+        with _buffer(self._block)[self._offsets[index] : self._offsets[index + 1]] as record:
+            return ParsedText.from_bytes(record)
+
+    def close(self):
+        """Release and unlink the shared memory block."""
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+
+def iter_shared_batches(
+    texts: Iterable[str], chunk_size: int = 10000, workers: int = 2, kinds: bool = False, **kwargs
+) -> Iterator[SharedParsedTexts]:
+    """
+    Preprocess a stream of texts in chunks with several processes, the results are transported in shared memory.
+    At most `2 * workers` chunks are parsed ahead of the consumer, the caller should close each batch once used.
+
+    :param texts: the texts to preprocess
+    :param chunk_size: the number of texts of a batch
+    :param workers: the number of processes
+    :param kinds: whether the workers compute the kind of each token
+    :param kwargs: arguments for the parse_text function
+    :return: an iterator of SharedParsedTexts, in the same order as the texts
+    """
+    if chunk_size < 1 or workers < 1:
+        raise ValueError("chunk_size and workers should be positive")
+    iterator = iter(texts)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(_parse_shared_batch, chunk, kinds, kwargs))
+                if len(pending) >= 2 * workers:
+                    yield SharedParsedTexts(pending.popleft().result())
+            while pending:
+                yield SharedParsedTexts(pending.popleft().result())
+        finally:
+            # batches that won't be consumed, e.g. when the consumer stops early
+            for future in pending:
+                if not future.cancel() and future.exception() is None:
+                    SharedParsedTexts(future.result()).close()
@@ -3,13 +3,50 @@ Text parser.
 """
 import html
 import re
-from typing import List, Optional, Callable, Set
+import struct
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, islice
+from typing import Dict, List, Optional, Callable, Set, Iterable, Iterator
 
 from tweet_nlp_toolkit.constants import UNENCODABLE_CHAR
 from tweet_nlp_toolkit.prep.regexes import LENGTHENING_PATTERN
-from tweet_nlp_toolkit.prep.tokenizer import tweet_tokenize
-from tweet_nlp_toolkit.prep.token import Token, Action
-from tweet_nlp_toolkit.utils import strip_accents_unicode, remove_variation_selectors
+from tweet_nlp_toolkit.prep.tokenizer import tokenize_with_time_budget, tweet_tokenize
+from tweet_nlp_toolkit.prep.token import (
+    Action,
+    ENTITY_KINDS,
+    Token,
+    TOKEN_CLASSES,
+    TOKEN_KINDS,
+    is_stop_word_value,
+    token_class_code,
+)
+from tweet_nlp_toolkit.utils import get_stop_words, strip_accents_unicode, remove_variation_selectors
+
+# parse_text option -> Action condition, in the order the actions are applied, a token gets the first valid action
+ACTION_CONDITIONS = {
+    "mentions": "is_mention",
+    "hashtags": "is_hashtag",
+    "urls": "is_url",
+    "digits": "is_digit",
+    "emojis": "is_emoji",
+    "emoticons": "is_emoticon",
+    "puncts": "is_punct",
+    "emails": "is_email",
+    "stop_words": "is_stop_word",
+    "html_tags": "is_html_tag",
+}
+# Binary representation of a parsed text, see ParsedText.to_bytes
+_PARSED_TEXT_HEADER = struct.Struct("<BBI")  # version, flags, number of tokens
+_SERIALIZATION_VERSION = 1
+_WITH_KINDS = 1
+_WITH_CLASSES = 2
+_WITH_LANGS = 4
+_WITH_VALUE = 8
+_NO_LANG = 0xFF
+_KIND_CODES = {kind: code for code, kind in enumerate(TOKEN_KINDS)}
 
 
 class ParsedText:
@@ -41,6 +78,108 @@ class ParsedText:
     def __setitem__(self, key, value):
         self._tokens[key].value = value
 
+    def __reduce_ex__(self, protocol):
+        # pickled as a single bytes object instead of a list of Token objects, e.g. between processes. Tokens of
+        # classes that aren't in TOKEN_CLASSES can't be serialized, texts using them are pickled as usual.
+        if all(type(token) in TOKEN_CLASSES for token in self._tokens):
+            return ParsedText.from_bytes, (self.to_bytes(),)
+        return super().__reduce_ex__(protocol)
+
+    def to_bytes(self, kinds: bool = False) -> bytes:
+        """
+        Compact binary representation of the parsed text.
+
+        Layout: a header (version, flags, number of tokens), the length of each token in characters (little-endian
+        uint32), then optionally the kind of each token, the class of each token and the language of each token, the
+        separator of the tokens, the value of the text when it isn't the tokens joined by the separator, and the utf-8
+        tokens.
+
+        :param kinds: whether to include the kind of each token, see Token.kind, so that it's not computed again
+        :return: the bytes, decoded by `from_bytes`. A TypeError is raised if the class of a token isn't in
+            TOKEN_CLASSES.
+        """
+        values = [token.value for token in self._tokens]
+        lengths = array("I", map(len, values))
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        flags = 0
+        sections = [lengths.tobytes()]
+        if kinds:
+            flags |= _WITH_KINDS
+            sections.append(bytes(_KIND_CODES[token.kind] for token in self._tokens))
+        # exact classes: subclasses of Token, including unknown ones, need their class stored
+        if any(type(token) is not Token for token in self._tokens):  # pylint: disable=unidiomatic-typecheck
+            flags |= _WITH_CLASSES
+            sections.append(bytes(token_class_code(type(token)) for token in self._tokens))
+        if any(token.lang is not None for token in self._tokens):
+            flags |= _WITH_LANGS
+            for token in self._tokens:
+                lang = b"" if token.lang is None else token.lang.encode("utf-8")
+                sections.append(bytes([_NO_LANG if token.lang is None else len(lang)]) + lang)
+        split = self._split.encode("utf-8")
+        sections.append(bytes([len(split)]) + split)
+        if self._value is not None and self._value != self._split.join(values):
+            flags |= _WITH_VALUE
+            value = self._value.encode("utf-8", "surrogatepass")
+            sections.append(struct.pack("<I", len(value)) + value)
+        header = _PARSED_TEXT_HEADER.pack(_SERIALIZATION_VERSION, flags, len(self._tokens))
+        return b"".join([header] + sections + ["".join(values).encode("utf-8", "surrogatepass")])
+
+    @classmethod
+    def from_bytes(cls, data) -> "ParsedText":
+        """
+        Parsed text encoded by `to_bytes`.
+
+        :param data: bytes, or a memoryview e.g. of a memory-mapped file
+        :return: a ParsedText instance
+        """
+        data = memoryview(data)
+        version, flags, n_tokens = _PARSED_TEXT_HEADER.unpack_from(data)
+        if version != _SERIALIZATION_VERSION:
+            raise ValueError(f"unsupported serialization version {version}")
+        position = _PARSED_TEXT_HEADER.size
+        lengths = array("I", data[position : position + 4 * n_tokens].tobytes())
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        position += 4 * n_tokens
+        token_kinds = None
+        if flags & _WITH_KINDS:
+            token_kinds = [TOKEN_KINDS[code] for code in data[position : position + n_tokens]]
+            position += n_tokens
+        classes = [Token] * n_tokens
+        if flags & _WITH_CLASSES:
+            classes = [TOKEN_CLASSES[code] for code in data[position : position + n_tokens]]
+            position += n_tokens
+        langs: List[Optional[str]] = [None] * n_tokens
+        if flags & _WITH_LANGS:
+            for i in range(n_tokens):
+                lang_length = data[position]
+                position += 1
+                if lang_length != _NO_LANG:
+                    langs[i] = str(data[position : position + lang_length], "utf-8")
+                    position += lang_length
+        split_length = data[position]
+        split = str(data[position + 1 : position + 1 + split_length], "utf-8")
+        position += 1 + split_length
+        value = None
+        if flags & _WITH_VALUE:
+            (value_length,) = struct.unpack_from("<I", data, position)
+            value = str(data[position + 4 : position + 4 + value_length], "utf-8", "surrogatepass")
+            position += 4 + value_length
+
+        text = str(data[position:], "utf-8", "surrogatepass")
+        ends = list(accumulate(lengths))
+        tokens = [
+            token_class(text[end - length : end], lang)
+            for token_class, length, end, lang in zip(classes, lengths, ends, langs)
+        ]
+        if token_kinds is not None:
+            for token, kind in zip(tokens, token_kinds):
+                token._kind = kind  # pylint: disable=protected-access
+        parsed_text = cls(tokens=tokens, split=split)
+        parsed_text._value = value
+        return parsed_text
+
     def process(
         self,
         mentions_action=None,
@@ -55,23 +194,42 @@ class ParsedText:
         stop_words_action=None,
     ):
         """Process tokens."""
+        action_names = {
+            "mentions": mentions_action,
+            "hashtags": hashtags_action,
+            "urls": urls_action,
+            "digits": digits_action,
+            "emojis": emojis_action,
+            "emoticons": emoticons_action,
+            "puncts": puncts_action,
+            "emails": emails_action,
+            "stop_words": stop_words_action,
+            "html_tags": html_tags_action,
+        }
+        actions = [
+            Action(action_name=action_names[option], action_condition=condition)
+            for option, condition in ACTION_CONDITIONS.items()
+        ]
         for token in self.tokens:
-            for action in [
-                Action(action_name=mentions_action, action_condition="is_mention"),
-                Action(action_name=hashtags_action, action_condition="is_hashtag"),
-                Action(action_name=urls_action, action_condition="is_url"),
-                Action(action_name=digits_action, action_condition="is_digit"),
-                Action(action_name=emojis_action, action_condition="is_emoji"),
-                Action(action_name=emoticons_action, action_condition="is_emoticon"),
-                Action(action_name=puncts_action, action_condition="is_punct"),
-                Action(action_name=emails_action, action_condition="is_email"),
-                Action(action_name=stop_words_action, action_condition="is_stop_word"),
-                Action(action_name=html_tags_action, action_condition="is_html_tag"),
-            ]:
+            for action in actions:
                 if token.do_action(action):
                     break
         self._tokens = [token for token in self.tokens if len(token)]  # filter removed tokens
 
+    def remove_stop_words(self, lang: Optional[str] = None):
+        """
+        Remove the stop words from the tokens in one pass.
+
+        :param lang: the language of the text, e.g. get_language(text), whose stop words are compared to the token
+            values whatever their case. None to use the language of each token, see Token.is_stop_word
+        """
+        if lang is None:
+            self._tokens = [token for token in self._tokens if not token.is_stop_word]
+        else:
+            stop_words = get_stop_words(lang)
+            self._tokens = [token for token in self._tokens if not is_stop_word_value(token.value, stop_words)]
+        self._value = None
+
     def post_process(self):
         text = self.value
         text = re.sub(r"\s+", " ", text)  # get rid of redundant spaces
@@ -116,6 +274,20 @@ class ParsedText:
     def urls(self) -> List[str]:
         return [token.value for token in self._tokens if token.is_url]
 
+    def entities(self, kinds: Iterable[str] = tuple(ENTITY_KINDS)) -> Dict[str, List[str]]:
+        """
+        The values of the tokens of some kinds, in one pass over the tokens.
+
+        :param kinds: kinds of tokens, see TOKEN_KINDS. Default hashtags, mentions and URLs.
+        :return: kind -> the values of the tokens of this kind, in order
+        """
+        entities: Dict[str, List[str]] = {kind: [] for kind in kinds}
+        for token in self._tokens:
+            values = entities.get(token.kind)
+            if values is not None:
+                values.append(token.value)
+        return entities
+
 
 def parse_text(
     text: str,
@@ -136,6 +308,7 @@ def parse_text(
     emails: Optional[str] = None,
     html_tags: Optional[str] = None,
     stop_words: Optional[str] = None,
+    time_budget: Optional[float] = None,
 ):
     """
     Preprocess the text
@@ -196,6 +369,8 @@ def parse_text(
         Options:
             - "remove": delete all hashtags
             - "tag": replaces the hashtag by a tag <HASHTAG>
+            - "segment": replaces the hashtag by its words, e.g. #MakeAmericaGreat -> make america great, see
+                hashtag_segmentation
         Default None
     urls: Optional[str]
         How to handle urls.
@@ -238,27 +413,66 @@ def parse_text(
         Options:
             - "remove": delete all HTML tags
         Default None
-    html_tags: Optional[str]
-        How to handle HTML tags like <div>.
-        Options:
-            - "remove": delete all HTML tags
-        Default None
     stop_words: Optional[str]
-        How to handle stop words.
-        Options:
-            - "remove": delete all HTML tags
-        Default None
-    stop_words
-        How to handle stop words. Only English stop words are supported
+        How to handle the stop words of the language of each token, see utils.get_stop_words.
         Options:
-            - "remove"
+            - "remove": delete all stop words
         Default None
+    time_budget: Optional[float]
+        Maximum time in seconds spent tokenizing the text with regular expressions. Pathological texts exceeding it
+        are tokenized on white spaces instead, see tokenize_with_time_budget.
+        Default None, no time budget
 
     Returns
     -------
         A ParsedText instance.
     """
     # TODO: check all parameters
+    tokens = tokenize_text(
+        text,
+        tokenizer=tokenizer,
+        encoding=encoding,
+        remove_unencodable_char=remove_unencodable_char,
+        to_lower=to_lower,
+        strip_accents=strip_accents,
+        reduce_len=reduce_len,
+        filters=filters,
+        time_budget=time_budget,
+    )
+    parsed_text = ParsedText(tokens=tokens)
+    parsed_text.process(
+        mentions_action=mentions,
+        hashtags_action=hashtags,
+        urls_action=urls,
+        digits_action=digits,
+        emojis_action=emojis,
+        emoticons_action=emoticons,
+        puncts_action=puncts,
+        emails_action=emails,
+        stop_words_action=stop_words,
+        html_tags_action=html_tags,
+    )
+    parsed_text.post_process()
+    return parsed_text
+
+
+def tokenize_text(
+    text: str,
+    tokenizer: Callable[[str], List[Token]] = tweet_tokenize,
+    encoding: str = "utf-8",
+    remove_unencodable_char: bool = False,
+    to_lower: bool = True,
+    strip_accents: bool = False,
+    reduce_len: bool = False,
+    filters: Optional[Set[str]] = None,
+    time_budget: Optional[float] = None,
+) -> List[Token]:
+    """
+    Normalize and tokenize the text, the first step of parse_text before the actions are applied.
+    The parameters are the same as parse_text's.
+
+    :return: the list of tokens
+    """
     if filters is None:
         filters = set()
     if encoding is not None:
@@ -282,22 +496,67 @@ def parse_text(
     text = re.sub(r"(\w+)\?(\w+)", r"\g<1>'\g<2>", text)  # c?est -> c'est
 
     text = html.unescape(text)  # &pound;100 -> £100
-    tokens = [tk for tk in tokenizer(text) if tk not in filters]
-    parsed_text = ParsedText(tokens=tokens)
-    parsed_text.process(
-        mentions_action=mentions,
-        hashtags_action=hashtags,
-        urls_action=urls,
-        digits_action=digits,
-        emojis_action=emojis,
-        emoticons_action=emoticons,
-        puncts_action=puncts,
-        emails_action=emails,
-        stop_words_action=stop_words,
-        html_tags_action=html_tags,
-    )
-    parsed_text.post_process()
-    return parsed_text
+    if time_budget is not None:
+        tokens = tokenize_with_time_budget(text, tokenizer, time_budget)
+    else:
+        tokens = tokenizer(text)
+    return [tk for tk in tokens if tk not in filters]
+
+
+def parse_many(texts: Iterable[str], **kwargs) -> List[ParsedText]:
+    """
+    Preprocess a batch of texts sharing the same options.
+
+    :param texts: the texts to preprocess
+    :param kwargs: arguments for the parse_text function
+    :return: a list of ParsedText instances, in the same order as the texts
+    """
+    return [parse_text(text, **kwargs) for text in texts]
+
+
+def parse_stream(
+    texts: Iterable[str], chunk_size: int = 1000, workers: int = 1, shared_memory: bool = False, **kwargs
+) -> Iterator[ParsedText]:
+    """
+    Preprocess a stream of texts in chunks, optionally with several processes.
+    Texts are read lazily, at most `2 * workers` chunks are parsed ahead of the consumer.
+
+    :param texts: the texts to preprocess
+    :param chunk_size: the number of texts sent at once to the batch parser
+    :param workers: the number of processes, 1 to parse in the current process
+    :param shared_memory: whether the workers send their results through shared memory instead of a pipe, see
+        `tweet_nlp_toolkit.prep.shared_memory`. Worth it for large chunks.
+    :param kwargs: arguments for the parse_text function
+    :return: an iterator of ParsedText instances, in the same order as the texts
+    """
+    if chunk_size < 1 or workers < 1:
+        raise ValueError("chunk_size and workers should be positive")
+    iterator = iter(texts)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    if workers == 1:
+        for chunk in chunks:
+            yield from parse_many(chunk, **kwargs)
+        return
+
+    if shared_memory:
+        # the shared memory transport is built on this module, it's only imported when it's used
+        from tweet_nlp_toolkit.prep.shared_memory import (  # pylint: disable=import-outside-toplevel,cyclic-import
+            iter_shared_batches,
+        )
+
+        for batch in iter_shared_batches(iterator, chunk_size=chunk_size, workers=workers, **kwargs):
+            with batch:
+                yield from batch
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(parse_many, chunk, **kwargs))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 
 def reduce_lengthening(text):
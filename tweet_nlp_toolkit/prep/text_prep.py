@@ -1,12 +1,35 @@
 """
 Text preprocessing.
 """
-import codecs
+
+import json
 import logging
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 import contractions
 
+from tweet_nlp_toolkit.prep.file_io import (
+    Checkpoint,
+    COLUMNAR_FORMATS,
+    concatenate_files,
+    decode_record,
+    encode_record,
+    DEFAULT_BUFFER_SIZE,
+    FILE_FORMATS,
+    infer_compression,
+    INFER_COMPRESSION,
+    TEXT_FORMAT,
+    iter_lines,
+    iter_mmap_lines,
+    open_binary,
+    read_checkpoint,
+    remove_checkpoint,
+    SegmentedFileWriter,
+    shard_ranges,
+    write_checkpoint,
+)
 from tweet_nlp_toolkit.prep.regexes import URL_PAT, QUOTES_PAT, RT_MENTION_PAT, APOSTROPHES_PAT
 from tweet_nlp_toolkit.prep.text_parser import parse_text
 
@@ -42,18 +65,274 @@ def prep(text, **kwargs):
     return parse_text(text=text, **kwargs).value
 
 
-def prep_file(filename, outfile, **kwargs):
+def prep_file(
+    filename,
+    outfile,
+    input_format=TEXT_FORMAT,
+    output_format=None,
+    text_field="text",
+    input_compression=INFER_COMPRESSION,
+    output_compression=INFER_COMPRESSION,
+    buffer_size=DEFAULT_BUFFER_SIZE,
+    checkpoint_interval=None,
+    resume=False,
+    index_file=None,
+    row_group_size=None,
+    **kwargs,
+):
     """
     Preprocess a file, assuming it's supposed to be utf-8
-    :param filename:
-    :param outfile:
+
+    Text files are read with escape sequences decoded (e.g. \\u2019), JSON lines files hold one JSON object per line
+    and only their text field is preprocessed, the other fields are written untouched.
+
+    With checkpoints, the output written so far is committed every `checkpoint_interval` lines along with the input
+    offset in `<outfile>.checkpoint`. After a crash, calling prep_file again with `resume=True` continues from the
+    last checkpoint. The checkpoint file is removed once the file is fully preprocessed.
+
+    With the "parquet" and "arrow" output formats, the preprocessed texts are written as columns (text, tokens,
+    entities and input line number) in row groups of `row_group_size` texts, see `tweet_nlp_toolkit.prep.columnar`
+    (requires pyarrow). The output compression is then a codec of pyarrow, and checkpoints aren't supported.
+
+    With `index_file`, the hashtags, mentions and URLs of the preprocessed texts are indexed by input line number,
+    see `tweet_nlp_toolkit.features.entity_index` (requires numpy).
+
+    :param filename: the input file
+    :param outfile: the output file
+    :param input_format: "text" or "jsonl"
+    :param output_format: "text", "jsonl", "parquet" or "arrow", default the input format
+    :param text_field: the dotted path of the text in JSON objects, e.g. "extended_tweet.full_text"
+    :param input_compression: "gzip", "bz2", "xz", "zstd", None, or "infer" to infer it from the file extension
+    :param output_compression: "gzip", "bz2", "xz", "zstd", None, or "infer" to infer it from the file extension
+    :param buffer_size: the number of bytes buffered before being written to the output file
+    :param checkpoint_interval: the number of lines between checkpoints, default None for no checkpoints
+    :param resume: whether to resume from the last checkpoint, if any
+    :param index_file: the file of the entity index, default None for no index
+    :param row_group_size: the number of texts of the row groups of columnar output formats
     :param kwargs: arguments for the prep function
     :return:
     """
-    with codecs.open(filename, encoding="unicode_escape") as int_f:
-        with open(outfile, "w", encoding="utf-8") as out_f:
-            for line in int_f:
-                out_f.write(prep(line, encoding="utf-8", **kwargs) + "\n")
+    output_format = output_format or input_format
+    _check_formats(input_format, output_format)
+    if checkpoint_interval is not None and checkpoint_interval < 1:
+        raise ValueError("checkpoint_interval should be positive")
+    if output_format in COLUMNAR_FORMATS and (checkpoint_interval is not None or resume):
+        raise ValueError(f"checkpoints aren't supported with the {output_format} output format")
+    index = None
+    if index_file is not None:
+        if resume:
+            raise ValueError("an entity index can't be built when resuming from a checkpoint")
+        from tweet_nlp_toolkit.features.entity_index import (  # pylint: disable=import-outside-toplevel
+            EntityIndexBuilder,
+        )
+
+        index = EntityIndexBuilder()
+
+    if output_format in COLUMNAR_FORMATS:
+        _prep_file_columnar(
+            filename,
+            outfile,
+            input_format,
+            output_format,
+            text_field,
+            input_compression,
+            None if output_compression == INFER_COMPRESSION else output_compression,
+            buffer_size,
+            row_group_size,
+            index,
+            **kwargs,
+        )
+        if index is not None:
+            index.save(index_file)
+        return
+
+    checkpoint = (read_checkpoint(outfile) if resume else None) or Checkpoint()
+    if checkpoint.lines:
+        logger.info(f"Resuming the preprocessing of {filename} from line {checkpoint.lines}")
+    input_offset, lines = checkpoint.input_offset, checkpoint.lines
+    with open_binary(filename, "rb", input_compression) as in_f:
+        in_f.seek(input_offset)
+        with SegmentedFileWriter(outfile, output_compression, buffer_size, checkpoint.output_offset) as writer:
+            for line in iter_lines(in_f, buffer_size):
+                processed_line = _prep_line(line, input_format, output_format, text_field, index, lines, **kwargs)
+                if processed_line is not None:
+                    writer.write_line(processed_line)
+                input_offset += len(line)
+                lines += 1
+                if checkpoint_interval and lines % checkpoint_interval == 0:
+                    write_checkpoint(outfile, Checkpoint(input_offset, writer.commit(), lines))
+    if index is not None:
+        index.save(index_file)
+    remove_checkpoint(outfile)
+
+
+def _prep_file_columnar(
+    filename,
+    outfile,
+    input_format,
+    output_format,
+    text_field,
+    input_compression,
+    output_compression,
+    buffer_size,
+    row_group_size,
+    index,
+    **kwargs,
+):
+    """Preprocess a file into a Parquet or Arrow file, see prep_file."""
+    from tweet_nlp_toolkit.prep.columnar import (  # pylint: disable=import-outside-toplevel
+        DEFAULT_ROW_GROUP_SIZE,
+        ParsedTextTableWriter,
+    )
+
+    with open_binary(filename, "rb", input_compression) as in_f, ParsedTextTableWriter(
+        outfile,
+        output_format,
+        line_numbers=True,
+        row_group_size=row_group_size or DEFAULT_ROW_GROUP_SIZE,
+        compression=output_compression,
+    ) as writer:
+        for line_number, line in enumerate(iter_lines(in_f, buffer_size)):
+            _, text = decode_record(line, input_format, text_field)
+            if text is None:
+                continue
+            parsed_text = parse_text(text, encoding="utf-8", **kwargs)
+            if index is not None:
+                index.add(line_number, parsed_text)
+            writer.write(parsed_text, line_number)
+
+
+def _check_formats(input_format, output_format, columnar_output=True):
+    """Raise a ValueError for unknown file formats, or for columnar output formats when they aren't supported."""
+    if input_format not in FILE_FORMATS:
+        raise ValueError(f"unknown file format '{input_format}', expected one of {FILE_FORMATS}")
+    if output_format in COLUMNAR_FORMATS and not columnar_output:
+        raise ValueError(f"the {output_format} output format isn't supported, expected one of {FILE_FORMATS}")
+    if output_format not in FILE_FORMATS + COLUMNAR_FORMATS:
+        raise ValueError(f"unknown file format '{output_format}', expected one of {FILE_FORMATS + COLUMNAR_FORMATS}")
+
+
+def prep_file_range(
+    filename,
+    outfile,
+    start=0,
+    end=None,
+    input_format=TEXT_FORMAT,
+    output_format=None,
+    text_field="text",
+    output_compression=INFER_COMPRESSION,
+    buffer_size=DEFAULT_BUFFER_SIZE,
+    **kwargs,
+):
+    """
+    Preprocess the lines of an uncompressed file within a byte range, reading it through mmap.
+    The range should be aligned on line breaks, see `tweet_nlp_toolkit.prep.file_io.shard_ranges`.
+
+    :param filename: the uncompressed input file
+    :param outfile: the output file
+    :param start: the first byte of the range
+    :param end: the end of the range (excluded), default the end of the file
+    :param kwargs: the other arguments are the same as prep_file's
+    :return: the number of lines preprocessed
+    """
+    output_format = output_format or input_format
+    _check_formats(input_format, output_format, columnar_output=False)
+    lines = 0
+    with SegmentedFileWriter(outfile, output_compression, buffer_size) as writer:
+        for line in iter_mmap_lines(filename, start, end):
+            processed_line = _prep_line(line, input_format, output_format, text_field, **kwargs)
+            if processed_line is not None:
+                writer.write_line(processed_line)
+            lines += 1
+    return lines
+
+
+def _prep_shard(shard):
+    filename, outfile, start, end, kwargs = shard
+    return prep_file_range(filename, outfile, start, end, **kwargs)
+
+
+def prep_file_sharded(
+    filename,
+    outfile,
+    workers=None,
+    n_shards=None,
+    concatenate=True,
+    input_format=TEXT_FORMAT,
+    output_format=None,
+    text_field="text",
+    output_compression=INFER_COMPRESSION,
+    buffer_size=DEFAULT_BUFFER_SIZE,
+    **kwargs,
+):
+    """
+    Preprocess a large uncompressed file with several processes, into a text or JSON lines file.
+
+    The file is split into byte ranges aligned on line breaks, each worker memory-maps the file and preprocesses its
+    own ranges into `<outfile>.<shard>` (only the offsets are sent to the workers). The shards are then concatenated
+    into `outfile`, or listed in the manifest `<outfile>.manifest.json` when `concatenate` is False, e.g. to be
+    gathered from several nodes.
+
+    :param filename: the uncompressed input file
+    :param outfile: the output file
+    :param workers: the number of processes, default the number of CPUs
+    :param n_shards: the number of shards, default the number of workers
+    :param concatenate: whether to concatenate the shards into `outfile` or to write a manifest
+    :param kwargs: the other arguments are the same as prep_file's
+    :return: the path of the output file or of the manifest
+    """
+    _check_formats(input_format, output_format or input_format, columnar_output=False)
+    if infer_compression(filename) is not None:
+        raise ValueError("sharded preprocessing requires an uncompressed input file")
+    workers = workers or os.cpu_count() or 1
+    if output_compression == INFER_COMPRESSION:
+        output_compression = infer_compression(outfile)
+    kwargs = dict(
+        kwargs,
+        input_format=input_format,
+        output_format=output_format,
+        text_field=text_field,
+        output_compression=output_compression,
+        buffer_size=buffer_size,
+    )
+    ranges = shard_ranges(filename, n_shards or workers)
+    shards = [(filename, f"{outfile}.{i:05d}", start, end, kwargs) for i, (start, end) in enumerate(ranges)]
+    if workers == 1:
+        lines = [_prep_shard(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            lines = list(executor.map(_prep_shard, shards))
+
+    shard_files = [shard_file for _, shard_file, _, _, _ in shards]
+    if concatenate:
+        concatenate_files(shard_files, outfile)
+        return outfile
+    manifest = f"{outfile}.manifest.json"
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "input": filename,
+                "shards": [
+                    {"path": shard_file, "start": start, "end": end, "lines": shard_lines}
+                    for shard_file, (start, end), shard_lines in zip(shard_files, ranges, lines)
+                ],
+            },
+            f,
+            indent=2,
+        )
+    return manifest
+
+
+def _prep_line(line, input_format, output_format, text_field, index=None, doc_id=None, **kwargs):
+    """Preprocess a line of a file, None if there is nothing to write. Its entities are added to the index, if any."""
+    record, text = decode_record(line, input_format, text_field)
+    if text is not None and index is None:
+        text = prep(text, encoding="utf-8", **kwargs)
+    elif text is not None:
+        parsed_text = parse_text(text, encoding="utf-8", **kwargs)
+        index.add(doc_id, parsed_text)
+        text = parsed_text.value
+    return encode_record(record, text, line, output_format, text_field)
 
 
 def normalize_apos(
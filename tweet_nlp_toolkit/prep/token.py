@@ -2,10 +2,9 @@
 Token.
 """
 import re
+import struct
 import unicodedata
-
-import emoji
-from emoji import EMOJI_ALIAS_UNICODE_ENGLISH, UNICODE_EMOJI_ENGLISH
+from typing import FrozenSet, Iterable, List, Optional, Type
 
 from tweet_nlp_toolkit.constants import (
     MENTION_TAG,
@@ -16,8 +15,11 @@ from tweet_nlp_toolkit.constants import (
     EMOTICON_TAG,
     PUNCTUATION_TAG,
     EMAIL_TAG,
+    TAGS,
     UNKNOWN_LANGUAGE,
 )
+from tweet_nlp_toolkit.prep import emojis
+from tweet_nlp_toolkit.prep.hashtag_segmentation import segment_hashtag
 from tweet_nlp_toolkit.prep.regexes import (
     WEIBO_HASHTAG,
     NOT_A_HASHTAG_PATTERN,
@@ -31,6 +33,78 @@ from tweet_nlp_toolkit.prep.regexes import (
 )
 from tweet_nlp_toolkit.utils import get_stop_words
 
+# Kinds of tokens, see Token.kind
+TAG_KIND = "tag"
+WORD_KIND = "word"
+_KIND_CONDITIONS = [
+    ("mention", "is_mention"),
+    ("hashtag", "is_hashtag"),
+    ("url", "is_url"),
+    ("digit", "is_digit"),
+    ("emoji", "is_emoji"),
+    ("emoticon", "is_emoticon"),
+    ("punct", "is_punct"),
+    ("email", "is_email"),
+    ("html_tag", "is_html_tag"),
+]
+TOKEN_KINDS = [TAG_KIND] + [kind for kind, _ in _KIND_CONDITIONS] + [WORD_KIND]
+# kinds of the tokens extracted as entities by default
+ENTITY_KINDS = ["hashtag", "mention", "url"]
+_TAGS = frozenset(TAGS)
+
+# Binary representation of a token: class code, length of the language
+_TOKEN_HEADER = struct.Struct("<BB")
+_NO_LANG = 0xFF
+
+# All Unicode punctuations are in the Basic and Supplementary Multilingual Planes
+_PUNCTUATION_TABLE_SIZE = 0x20000
+_PUNCTUATION_CHARS: Optional[FrozenSet[str]] = None
+
+
+# The following function is copied from https://github.com/google-research/bert/blob/master/tokenization.py#L386
+def _is_punctuation_char(char):
+    """Checks whether `chars` is a punctuation character."""
+    cp = ord(char)
+    # We treat all non-letter/number ASCII as punctuation.
+    # Characters such as "^", "$", and "`" are not in the Unicode
+    # Punctuation class but we treat them as punctuation anyways, for
+    # consistency.
+    if (33 <= cp <= 47) or (58 <= cp <= 64) or (91 <= cp <= 96) or (123 <= cp <= 126):
+        return True
+    cat = unicodedata.category(char)
+    if cat.startswith("P"):
+        return True
+    return False
+
+
+def _get_punctuation_chars() -> FrozenSet[str]:
+    """Punctuation characters of the first two Unicode planes, built once on first use."""
+    global _PUNCTUATION_CHARS  # pylint: disable=global-statement
+    if _PUNCTUATION_CHARS is None:
+        _PUNCTUATION_CHARS = frozenset(
+            chr(cp) for cp in range(_PUNCTUATION_TABLE_SIZE) if _is_punctuation_char(chr(cp))
+        )
+    return _PUNCTUATION_CHARS
+
+
+def punctuation_mask(values: Iterable[str]) -> List[bool]:
+    """
+    Whether each value is a punctuation character, for a whole batch of tokens at once.
+    Values longer than one character are never punctuations.
+    """
+    punctuation_chars = _get_punctuation_chars()
+    return [
+        value in punctuation_chars
+        or (len(value) == 1 and ord(value) >= _PUNCTUATION_TABLE_SIZE and _is_punctuation_char(value))
+        for value in map(str, values)
+    ]
+
+
+def is_stop_word_value(value: str, stop_words: FrozenSet[str]) -> bool:
+    """Whether a token value is a stop word, whatever its case."""
+    # values are already lowercase unless parsed with to_lower=False
+    return value in stop_words or (not value.islower() and value.lower() in stop_words)
+
 
 class Token:
     """
@@ -43,10 +117,35 @@ class Token:
         super().__init__()
         self._value = value
         self._lang = lang
+        self._kind = None
+
+    def __reduce_ex__(self, protocol):
+        # the kind is cheap to recompute compared to the size of a pickled __dict__. Subclasses that aren't in
+        # TOKEN_CLASSES may take other arguments or have other attributes, they are pickled as usual.
+        if type(self) in TOKEN_CLASSES:
+            return type(self), (self._value, self._lang)
+        return super().__reduce_ex__(protocol)
 
     def __repr__(self):
         return f"'{self.__str__()}'"
 
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary representation: the class of the token, its language prefixed by its length (255 for None)
+        and its utf-8 value. Only the classes of TOKEN_CLASSES can be serialized, see token_class_code.
+        """
+        lang = b"" if self._lang is None else self._lang.encode("utf-8")
+        header = _TOKEN_HEADER.pack(token_class_code(type(self)), _NO_LANG if self._lang is None else len(lang))
+        return header + lang + self._value.encode("utf-8", "surrogatepass")
+
+    @staticmethod
+    def from_bytes(data) -> "Token":
+        """Token encoded by `to_bytes`, of the class it was encoded from."""
+        class_code, lang_length = _TOKEN_HEADER.unpack_from(data)
+        start = _TOKEN_HEADER.size + (0 if lang_length == _NO_LANG else lang_length)
+        lang = None if lang_length == _NO_LANG else str(data[_TOKEN_HEADER.size : start], "utf-8")
+        return TOKEN_CLASSES[class_code](str(data[start:], "utf-8", "surrogatepass"), lang)
+
     def __str__(self):
         return self._value
 
@@ -84,6 +183,7 @@ class Token:
     @value.setter
     def value(self, val):
         self._value = val
+        self._kind = None
 
     @property
     def lang(self):
@@ -93,6 +193,26 @@ class Token:
     def lang(self, new_lang):
         self._lang = new_lang
 
+    @property
+    def kind(self):
+        """
+        The kind of the token, one of TOKEN_KINDS.
+        Conditions are checked in the same order as the actions of ParsedText.process, tags replacing tokens
+        (e.g. <MENTION>) are of the "tag" kind and tokens matching no condition of the "word" kind.
+        The kind is computed once, until the value changes.
+        """
+        if self._kind is None:
+            self._kind = self._compute_kind()
+        return self._kind
+
+    def _compute_kind(self):
+        if self._value in _TAGS:
+            return TAG_KIND
+        for kind, condition in _KIND_CONDITIONS:
+            if self.get_attr(condition):
+                return kind
+        return WORD_KIND
+
     @property
     def is_hashtag(self):
         return not self._check_flag(pattern=NOT_A_HASHTAG_PATTERN) and self._check_flag(pattern=HASHTAG_PATTERN)
@@ -112,7 +232,7 @@ class Token:
     @property
     def is_emoji(self):
         # emoji in unicode representation or textual representation
-        return self.value in UNICODE_EMOJI_ENGLISH or self.value in EMOJI_ALIAS_UNICODE_ENGLISH
+        return emojis.is_emoji(self._value)
 
     @property
     def is_digit(self):
@@ -120,7 +240,7 @@ class Token:
 
     @property
     def is_punct(self):
-        return len(self.value) == 1 and self._is_punctuation(self._value)
+        return len(self._value) == 1 and self._is_punctuation(self._value)
 
     @property
     def is_email(self):
@@ -128,29 +248,20 @@ class Token:
 
     @property
     def is_stop_word(self):
-        if self._lang is None or self.lang == UNKNOWN_LANGUAGE:
+        if self._lang is None or self._lang == UNKNOWN_LANGUAGE:
             return False
-        return self.value.lower() in get_stop_words(self._lang)
+        return is_stop_word_value(self._value, get_stop_words(self._lang))
 
     @property
     def is_html_tag(self):
         return self._check_flag(pattern=HTML_TAG_PATTERN)
 
     @staticmethod
-    # The following function is copied from https://github.com/google-research/bert/blob/master/tokenization.py#L386
     def _is_punctuation(char):
-        """Checks whether `chars` is a punctuation character."""
-        cp = ord(char)
-        # We treat all non-letter/number ASCII as punctuation.
-        # Characters such as "^", "$", and "`" are not in the Unicode
-        # Punctuation class but we treat them as punctuation anyways, for
-        # consistency.
-        if (33 <= cp <= 47) or (58 <= cp <= 64) or (91 <= cp <= 96) or (123 <= cp <= 126):
+        """Checks whether `chars` is a punctuation character, using a lookup table."""
+        if char in _get_punctuation_chars():
             return True
-        cat = unicodedata.category(char)
-        if cat.startswith("P"):
-            return True
-        return False
+        return ord(char) >= _PUNCTUATION_TABLE_SIZE and _is_punctuation_char(char)
 
 
 class Action:
@@ -170,7 +281,7 @@ class Action:
     }
     ACTION_MAPPING = {
         "is_mention": ["remove", "tag"],
-        "is_hashtag": ["remove", "tag"],
+        "is_hashtag": ["remove", "tag", "segment"],
         "is_url": ["remove", "tag"],
         "is_digit": ["remove", "tag"],
         "is_emoji": ["remove", "tag", "demojize", "emojize"],
@@ -194,11 +305,15 @@ class Action:
 
     @staticmethod
     def _demojize(token: Token):
-        token.value = emoji.demojize(token.value)
+        token.value = emojis.demojize(token.value)
 
     @staticmethod
     def _emojize(token: Token):
-        token.value = emoji.emojize(token.value, use_aliases=True)
+        token.value = emojis.emojize(token.value)
+
+    @staticmethod
+    def _segment(token: Token):
+        token.value = segment_hashtag(token.value)
 
     def _is_valid_action(self, token_obj):
         """Check if action is valid."""
@@ -224,14 +339,36 @@ class Action:
         :return: bool, Is the action applied on token
         """
         if self._is_valid_action(token) and token.get_attr(self._action_condition):
-            {"remove": self._remove, "tag": self._tag, "demojize": self._demojize, "emojize": self._emojize,}[
-                self._action_name
-            ](token)
+            self.run(token)
             return True
         return False
 
+    def run(self, token: Token):
+        """Apply the action on the token without checking its condition."""
+        {
+            "remove": self._remove,
+            "tag": self._tag,
+            "demojize": self._demojize,
+            "emojize": self._emojize,
+            "segment": self._segment,
+        }[self._action_name](token)
+
 
 class WeiboToken(Token):
     @property
     def is_hashtag(self):
         return self._check_flag(WEIBO_HASHTAG)
+
+
+# Token classes that can be serialized, their index is stored in the binary representations
+TOKEN_CLASSES = [Token, WeiboToken]
+
+
+def token_class_code(token_class: Type[Token]) -> int:
+    """The code of a token class in the binary representations, a TypeError is raised if it can't be serialized."""
+    try:
+        return TOKEN_CLASSES.index(token_class)
+    except ValueError:
+        raise TypeError(
+            f"{token_class.__name__} tokens can't be serialized, only {[cls.__name__ for cls in TOKEN_CLASSES]}"
+        ) from None
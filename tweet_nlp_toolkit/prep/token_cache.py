@@ -0,0 +1,287 @@
+"""
+Two-level cache of tokenized texts.
+
+Preprocessing is split into two steps: the normalization and tokenization of the texts (`tokenize_text`), then the
+actions applied to the tokens (`ParsedText.process`). The first, expensive step is done once and saved by
+`build_token_cache`, then any configuration of actions is applied to the cached tokens by `TokenCache`.
+
+The distinct tokens are stored once, along with their class, their language and the conditions they satisfy
+(is_mention, is_hashtag, ...), and each text is a list of token ids. Only the token classes of TOKEN_CLASSES can be
+cached. Applying actions costs one pass over the distinct tokens and a lookup per token, without running the tokenizer
+nor the conditions again. The output is the same as parse_text's with the same options.
+
+Usage Example:
+
+    from tweet_nlp_toolkit.prep.token_cache import build_token_cache, TokenCache
+
+    build_token_cache(texts, "tweets.tokens", strip_accents=True)
+
+    cache = TokenCache.load("tweets.tokens")
+    for text in cache.values(mentions="tag", hashtags="remove"):
+        ...
+    parsed_texts = list(cache.parse(stop_words="remove"))
+"""
+import mmap
+import re
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from tweet_nlp_toolkit.prep.file_io import DEFAULT_BUFFER_SIZE
+from tweet_nlp_toolkit.prep.text_parser import ACTION_CONDITIONS, ParsedText, tokenize_text
+from tweet_nlp_toolkit.prep.token import Action, Token, TOKEN_CLASSES, token_class_code
+
+# File layout, in little-endian byte order: header, token ids (int32, padded to 8 bytes), offsets of the texts in the
+# token ids (int64), offsets of the distinct tokens in the blob (int64), conditions of the distinct tokens (uint16),
+# languages of the distinct tokens (uint16, 0 for None or 1 + the index of the language), classes of the distinct
+# tokens (uint8, see token_class_code), languages (prefixed by their utf-8 length, uint8), utf-8 blob of the distinct
+# tokens
+_MAGIC = b"TNTTOKNS"
+# magic, number of texts, number of tokens, number of distinct tokens, number of languages
+_HEADER = struct.Struct("<8sqqqq")
+
+_CONDITIONS = list(ACTION_CONDITIONS.values())
+
+# number of texts whose token ids are read at once
+_CHUNK_SIZE = 10000
+
+_SPACES = re.compile(r"\s+")
+
+
+def _token_flags(token: Token) -> int:
+    flags = 0
+    for bit, condition in enumerate(_CONDITIONS):
+        if token.get_attr(condition):
+            flags |= 1 << bit
+    return flags
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+def _write_array(f: BinaryIO, values: array):
+    """Write an array in little-endian byte order."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(f)
+
+
+def _read_array(values: memoryview) -> Union[memoryview, array]:
+    """The values of a view of a little-endian array, copied and byteswapped on big-endian hosts."""
+    if sys.byteorder == "big":
+        swapped = array(values.format, values.tobytes())
+        swapped.byteswap()
+        return swapped
+    return values
+
+
+class TokenCacheWriter:
+    """
+    Write tokenized texts into a cache file, token ids are written in blocks as texts are added.
+
+    :param path: the cache file
+    :param buffer_size: the number of bytes of token ids buffered before being written
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self._f = open(path, "wb")  # pylint: disable=consider-using-with
+        self._f.write(_HEADER.pack(_MAGIC, 0, 0, 0, 0))
+        self._buffer_size = buffer_size
+        self._ids = array("i")
+        self._text_offsets = array("q", [0])
+        self._index: Dict[Tuple[str, type, Optional[str]], int] = {}
+        self._values: List[str] = []
+        self._flags = array("H")
+        self._langs = array("H")
+        self._classes = array("B")
+        self._lang_ids: Dict[str, int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, tokens: Iterable[Token]):
+        """Add the tokens of a text."""
+        count = 0
+        for token in tokens:
+            key = (token.value, type(token), token.lang)
+            token_id = self._index.get(key)
+            if token_id is None:
+                token_id = self._index[key] = len(self._values)
+                self._values.append(token.value)
+                self._flags.append(_token_flags(token))
+                self._classes.append(token_class_code(type(token)))
+                lang = token.lang
+                self._langs.append(0 if lang is None else self._lang_ids.setdefault(lang, len(self._lang_ids) + 1))
+            self._ids.append(token_id)
+            count += 1
+        self._text_offsets.append(self._text_offsets[-1] + count)
+        if len(self._ids) * self._ids.itemsize >= self._buffer_size:
+            _write_array(self._f, self._ids)
+            self._ids = array("i")
+
+    def close(self):
+        """Write the distinct token values and the header of the cache, the writer can't be used afterwards."""
+        if self._f.closed:
+            return
+        _write_array(self._f, self._ids)
+        n_tokens = self._text_offsets[-1]
+        self._f.write(_padding(n_tokens * self._ids.itemsize))
+        encoded = [value.encode("utf-8") for value in self._values]
+        value_offsets = array("q", [0])
+        for value in encoded:
+            value_offsets.append(value_offsets[-1] + len(value))
+        _write_array(self._f, self._text_offsets)
+        _write_array(self._f, value_offsets)
+        _write_array(self._f, self._flags)
+        _write_array(self._f, self._langs)
+        _write_array(self._f, self._classes)
+        for lang in self._lang_ids:
+            encoded_lang = lang.encode("utf-8")
+            self._f.write(bytes([len(encoded_lang)]) + encoded_lang)
+        self._f.write(b"".join(encoded))
+        self._f.seek(0)
+        self._f.write(
+            _HEADER.pack(_MAGIC, len(self._text_offsets) - 1, n_tokens, len(self._values), len(self._lang_ids))
+        )
+        self._f.close()
+
+
+def build_token_cache(texts: Iterable[str], path: str, **kwargs) -> int:
+    """
+    Tokenize texts into a cache file.
+
+    :param texts: the texts to tokenize
+    :param path: the cache file
+    :param kwargs: arguments for the tokenize_text function, e.g. tokenizer, to_lower or strip_accents
+    :return: the number of texts
+    """
+    count = 0
+    with TokenCacheWriter(path) as writer:
+        for count, text in enumerate(texts, 1):
+            writer.add(tokenize_text(text, **kwargs))
+    return count
+
+
+class TokenCache:
+    """Memory-mapped tokenized texts written by TokenCacheWriter, see `load`."""
+
+    def __init__(self, buffer: mmap.mmap):
+        magic, n_texts, n_tokens, n_values, n_langs = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError("not a token cache file")
+        view = memoryview(buffer)
+        position = _HEADER.size
+
+        def _next(size: int) -> memoryview:
+            nonlocal position
+            start, position = position, position + size
+            return view[start:position]
+
+        self._ids = _read_array(_next(4 * n_tokens).cast("i"))
+        position += -position % 8
+        self._text_offsets = _read_array(_next(8 * (n_texts + 1)).cast("q"))
+        self._value_offsets = _read_array(_next(8 * (n_values + 1)).cast("q"))
+        self._flags = _read_array(_next(2 * n_values).cast("H"))
+        self._langs = _read_array(_next(2 * n_values).cast("H"))
+        self._classes = _next(n_values)
+        self._lang_values: List[Optional[str]] = [None]
+        for _ in range(n_langs):
+            length = view[position]
+            self._lang_values.append(str(view[position + 1 : position + 1 + length], "utf-8"))
+            position += 1 + length
+        self._blob = view[position:]
+        self._buffer = buffer
+        self._values: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "TokenCache":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return len(self._text_offsets) - 1
+
+    def __getitem__(self, index: int) -> List[Token]:
+        """The tokens of a text, before any action."""
+        if not 0 <= index < len(self):
+            raise IndexError("text index out of range")
+        values = self.distinct_tokens
+        ids = self._ids[self._text_offsets[index] : self._text_offsets[index + 1]].tolist()
+        return [self._token(i, values[i]) for i in ids]
+
+    def _token(self, token_id: int, value: str) -> Token:
+        """A token of the class and the language of a distinct token, with the given value."""
+        return TOKEN_CLASSES[self._classes[token_id]](value, self._lang_values[self._langs[token_id]])
+
+    @property
+    def distinct_tokens(self) -> List[str]:
+        """The distinct token values, indexed by token id. Decoded on first use."""
+        if self._values is None:
+            offsets, blob = self._value_offsets.tolist(), self._blob
+            self._values = [bytes(blob[start:end]).decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        return self._values
+
+    def _processed_tokens(self, actions: Dict[str, Optional[str]]) -> List[str]:
+        """The value of each distinct token once the actions are applied, empty for removed tokens."""
+        unknown_options = set(actions) - set(ACTION_CONDITIONS)
+        if unknown_options:
+            raise TypeError(f"unexpected action options {sorted(unknown_options)}")
+        active_actions = []
+        for bit, (option, condition) in enumerate(ACTION_CONDITIONS.items()):
+            action_name = actions.get(option)
+            if not action_name:
+                continue
+            if action_name not in Action.ACTION_MAPPING[condition]:
+                raise ValueError(f"unknown action '{action_name}', expected {Action.ACTION_MAPPING[condition]}")
+            active_actions.append((1 << bit, Action(action_name=action_name, action_condition=condition)))
+
+        processed = []
+        for token_id, (value, flags) in enumerate(zip(self.distinct_tokens, self._flags)):
+            for bit, action in active_actions:
+                if flags & bit:
+                    token = self._token(token_id, value)
+                    action.run(token)
+                    value = token.value
+                    break
+            processed.append(value)
+        return processed
+
+    def _iter_ids(self) -> Iterator[List[int]]:
+        """Token ids of each text, read in chunks."""
+        for start in range(0, len(self), _CHUNK_SIZE):
+            offsets = self._text_offsets[start : min(start + _CHUNK_SIZE, len(self)) + 1].tolist()
+            ids = self._ids[offsets[0] : offsets[-1]].tolist()
+            base = offsets[0]
+            for begin, end in zip(offsets, offsets[1:]):
+                yield ids[begin - base : end - base]
+
+    def values(self, **kwargs) -> Iterator[str]:
+        """
+        Apply actions to the cached texts.
+
+        :param kwargs: the action arguments of the parse_text function, e.g. mentions="tag"
+        :return: an iterator of the preprocessed texts, the same as `parse_text(text, **options).value`
+        """
+        processed = self._processed_tokens(kwargs)
+        for ids in self._iter_ids():
+            text = " ".join(filter(None, map(processed.__getitem__, ids)))
+            yield _SPACES.sub(" ", text).strip()
+
+    def parse(self, **kwargs) -> Iterator[ParsedText]:
+        """
+        Apply actions to the cached texts.
+
+        :param kwargs: the action arguments of the parse_text function, e.g. mentions="tag"
+        :return: an iterator of ParsedText instances, the same as parse_text's
+        """
+        processed = self._processed_tokens(kwargs)
+        for ids in self._iter_ids():
+            parsed_text = ParsedText([self._token(i, processed[i]) for i in ids if processed[i]])
+            parsed_text.post_process()
+            yield parsed_text
@@ -2,7 +2,11 @@
 Tokenizers.
 """
 import logging
-from typing import List, Callable
+import re
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional, Type
 
 from mosestokenizer import MosesDetokenizer
 
@@ -10,6 +14,7 @@ from tweet_nlp_toolkit.constants import CJK, JP_CHARACTERS, THAI_CHARACTERS
 from tweet_nlp_toolkit.prep.regexes import (
     TWEET_TOKENIZE,
     WEIBO_TOKENIZE,
+    compile_tokenizer,
 )
 from tweet_nlp_toolkit.prep.token import WeiboToken, Token
 from tweet_nlp_toolkit.prep.word_segmentation import segment
@@ -35,21 +40,65 @@ class Detokenizer:
         return self._detokenizer(tokens)
 
 
+class TimeBudgetExceeded(Exception):
+    """The tokenization of a text took longer than its time budget, see tokenize_with_time_budget."""
+
+
+# deadline of the tokenization running in the current thread, None without time budget
+_deadline = threading.local()
+
+
+def set_regex_backend(name: str):
+    """
+    Compile the patterns of tweet_tokenize and weibo_tokenize with another regex backend, the tokens are the same.
+
+    Only the patterns of this module are replaced: regexes.TWEET_TOKENIZE, and the modules that imported it or built
+    their own patterns (e.g. pipeline_stats), keep theirs. It applies to the current process and to the worker
+    processes started afterwards with the "fork" start method. Workers started with "spawn" or "forkserver" (the
+    default on macOS and Windows) import this module again and use `re`, they should call it themselves, e.g.
+    `ProcessPoolExecutor(initializer=set_regex_backend, initargs=("regex",))`.
+
+    :param name: the name of the backend, one of REGEX_BACKENDS
+    """
+    global TWEET_TOKENIZE, WEIBO_TOKENIZE  # pylint: disable=global-statement
+    TWEET_TOKENIZE = compile_tokenizer(name)
+    WEIBO_TOKENIZE = compile_tokenizer(name, weibo=True)
+
+
+def _findall(pattern: re.Pattern, text: str) -> List[str]:
+    """
+    The tokens matched by a pattern, a TimeBudgetExceeded is raised past the deadline of the current thread.
+
+    The time budget is best-effort: the deadline is checked between matches, a match in progress isn't interrupted.
+    It relies on the guards of the patterns (see regexes._EMAIL_GUARD and regexes._MOUTHS_GUARD) keeping each match
+    short, pathological texts being slow because of their many tokens.
+    """
+    deadline = getattr(_deadline, "value", None)
+    if deadline is None:
+        return pattern.findall(text)
+    tokens = []
+    for match in pattern.finditer(text):
+        tokens.append(match.group())
+        if time.perf_counter() > deadline:
+            raise TimeBudgetExceeded(f"tokenizing a text of {len(text)} characters exceeded its time budget")
+    return tokens
+
+
 def tweet_tokenize(text: str) -> List[Token]:
-    return [Token(tok) for tok in TWEET_TOKENIZE.findall(text)]
+    return [Token(tok) for tok in _findall(TWEET_TOKENIZE, text)]
 
 
 def _weibo_tokenize(text: str) -> List[WeiboToken]:
-    return [WeiboToken(tok) for tok in WEIBO_TOKENIZE.findall(text)]
+    return [WeiboToken(tok) for tok in _findall(WEIBO_TOKENIZE, text)]
 
 
-def white_space_tokenize(text: str) -> List[Token]:
+def white_space_tokenize(text: str, token_class: Type[Token] = Token) -> List[Token]:
     """White space tokenize with simple cleaning."""
     text = text.strip()
     if not text:
         return []
     tokens = text.split()
-    return [Token(tok) for tok in tokens]
+    return [token_class(tok) for tok in tokens]
 
 
 # reference: https://stackoverflow.com/questions/9166130/what-are-the-upper-and-lower-bound-for-chinese-char-in-utf-8
@@ -129,3 +178,54 @@ def weibo_tokenize(text: str, segment_hashtag=False) -> List[WeiboToken]:
         else:
             output.extend(list(map(lambda x: WeiboToken(str(x)), chinese_tokenize(token.value))))
     return output
+
+
+# tokenizers returning subclasses of Token, possibly wrapped in a functools.partial
+_TOKEN_CLASSES: Dict[Callable, Type[Token]] = {weibo_tokenize: WeiboToken}
+
+
+def tokenize_with_time_budget(
+    text: str,
+    tokenizer: Callable[[str], List[Token]] = tweet_tokenize,
+    time_budget: float = 0.1,
+    fallback: Optional[Callable[[str], List[Token]]] = None,
+) -> List[Token]:
+    """
+    Tokenize a text, falling back to another tokenizer when it takes too long.
+
+    Some texts, e.g. long runs of punctuations, take super-linear time to be tokenized by the regular expressions of
+    tweet_tokenize and weibo_tokenize. With a time budget, their tokenization is stopped once the budget is exceeded
+    and the text is tokenized by the fallback tokenizer instead, so that a pathological text doesn't stall a worker.
+    Only the regular expression tokenization is stopped, not word segmentation.
+
+    :param text: the text to tokenize
+    :param tokenizer: the tokenizer
+    :param time_budget: the time budget in seconds
+    :param fallback: the tokenizer used when the time budget is exceeded, default white_space_tokenize with the
+        token class of the tokenizer, e.g. WeiboToken for weibo_tokenize
+    :return: the list of tokens
+    """
+    # tokenizers may themselves tokenize with a time budget, the deadline of the caller is restored afterwards
+    previous_deadline = getattr(_deadline, "value", None)
+    _deadline.value = time.perf_counter() + time_budget
+    try:
+        return tokenizer(text)
+    except TimeBudgetExceeded:
+        log.warning(f"Tokenizing a text of {len(text)} characters took more than {time_budget}s, using the fallback")
+        if fallback is None:
+            token_class = _TOKEN_CLASSES.get(getattr(tokenizer, "func", tokenizer), Token)
+            fallback = partial(white_space_tokenize, token_class=token_class)
+        return fallback(text)
+    finally:
+        _deadline.value = previous_deadline
+
+
+# tokenizers by name, e.g. for the command line or the preprocessing server
+TOKENIZERS = {
+    "tweet": tweet_tokenize,
+    "weibo": weibo_tokenize,
+    "chinese": chinese_tokenize,
+    "japanese": japanese_tokenize,
+    "thai": thai_tokenize,
+    "white_space": white_space_tokenize,
+}
@@ -1,30 +1,70 @@
 """
 Utils functions.
 """
+import os
 import unicodedata
+import zipfile
+from functools import lru_cache
+from typing import Dict, FrozenSet
 
 from tweet_nlp_toolkit.constants import ENGLISH_STOP_WORDS, UNKNOWN_LANGUAGE, VARIATION_SELECTORS, PYCLD2_LANGUAGE_CODES
 
 import pycld2
 
 
-# Note: The following code is copied from https://github.com/google-research/bert/blob/master/tokenization.py#L220
+class _AccentsTranslationTable(dict):
+    """str.translate table removing nonspacing marks, filled lazily with the code points met."""
+
+    def __missing__(self, cp):
+        value = None if unicodedata.category(chr(cp)) == "Mn" else cp
+        self[cp] = value
+        return value
+
+
+_ACCENTS_TRANSLATION_TABLE = _AccentsTranslationTable()
+
+
+# Note: The following code is adapted from https://github.com/google-research/bert/blob/master/tokenization.py#L220
 def strip_accents_unicode(text):
-    text = unicodedata.normalize("NFD", text)
-    output = []
-    for char in text:
-        cat = unicodedata.category(char)
-        if cat == "Mn":
-            continue
-        output.append(char)
-    return "".join(output)
+    if text.isascii():  # nothing to decompose
+        return text
+    return unicodedata.normalize("NFD", text).translate(_ACCENTS_TRANSLATION_TABLE)
+
+
+# Stop words of the languages other than English, a text member <lang>.txt of lowercase words per language
+STOP_WORDS_FILE = os.path.join(os.path.dirname(__file__), "resources", "stop_words.zip")
+_STOP_WORDS: Dict[str, FrozenSet[str]] = {"en": ENGLISH_STOP_WORDS}
 
 
-def get_stop_words(lang):
-    if lang == "en":
-        return ENGLISH_STOP_WORDS
+@lru_cache(maxsize=None)
+def stop_word_languages() -> FrozenSet[str]:
+    """The languages with a stop list."""
+    with zipfile.ZipFile(STOP_WORDS_FILE) as archive:
+        return frozenset(_STOP_WORDS) | frozenset(os.path.splitext(name)[0] for name in archive.namelist())
 
-    raise ValueError(f"Unknown stop list: {lang}")
+
+def _load_stop_words(lang: str) -> FrozenSet[str]:
+    if lang not in stop_word_languages():
+        if lang == UNKNOWN_LANGUAGE or lang in PYCLD2_LANGUAGE_CODES:
+            return frozenset()
+        raise ValueError(f"Unknown stop list: {lang}")
+    with zipfile.ZipFile(STOP_WORDS_FILE) as archive:
+        words = archive.read(f"{lang}.txt").decode("utf-8").split()
+    # texts parsed with strip_accents=True
+    return frozenset(words) | frozenset(map(strip_accents_unicode, words))
+
+
+def get_stop_words(lang) -> FrozenSet[str]:
+    """
+    The lowercase stop words of a language, loaded on first use. Accented words are there without their accents too.
+
+    :param lang: a language code of get_language, e.g. "en" or "fr"
+    :return: the stop words, empty for the languages without a stop list, see stop_word_languages
+    """
+    stop_words = _STOP_WORDS.get(lang)
+    if stop_words is None:
+        stop_words = _STOP_WORDS[lang] = _load_stop_words(lang)
+    return stop_words
 
 
 def get_language(text, languages_set=PYCLD2_LANGUAGE_CODES):